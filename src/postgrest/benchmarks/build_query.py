@@ -0,0 +1,58 @@
+"""Measure the cost of building a typical query, up to its encoded query string.
+
+Reports the time taken per query, and the memory held by each built query
+while it is alive (builder, request configuration, headers and params).
+
+Usage: uv run --package postgrest benchmarks/build_query.py
+"""
+
+from __future__ import annotations
+
+import timeit
+import tracemalloc
+
+from httpx import Client, Headers
+from yarl import URL
+
+from postgrest import SyncRequestBuilder, SyncSelectRequestBuilder
+
+session = Client(base_url="http://example.com")
+path = URL("http://example.com/rest/v1/countries")
+headers = Headers({"Accept-Profile": "public"})
+
+
+def build() -> SyncSelectRequestBuilder:
+    return (
+        SyncRequestBuilder(session, path, headers, None)
+        .select("id, name, iso2, capital")
+        .eq("continent", "Europe")
+        .gte("population", 1000)
+        .neq("iso2", "FR")
+        .order("name")
+        .limit(20)
+    )
+
+
+def build_and_encode() -> str:
+    return str(build().request.params)
+
+
+def retained_bytes(runs: int = 10_000) -> float:
+    build()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    queries = [build() for _ in range(runs)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del queries
+    return (after - before) / runs
+
+
+def main() -> None:
+    runs, total = timeit.Timer(build_and_encode).autorange()
+    print(f"build and encode: {total / runs * 1e6:6.1f} us per query")
+    print(f"   held per query: {retained_bytes():6.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Compare the default, validated decoding of a response with `skip_validation`.
+
+Usage: uv run --package postgrest benchmarks/decode_response.py [rows]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import timeit
+
+from httpx import Request, Response
+
+from postgrest import APIResponse
+from postgrest.utils import json_loads
+
+
+def make_response(rows: int) -> Response:
+    body = [
+        {
+            "id": i,
+            "name": f"country {i}",
+            "iso2": "BQ",
+            "population": i * 1000.5,
+            "tags": ["a", "b", "c"],
+            "capital": {"name": f"city {i}", "coordinates": [12.5, -68.3]},
+            "local_name": None,
+        }
+        for i in range(rows)
+    ]
+    return Response(
+        200,
+        content=json.dumps(body).encode(),
+        request=Request("GET", "http://example.com"),
+    )
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    response = make_response(rows)
+    print(
+        f"{rows} rows, {len(response.content) / 1e6:.1f} MB, decoder: {json_loads.__module__}"
+    )
+    for name, skip_validation in (("validated", False), ("skip_validation", True)):
+        runs, total = timeit.Timer(
+            lambda: APIResponse.from_http_request_response(
+                response, skip_validation=skip_validation
+            )
+        ).autorange()
+        print(f"{name:>16}: {total / runs * 1000:8.2f} ms per response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Measure the time taken to import the package in a fresh interpreter.
+
+Each statement is run in new processes, so that nothing is cached in
+`sys.modules`, and the median over several runs is reported in
+milliseconds.
+
+Usage: uv run --package postgrest benchmarks/import_time.py
+"""
+
+from __future__ import annotations
+
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    "import postgrest": "import postgrest",
+    "async client": "from postgrest import AsyncPostgrestClient",
+    "sync client": "from postgrest import SyncPostgrestClient",
+    "both clients": "from postgrest import AsyncPostgrestClient, SyncPostgrestClient",
+}
+
+TIMER = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def import_time(statement: str, runs: int = 15) -> float:
+    times = [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", TIMER.format(statement=statement)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        )
+        for _ in range(runs)
+    ]
+    return statistics.median(times) * 1e3
+
+
+def main() -> None:
+    for name, statement in STATEMENTS.items():
+        print(f"{name:>16}: {import_time(statement):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
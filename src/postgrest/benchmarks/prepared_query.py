@@ -0,0 +1,58 @@
+"""Compare building a query with the builder chain against a prepared query.
+
+Only the request construction is measured, up to the URL sent: the chain
+of builder methods and the encoding of its params against binding the
+values of a prepared query. Sending the request costs the same either way.
+
+Usage: uv run --package postgrest benchmarks/prepared_query.py
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from httpx import Client, Headers
+from yarl import URL
+
+from postgrest import Param, SyncRequestBuilder
+
+
+def main() -> None:
+    session = Client(base_url="http://example.com")
+
+    def builder() -> SyncRequestBuilder:
+        return SyncRequestBuilder(session, URL("/countries"), Headers(), None)
+
+    def chained(value: int) -> str:
+        return (
+            builder()
+            .select("id, name, iso2, capital")
+            .eq("continent", "Europe")
+            .gte("population", value)
+            .order("name")
+            .limit(20)
+            .request.url()
+        )
+
+    template = (
+        builder()
+        .select("id, name, iso2, capital")
+        .eq("continent", "Europe")
+        .gte("population", Param("population"))
+        .order("name")
+        .limit(20)
+        .prepare()
+        .template
+    )
+    assert template.url({"population": 1000}) == chained(1000)
+
+    for name, run in (
+        ("chained", lambda: chained(1000)),
+        ("prepared", lambda: template.url({"population": 1000})),
+    ):
+        runs, total = timeit.Timer(run).autorange()
+        print(f"{name:>9}: {total / runs * 1e6:8.2f} us per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,18 @@ import unasync
 paths = Path("src/postgrest").glob("**/*.py")
 tests = Path("tests").glob("**/*.py")
 
-rules = (unasync._DEFAULT_RULE,)
+rules = (
+    unasync.Rule(
+        fromdir="/_async/",
+        todir="/_sync/",
+        additional_replacements={
+            "aiter_bytes": "iter_bytes",
+            "aread": "read",
+            "AsyncExitStack": "ExitStack",
+            "push_async_exit": "push",
+        },
+    ),
+)
 
 files = [str(p) for p in list(paths) + list(tests)]
 
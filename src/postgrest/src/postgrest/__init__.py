@@ -1,38 +1,99 @@
 from __future__ import annotations
 
-from httpx import Timeout
-
-from ._async.client import AsyncPostgrestClient
-from ._async.request_builder import (
-    AsyncFilterRequestBuilder,
-    AsyncMaybeSingleRequestBuilder,
-    AsyncQueryRequestBuilder,
-    AsyncRequestBuilder,
-    AsyncRPCFilterRequestBuilder,
-    AsyncSelectRequestBuilder,
-    AsyncSingleRequestBuilder,
-)
-from ._sync.client import SyncPostgrestClient
-from ._sync.request_builder import (
-    SyncFilterRequestBuilder,
-    SyncMaybeSingleRequestBuilder,
-    SyncQueryRequestBuilder,
-    SyncRequestBuilder,
-    SyncRPCFilterRequestBuilder,
-    SyncSelectRequestBuilder,
-    SyncSingleRequestBuilder,
-)
-from .base_request_builder import APIResponse
-from .constants import DEFAULT_POSTGREST_CLIENT_HEADERS
-from .exceptions import APIError
-from .types import (
-    CountMethod,
-    Filters,
-    RequestMethod,
-    ReturnMethod,
-)
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
 from .version import __version__
 
+if TYPE_CHECKING:
+    from httpx import Timeout
+
+    from ._async.client import AsyncPostgrestClient
+    from ._async.request_builder import (
+        AsyncFilterRequestBuilder,
+        AsyncMaybeSingleRequestBuilder,
+        AsyncQueryRequestBuilder,
+        AsyncRequestBuilder,
+        AsyncRPCFilterRequestBuilder,
+        AsyncSelectRequestBuilder,
+        AsyncSingleRequestBuilder,
+    )
+    from ._sync.client import SyncPostgrestClient
+    from ._sync.request_builder import (
+        SyncFilterRequestBuilder,
+        SyncMaybeSingleRequestBuilder,
+        SyncQueryRequestBuilder,
+        SyncRequestBuilder,
+        SyncRPCFilterRequestBuilder,
+        SyncSelectRequestBuilder,
+        SyncSingleRequestBuilder,
+    )
+    from .base_request_builder import (
+        APIResponse,
+        BulkAPIResponse,
+        BulkChunkError,
+        BulkUpdateResponse,
+        RPCResult,
+    )
+    from .cache import CountCache, ResponseCache
+    from .constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+    from .exceptions import APIError
+    from .explain import ExplainPlan, ExplainSampler
+    from .export import ExportResult
+    from .metrics import QueryMetrics, QuerySample, QueryStats
+    from .pool import PoolStats
+    from .prepared import Param
+    from .types import (
+        CountMethod,
+        Filters,
+        RequestMethod,
+        ReturnMethod,
+    )
+
+# The public names are imported from their module when first accessed
+# (PEP 562), so that `import postgrest` doesn't pay for pydantic, httpx and
+# both client flavours until they are used, which matters for cold starts.
+_LAZY_IMPORTS = {
+    "Timeout": "httpx",
+    "AsyncPostgrestClient": "._async.client",
+    "AsyncFilterRequestBuilder": "._async.request_builder",
+    "AsyncMaybeSingleRequestBuilder": "._async.request_builder",
+    "AsyncQueryRequestBuilder": "._async.request_builder",
+    "AsyncRequestBuilder": "._async.request_builder",
+    "AsyncRPCFilterRequestBuilder": "._async.request_builder",
+    "AsyncSelectRequestBuilder": "._async.request_builder",
+    "AsyncSingleRequestBuilder": "._async.request_builder",
+    "SyncPostgrestClient": "._sync.client",
+    "SyncFilterRequestBuilder": "._sync.request_builder",
+    "SyncMaybeSingleRequestBuilder": "._sync.request_builder",
+    "SyncQueryRequestBuilder": "._sync.request_builder",
+    "SyncRequestBuilder": "._sync.request_builder",
+    "SyncRPCFilterRequestBuilder": "._sync.request_builder",
+    "SyncSelectRequestBuilder": "._sync.request_builder",
+    "SyncSingleRequestBuilder": "._sync.request_builder",
+    "APIResponse": ".base_request_builder",
+    "BulkAPIResponse": ".base_request_builder",
+    "BulkChunkError": ".base_request_builder",
+    "BulkUpdateResponse": ".base_request_builder",
+    "RPCResult": ".base_request_builder",
+    "CountCache": ".cache",
+    "ResponseCache": ".cache",
+    "DEFAULT_POSTGREST_CLIENT_HEADERS": ".constants",
+    "APIError": ".exceptions",
+    "ExplainPlan": ".explain",
+    "ExplainSampler": ".explain",
+    "ExportResult": ".export",
+    "QueryMetrics": ".metrics",
+    "QuerySample": ".metrics",
+    "QueryStats": ".metrics",
+    "PoolStats": ".pool",
+    "Param": ".prepared",
+    "CountMethod": ".types",
+    "Filters": ".types",
+    "RequestMethod": ".types",
+    "ReturnMethod": ".types",
+}
+
 __all__ = [
     "AsyncPostgrestClient",
     "AsyncFilterRequestBuilder",
@@ -51,8 +112,22 @@ __all__ = [
     "SyncSelectRequestBuilder",
     "SyncSingleRequestBuilder",
     "APIResponse",
+    "BulkAPIResponse",
+    "BulkChunkError",
+    "BulkUpdateResponse",
+    "RPCResult",
     "DEFAULT_POSTGREST_CLIENT_HEADERS",
     "APIError",
+    "ExplainPlan",
+    "ExplainSampler",
+    "ExportResult",
+    "Param",
+    "PoolStats",
+    "QueryMetrics",
+    "QuerySample",
+    "QueryStats",
+    "ResponseCache",
+    "CountCache",
     "CountMethod",
     "Filters",
     "RequestMethod",
@@ -60,3 +135,27 @@ __all__ = [
     "Timeout",
     "__version__",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module(module, __name__), name)
+    elif name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    else:
+        # submodules used to be imported by the package, keep them reachable
+        try:
+            value = importlib.import_module(f".{name}", __name__)
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(
+                f"module {__name__!r} has no attribute {name!r}"
+            ) from None
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,36 +1,192 @@
 from __future__ import annotations
 
-from typing import Any, Generic, Literal, Optional, TypeVar, Union, overload
+import os
+from collections import deque
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+    overload,
+)
 
-from httpx import AsyncClient, BasicAuth, Headers, QueryParams, Response
+from httpx import AsyncClient, BasicAuth, Headers, HTTPError, Response
 from pydantic import ValidationError
-from typing_extensions import override
+from typing_extensions import Self, override
+
+if TYPE_CHECKING:
+    import pyarrow
+
+    from ..explain import ExplainSampler
+    from ..export import (
+        ExportCheckpoint,
+        ExportFormat,
+        ExportResult,
+        ExportSink,
+        PartitionState,
+    )
+    from ..metrics import QueryObserver
 from yarl import URL
 
 from ..base_request_builder import (
+    MAX_LOOKUP_KEY_BYTES,
     APIResponse,
     BaseFilterRequestBuilder,
+    BaseRequestBuilder,
     BaseRPCRequestBuilder,
     BaseSelectRequestBuilder,
+    BulkAPIResponse,
+    BulkResponseBuilder,
+    BulkUpdateResponse,
+    BulkUpdateResponseBuilder,
+    ColumnBuilder,
     CountMethod,
+    ParamList,
     RequestConfig,
+    RowChunker,
     SingleAPIResponse,
+    UpdateChunker,
+    _convert_typed,
+    _set_count_preference,
     pre_delete,
     pre_insert,
     pre_select,
     pre_update,
     pre_upsert,
+    row_value,
 )
+from ..cache import CountCache, ResponseCache
+from ..concurrency import AsyncExecutor, AsyncFuture, AsyncSingleFlight
 from ..exceptions import APIError, APIErrorFromJSON, generate_default_error_message
-from ..types import JSON, ReturnMethod
-from ..utils import model_validate_json
+from ..prepared import QueryTemplate
+from ..streaming import CSVStreamDecoder, JSONArrayStreamDecoder
+from ..types import JSON, Filters, ReturnMethod
+from ..utils import model_validate_json, sanitize_param
 
 ReqConfig = RequestConfig[AsyncClient]
+_Response = TypeVar("_Response", bound=APIResponse)
+
+# to_arrow keeps a CSV body in memory up to this size, then spools it to disk
+_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+async def _iter_rows(
+    rows: Union[Iterable[JSON], AsyncIterable[JSON]],
+) -> AsyncIterator[JSON]:
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:  # noqa: UP028
+            yield row
+
+
+async def _check_stream(r: Response) -> None:
+    """Raise the error of a streamed response, which is read first."""
+    if not r.is_success:
+        await r.aread()
+        try:
+            json_obj = model_validate_json(APIErrorFromJSON, r.content)
+        except ValidationError:
+            raise APIError(generate_default_error_message(r))
+        raise APIError(dict(json_obj))
+
+
+_T_co = TypeVar("_T_co", covariant=True)
+
+
+class AsyncExecutable(Protocol[_T_co]):
+    """A query that is built and ready to be executed."""
+
+    async def execute(self) -> _T_co: ...
+
+
+class AsyncChunkWriter(Protocol):
+    """Writes one chunk of the rows of a bulk operation."""
 
+    async def __call__(self, chunk: List[JSON]) -> APIResponse: ...
 
-class AsyncQueryRequestBuilder:
-    def __init__(self, request: ReqConfig):
-        self.request = request
+
+def _coalesced(request: ReqConfig) -> bool:
+    return request.single_flight is not None and request.http_method in {
+        "GET",
+        "HEAD",
+    }
+
+
+def _flight_key(request: ReqConfig) -> Tuple[Any, ...]:
+    # identical requests decoded differently can't share their result
+    return (request.request_key(), request.skip_validation, request.row_model)
+
+
+class AsyncPreparedQuery(Generic[_Response]):
+    """A query compiled once, executed with different values for its params.
+
+    Created with the `prepare` method of a request builder, where the values
+    to bind are marked with :class:`postgrest.Param` placeholders.
+    """
+
+    __slots__ = ("template", "response_type", "builder")
+
+    def __init__(
+        self,
+        request: ReqConfig,
+        response_type: Type[_Response],
+        builder: Callable[[ReqConfig], AsyncExecutable[_Response]],
+    ) -> None:
+        self.template = QueryTemplate(request)
+        self.response_type = response_type
+        self.builder = builder
+
+    async def execute(self, **params: Any) -> _Response:
+        """Execute the query with `params` bound to its placeholders.
+
+        When the client caches responses, coalesces requests, counts rows
+        with `smart_count` or samples query plans, the query is executed by
+        the builder, the same as a chained query.
+
+        Raises:
+            :class:`ValueError` If `params` doesn't match the placeholders.
+            :class:`APIError` If the API raised an error.
+        """
+        if self.template.request is not None:
+            return await self.builder(self.template.bind(params)).execute()
+        r = await self.template.send(params)
+        try:
+            if r.is_success:
+                response = self.response_type.from_http_request_response(
+                    r,
+                    skip_validation=self.template.skip_validation,
+                    row_model=self.template.row_model,
+                )
+                return cast(_Response, response)
+            else:
+                json_obj = model_validate_json(APIErrorFromJSON, r.content)
+                raise APIError(dict(json_obj))
+        except ValidationError as e:
+            raise APIError(generate_default_error_message(r))
+
+
+class AsyncQueryRequestBuilder(BaseRequestBuilder[AsyncClient]):
+    __slots__ = ()
 
     async def execute(self) -> APIResponse:
         """Execute the query.
@@ -44,20 +200,79 @@ class AsyncQueryRequestBuilder:
         Raises:
             :class:`APIError` If the API raised an error.
         """
+        if _coalesced(self.request):
+            single_flight = cast(AsyncSingleFlight, self.request.single_flight)
+            return await single_flight.do(_flight_key(self.request), self._execute)
+        return await self._execute()
+
+    async def _execute(self) -> APIResponse:
+        smart_count = self.request.smart_count
+        if smart_count is None:
+            return await self._send()
+        key = smart_count.key(self.request)
+        cached = smart_count.cache.get(key)
+        _set_count_preference(
+            self.request.headers, None if cached else CountMethod.planned
+        )
+        response = await self._send()
+        if cached is not None:
+            response.count, response.count_method = cached
+            return response
+        if response.count is None:
+            return response
+        if response.count < smart_count.threshold:
+            r = await smart_count.count_request(self.request).send()
+            count = APIResponse._get_count_from_http_request_response(r)
+            if r.is_success and count is not None:
+                response.count, response.count_method = count, CountMethod.exact
+        smart_count.cache.put(
+            key, response.count, response.count_method or CountMethod.planned
+        )
+        return response
+
+    async def _send(self) -> APIResponse:
         r = await self.request.send()
         try:
             if r.is_success:
-                return APIResponse.from_http_request_response(r)
+                return APIResponse.from_http_request_response(
+                    r,
+                    skip_validation=self.request.skip_validation,
+                    row_model=self.request.row_model,
+                )
             else:
                 json_obj = model_validate_json(APIErrorFromJSON, r.content)
                 raise APIError(dict(json_obj))
         except ValidationError as e:
             raise APIError(generate_default_error_message(r))
 
+    def skip_validation(self) -> Self:
+        """Decode the response without validating it with pydantic.
 
-class AsyncSingleRequestBuilder:
-    def __init__(self, request: ReqConfig):
-        self.request = request
+        The body is decoded straight into Python objects, using `orjson`
+        when it is installed, which is much cheaper for big responses.
+        """
+        self.request.skip_validation = True
+        return self
+
+    def prepare(self) -> AsyncPreparedQuery[APIResponse]:
+        """Compile the query, to execute it many times with different values.
+
+        Example:
+            .. code-block:: python
+
+                by_name = (
+                    client.from_("countries")
+                    .select("id, name")
+                    .eq("name", Param("name"))
+                    .prepare()
+                )
+                france = await by_name.execute(name="France")
+        """
+        return AsyncPreparedQuery(self.request, APIResponse, AsyncQueryRequestBuilder)
+
+
+class AsyncSingleRequestBuilder(BaseRequestBuilder[AsyncClient]):
+    __slots__ = ()
 
     async def execute(self) -> SingleAPIResponse:
         """Execute the query.
@@ -71,22 +286,46 @@ class AsyncSingleRequestBuilder:
                 Raises:
                     :class:`APIError` If the API raised an error.
         """
+        if _coalesced(self.request):
+            single_flight = cast(AsyncSingleFlight, self.request.single_flight)
+            return await single_flight.do(_flight_key(self.request), self._execute)
+        return await self._execute()
+
+    async def _execute(self) -> SingleAPIResponse:
         r = await self.request.send()
         try:
             if (
                 200 <= r.status_code <= 299
             ):  # Response.ok from JS (https://developer.mozilla.org/en-US/docs/Web/API/Response/ok)
-                return SingleAPIResponse.from_http_request_response(r)
+                return SingleAPIResponse.from_http_request_response(
+                    r,
+                    skip_validation=self.request.skip_validation,
+                    row_model=self.request.row_model,
+                )
             else:
                 json_obj = model_validate_json(APIErrorFromJSON, r.content)
                 raise APIError(dict(json_obj))
         except ValidationError as e:
             raise APIError(generate_default_error_message(r))
 
+    def skip_validation(self) -> Self:
+        """Decode the response without validating it with pydantic.
+
+        The body is decoded straight into Python objects, using `orjson`
+        when it is installed, which is much cheaper for big responses.
+        """
+        self.request.skip_validation = True
+        return self
+
+    def prepare(self) -> AsyncPreparedQuery[SingleAPIResponse]:
+        """Compile the query, to execute it many times with different values."""
+        return AsyncPreparedQuery(
+            self.request, SingleAPIResponse, AsyncSingleRequestBuilder
+        )
+
 
-class AsyncExplainRequestBuilder:
-    def __init__(self, request: ReqConfig):
-        self.request = request
+class AsyncExplainRequestBuilder(BaseRequestBuilder[AsyncClient]):
+    __slots__ = ()
 
     async def execute(self) -> str:
         r = await self.request.send()
@@ -100,9 +339,8 @@ class AsyncExplainRequestBuilder:
             raise APIError(generate_default_error_message(r))
 
 
-class AsyncMaybeSingleRequestBuilder:
-    def __init__(self, request: ReqConfig):
-        self.request = request
+class AsyncMaybeSingleRequestBuilder(BaseRequestBuilder[AsyncClient]):
+    __slots__ = ()
 
     async def execute(self) -> Optional[SingleAPIResponse]:
         r = None
@@ -126,23 +364,17 @@ class AsyncMaybeSingleRequestBuilder:
 class AsyncFilterRequestBuilder(
     BaseFilterRequestBuilder[AsyncClient], AsyncQueryRequestBuilder
 ):
-    def __init__(self, request: ReqConfig) -> None:
-        BaseFilterRequestBuilder.__init__(self, request)
-        AsyncQueryRequestBuilder.__init__(self, request)
+    __slots__ = ()
 
 
 class AsyncRPCFilterRequestBuilder(BaseRPCRequestBuilder, AsyncSingleRequestBuilder):
-    def __init__(self, request: ReqConfig) -> None:
-        BaseFilterRequestBuilder.__init__(self, request)
-        AsyncSingleRequestBuilder.__init__(self, request)
+    __slots__ = ()
 
 
 class AsyncSelectRequestBuilder(
     AsyncQueryRequestBuilder, BaseSelectRequestBuilder[AsyncClient]
 ):
-    def __init__(self, request: ReqConfig) -> None:
-        BaseSelectRequestBuilder.__init__(self, request)
-        AsyncQueryRequestBuilder.__init__(self, request)
+    __slots__ = ()
 
     def single(self) -> AsyncSingleRequestBuilder:
         """Specify that the query will only return a single row in response.
@@ -158,6 +390,378 @@ class AsyncSelectRequestBuilder(
         self.request.headers["Accept"] = "application/vnd.pgrst.object+json"
         return AsyncMaybeSingleRequestBuilder(self.request)
 
+    async def execute_stream(self) -> AsyncIterator[JSON]:
+        """Execute the query, yielding the rows as they are received.
+
+        Unlike :meth:`execute`, the response body is never held in memory
+        as a whole, which makes it suitable for exporting very large tables.
+        After :meth:`returns`, the rows are instances of its model.
+
+        Example:
+            .. code-block:: python
+
+                async for row in client.from_("logs").select("*").execute_stream():
+                    handle(row)
+
+        Raises:
+            :class:`APIError` If the API raised an error.
+        """
+        async for batch in self.execute_stream_batches():
+            for row in batch:  # noqa: UP028
+                yield row
+
+    async def execute_stream_batches(
+        self, size: Optional[int] = None
+    ) -> AsyncIterator[List[JSON]]:
+        """Execute the query, yielding the rows in batches as they are received.
+
+        After :meth:`returns`, the rows are instances of its model.
+
+        Args:
+            size: The maximum number of rows in each batch. When not set, each
+                batch holds the rows completed by one chunk of the response body.
+        Raises:
+            :class:`APIError` If the API raised an error.
+            :class:`ValueError` If the rows do not match the model of :meth:`returns`.
+        """
+        row_model = self.request.row_model
+        async for batch in self._stream_batches(size):
+            yield batch if row_model is None else _convert_typed(batch, row_model)
+
+    async def _stream_batches(self, size: Optional[int]) -> AsyncIterator[List[JSON]]:
+        async with self.request.stream() as r:
+            await _check_stream(r)
+            decoder = JSONArrayStreamDecoder()
+            pending: List[JSON] = []
+            async for chunk in r.aiter_bytes():
+                pending.extend(decoder.feed(chunk))
+                while pending and (size is None or len(pending) >= size):
+                    n = size or len(pending)
+                    yield pending[:n]
+                    del pending[:n]
+            pending.extend(decoder.close())
+            while pending:
+                n = size or len(pending)
+                yield pending[:n]
+                del pending[:n]
+
+    async def execute_columnar(self) -> Dict[str, List[Any]]:
+        """Execute the query, returning the values of each column in a list.
+
+        The rows are decoded and transposed as they are received, so the
+        full list of row dictionaries never exists at once.
+
+        Example:
+            .. code-block:: python
+
+                columns = await client.from_("sales").select("day, total").execute_columnar()
+                df = pandas.DataFrame(columns)
+
+        Raises:
+            :class:`APIError` If the API raised an error.
+        """
+        columns = ColumnBuilder()
+        async for batch in self._stream_batches(None):
+            columns.extend(batch)
+        return columns.columns
+
+    async def to_arrow(self) -> pyarrow.Table:
+        """Execute the query, returning the result as a :class:`pyarrow.Table`.
+
+        The result is requested as CSV and parsed by pyarrow, so no Python
+        object is created per row or value. The body is spooled to a temporary
+        file past a few megabytes instead of being held in memory next to the
+        table. Requires the `pyarrow` package.
+
+        Raises:
+            :class:`APIError` If the API raised an error.
+        """
+        try:
+            import pyarrow
+            import pyarrow.csv
+        except ImportError as e:
+            raise ImportError(
+                "to_arrow requires pyarrow, install it with `pip install postgrest[arrow]`"
+            ) from e
+
+        with SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES) as body:
+            blank = True
+            async for chunk in self._csv_chunks():
+                body.write(chunk)
+                blank = blank and not chunk.strip()
+            if blank:
+                return pyarrow.table({})
+            body.seek(0)
+            return pyarrow.csv.read_csv(
+                body,
+                # PostgREST writes NULL as an empty field
+                convert_options=pyarrow.csv.ConvertOptions(strings_can_be_null=True),
+            )
+
+    @overload
+    def execute_csv_stream(
+        self, raw: Literal[False] = False
+    ) -> AsyncIterator[Dict[str, str]]: ...
+    @overload
+    def execute_csv_stream(self, raw: Literal[True]) -> AsyncIterator[bytes]: ...
+
+    def execute_csv_stream(
+        self, raw: bool = False
+    ) -> Union[AsyncIterator[Dict[str, str]], AsyncIterator[bytes]]:
+        """Execute the query as CSV, yielding the rows as they are received.
+
+        Unlike :meth:`csv`, the body is never held in memory as a whole.
+
+        Args:
+            raw: Whether to yield the chunks of the CSV body as received,
+                instead of the rows keyed by the column names of the header.
+                Values are strings, and NULL is an empty string.
+        Example:
+            .. code-block:: python
+
+                async for row in client.from_("logs").select("*").execute_csv_stream():
+                    handle(row["message"])
+        Raises:
+            :class:`APIError` If the API raised an error.
+        """
+        return self._csv_chunks() if raw else self._csv_rows()
+
+    async def csv_to_file(
+        self, destination: Union[str, os.PathLike[str], BinaryIO]
+    ) -> int:
+        """Execute the query as CSV, writing the body to a file as it is received.
+
+        Args:
+            destination: A path, or a file object opened in binary mode.
+        Returns:
+            The number of bytes written.
+        Raises:
+            :class:`APIError` If the API raised an error.
+        """
+        if isinstance(destination, (str, os.PathLike)):
+            with open(destination, "wb") as f:
+                return await self.csv_to_file(f)
+        written = 0
+        async for chunk in self._csv_chunks():
+            destination.write(chunk)
+            written += len(chunk)
+        return written
+
+    async def _csv_chunks(self) -> AsyncIterator[bytes]:
+        async with self.request.accepting("text/csv").stream() as r:
+            await _check_stream(r)
+            async for chunk in r.aiter_bytes():  # noqa: UP028
+                yield chunk
+
+    async def _csv_rows(self) -> AsyncIterator[Dict[str, str]]:
+        decoder = CSVStreamDecoder()
+        async for chunk in self._csv_chunks():
+            for row in decoder.feed(chunk):  # noqa: UP028
+                yield row
+        for row in decoder.close():  # noqa: UP028
+            yield row
+
+    async def paginate(
+        self,
+        key: str = "id",
+        page_size: int = 1000,
+        *,
+        desc: bool = False,
+        prefetch: bool = False,
+    ) -> AsyncIterator[APIResponse]:
+        """Walk through the whole result set, one page at a time.
+
+        Pages are fetched with keyset pagination: every page filters on the
+        rows that come after the last `key` of the previous one, so each page
+        costs the same no matter how deep into the table it is, unlike
+        :meth:`range` or :meth:`offset`.
+
+        Args:
+            key: A unique, sortable column, which must be part of the selected columns.
+            page_size: The maximum number of rows in each page.
+            desc: Whether the rows should be walked in descending `key` order.
+            prefetch: Whether to request the next page while the caller
+                processes the current one.
+        Example:
+            .. code-block:: python
+
+                async for page in client.from_("logs").select("*").paginate("id"):
+                    handle(page.data)
+        Raises:
+            :class:`ValueError` If the query is already ordered, limited or offset.
+            :class:`APIError` If the API raised an error.
+        """
+        self._check_keyset_pagination(key, page_size)
+        request: Optional[ReqConfig] = self._keyset_request(key, page_size, desc, None)
+        next_page: Optional[AsyncFuture[APIResponse]] = None
+        async with AsyncExecutor(max_workers=1) as executor:
+            while request is not None:
+                if next_page is None:
+                    response = await AsyncQueryRequestBuilder(request).execute()
+                else:
+                    response = await next_page.result()
+                rows = response.data
+                if len(rows) < page_size:
+                    request, next_page = None, None
+                else:
+                    last_key = row_value(rows[-1], key)
+                    request = self._keyset_request(key, page_size, desc, last_key)
+                    next_page = (
+                        executor.submit(AsyncQueryRequestBuilder(request).execute)
+                        if prefetch
+                        else None
+                    )
+                if rows:
+                    yield response
+
+    async def export(
+        self,
+        destination: Union[str, os.PathLike[str]],
+        *,
+        key: str = "id",
+        partitions: int = 4,
+        boundaries: Optional[Sequence[Any]] = None,
+        concurrency: int = 4,
+        page_size: int = 10_000,
+        format: ExportFormat = "jsonl",
+    ) -> ExportResult:
+        """Export the rows of the query to files, fetching key ranges concurrently.
+
+        The rows are split into `partitions` ranges of `key`, between its
+        smallest and largest values, or at the given `boundaries`. Each range
+        is walked with keyset pagination and written to its own file in the
+        `destination` directory, at most `concurrency` of them at a time.
+
+        The progress of every range is saved in a checkpoint file after each
+        page. When an export is interrupted, calling it again with the same
+        `destination` resumes where it stopped. The checkpoint is removed once
+        the export completes.
+
+        Args:
+            destination: The directory receiving the files, created if needed.
+            key: A unique, not null, sortable column, which must be part of the
+                selected columns. Its values are split automatically when it
+                is numeric, a date or a timestamp.
+            partitions: The number of key ranges, when `boundaries` isn't given.
+            boundaries: The keys at which the ranges are split, in increasing order.
+            concurrency: The maximum number of ranges exported at the same time.
+            page_size: The maximum number of rows in each request.
+            format: `"jsonl"`, `"csv"`, or `"parquet"`, which requires `pyarrow`.
+        Example:
+            .. code-block:: python
+
+                result = await client.from_("events").select("*").export(
+                    "events/", key="created_at", partitions=16, concurrency=8
+                )
+        Raises:
+            :class:`ValueError` If the query is already ordered, limited or
+                offset, uses :meth:`returns`, or `key` cannot be split automatically.
+            :class:`APIError` If the API raised an error.
+        """
+        from ..export import SINKS, ExportCheckpoint, ExportResult, plan_partitions
+
+        self._check_keyset_pagination(key, page_size)
+        if self.request.row_model is not None:
+            raise ValueError("The rows are exported as returned, without returns()")
+        if format not in SINKS:
+            raise ValueError(f"Unknown export format: {format!r}")
+        sink_type = SINKS[format]
+        directory = Path(destination)
+        directory.mkdir(parents=True, exist_ok=True)
+        checkpoint_path = directory / "_checkpoint.json"
+        checkpoint = ExportCheckpoint.load(checkpoint_path, key, format)
+        if checkpoint is None:
+            if boundaries is None:
+                boundaries = await self._key_boundaries(key, partitions)
+            checkpoint = ExportCheckpoint(
+                checkpoint_path, key, format, plan_partitions(boundaries)
+            )
+            checkpoint.save()
+
+        async with AsyncExecutor(concurrency) as executor:
+            futures = [
+                executor.submit(
+                    self._export_partition,
+                    checkpoint,
+                    partition,
+                    sink_type,
+                    directory / f"part-{partition.index:05d}{sink_type.extension}",
+                    key,
+                    page_size,
+                )
+                for partition in checkpoint.partitions
+                if not partition.done
+            ]
+            for future in futures:
+                await future.result()
+        checkpoint.remove()
+        files = [
+            directory / f"part-{partition.index:05d}{sink_type.extension}"
+            for partition in checkpoint.partitions
+        ]
+        return ExportResult(
+            partitions=checkpoint.partitions, files=[f for f in files if f.exists()]
+        )
+
+    async def _key_boundaries(self, key: str, partitions: int) -> List[Any]:
+        """Split the range of `key` between its smallest and largest values."""
+        from ..export import split_range
+
+        if partitions < 1:
+            raise ValueError("partitions must be at least 1")
+        ends = []
+        for desc in (False, True):
+            request = self._keyset_request(key, 1, desc, None)
+            # nulls come first in descending order otherwise
+            request.params.set("select", key).set(
+                "order", f"{key}.{'desc' if desc else 'asc'}.nullslast"
+            )
+            _set_count_preference(request.headers, None)
+            rows = (await AsyncQueryRequestBuilder(request).execute()).data
+            if not rows:
+                return []
+            ends.append(row_value(rows[0], key))
+        return split_range(ends[0], ends[1], partitions)
+
+    async def _export_partition(
+        self,
+        checkpoint: ExportCheckpoint,
+        partition: PartitionState,
+        sink_type: Type[ExportSink],
+        path: Path,
+        key: str,
+        page_size: int,
+    ) -> None:
+        if partition.last_key is not None and partition.sink is None:
+            # the sink cannot append to the partial file, start it over
+            checkpoint.update(partition, last_key=None, rows=0)
+        sink = sink_type(
+            path, partition.sink if partition.last_key is not None else None
+        )
+        params = self.request.params.copy()
+        column = sanitize_param(key)
+        if partition.last_key is not None:
+            params.add(column, f"{Filters.GT}.{partition.last_key}")
+        elif partition.lower is not None:
+            params.add(column, f"{Filters.GTE}.{partition.lower}")
+        if partition.upper is not None:
+            params.add(column, f"{Filters.LT}.{partition.upper}")
+        query = AsyncSelectRequestBuilder(self.request.with_params(params))
+        try:
+            async for page in query.paginate(key, page_size, prefetch=True):
+                rows = page.data
+                last_key = row_value(rows[-1], key)
+                sink.write(rows)
+                checkpoint.update(
+                    partition,
+                    last_key=last_key,
+                    rows=partition.rows + len(rows),
+                    sink=sink.state(),
+                )
+        finally:
+            sink.close()
+        checkpoint.update(partition, done=True)
+
     def text_search(
         self, column: str, query: str, options: dict[str, Any] = {}
     ) -> AsyncQueryRequestBuilder:
@@ -177,7 +781,11 @@ class AsyncSelectRequestBuilder(
         return AsyncQueryRequestBuilder(self.request)
 
     def csv(self) -> AsyncSingleRequestBuilder:
-        """Specify that the query must retrieve data as a single CSV string."""
+        """Specify that the query must retrieve data as a single CSV string.
+
+        The whole body is held in memory, see :meth:`execute_csv_stream` and
+        :meth:`csv_to_file` for large results.
+        """
         self.request.headers["Accept"] = "text/csv"
         return AsyncSingleRequestBuilder(self.request)
 
@@ -229,13 +837,63 @@ class AsyncSelectRequestBuilder(
 
 
 class AsyncRequestBuilder:  #
+    __slots__ = (
+        "session",
+        "path",
+        "headers",
+        "auth",
+        "skip_validation",
+        "cache",
+        "single_flight",
+        "count_cache",
+        "observer",
+        "explain_sampler",
+    )
+
     def __init__(
-        self, session: AsyncClient, path: URL, headers: Headers, auth: BasicAuth | None
+        self,
+        session: AsyncClient,
+        path: URL,
+        headers: Headers,
+        auth: BasicAuth | None,
+        *,
+        skip_validation: bool = False,
+        cache: Optional[ResponseCache] = None,
+        single_flight: Optional[AsyncSingleFlight] = None,
+        count_cache: Optional[CountCache] = None,
+        observer: Optional[QueryObserver] = None,
+        explain_sampler: Optional[ExplainSampler] = None,
     ) -> None:
         self.session = session
         self.path = path
         self.headers = headers
         self.auth = auth
+        self.skip_validation = skip_validation
+        self.cache = cache
+        self.single_flight = single_flight
+        self.count_cache = count_cache
+        self.observer = observer
+        self.explain_sampler = explain_sampler
+
+    def _request_config(
+        self, method: str, params: ParamList, headers: Headers, json: JSON
+    ) -> ReqConfig:
+        headers.update(self.headers)
+        return RequestConfig(
+            session=self.session,
+            path=self.path,
+            auth=self.auth,
+            params=params,
+            http_method=method,
+            headers=headers,
+            json=json,
+            skip_validation=self.skip_validation,
+            cache=self.cache,
+            single_flight=self.single_flight,
+            count_cache=self.count_cache,
+            observer=self.observer,
+            explain_sampler=self.explain_sampler,
+        )
 
     def select(
         self,
@@ -252,16 +910,7 @@ class AsyncRequestBuilder:  #
             :class:`AsyncSelectRequestBuilder`
         """
         method, params, headers, json = pre_select(*columns, count=count, head=head)
-        headers.update(self.headers)
-        request = RequestConfig(
-            session=self.session,
-            path=self.path,
-            auth=self.auth,
-            params=params,
-            http_method=method,
-            headers=headers,
-            json=json,
-        )
+        request = self._request_config(method, params, headers, json)
         return AsyncSelectRequestBuilder(request)
 
     def insert(
@@ -293,16 +942,7 @@ class AsyncRequestBuilder:  #
             upsert=upsert,
             default_to_null=default_to_null,
         )
-        headers.update(self.headers)
-        request = RequestConfig(
-            session=self.session,
-            path=self.path,
-            auth=self.auth,
-            params=params,
-            http_method=method,
-            headers=headers,
-            json=json,
-        )
+        request = self._request_config(method, params, headers, json)
         return AsyncQueryRequestBuilder(request)
 
     def upsert(
@@ -338,16 +978,7 @@ class AsyncRequestBuilder:  #
             on_conflict=on_conflict,
             default_to_null=default_to_null,
         )
-        headers.update(self.headers)
-        request = RequestConfig(
-            session=self.session,
-            path=self.path,
-            auth=self.auth,
-            params=params,
-            http_method=method,
-            headers=headers,
-            json=json,
-        )
+        request = self._request_config(method, params, headers, json)
         return AsyncQueryRequestBuilder(request)
 
     def update(
@@ -371,16 +1002,7 @@ class AsyncRequestBuilder:  #
             count=count,
             returning=returning,
         )
-        headers.update(self.headers)
-        request = RequestConfig(
-            session=self.session,
-            path=self.path,
-            auth=self.auth,
-            params=params,
-            http_method=method,
-            headers=headers,
-            json=json,
-        )
+        request = self._request_config(method, params, headers, json)
         return AsyncFilterRequestBuilder(request)
 
     def delete(
@@ -401,14 +1023,243 @@ class AsyncRequestBuilder:  #
             count=count,
             returning=returning,
         )
-        headers.update(self.headers)
-        request = RequestConfig(
-            session=self.session,
-            path=self.path,
-            auth=self.auth,
-            params=params,
-            http_method=method,
-            headers=headers,
-            json=json,
-        )
+        request = self._request_config(method, params, headers, json)
         return AsyncFilterRequestBuilder(request)
+
+    async def insert_many(
+        self,
+        rows: Union[Iterable[JSON], AsyncIterable[JSON]],
+        *,
+        chunk_size: int = 1000,
+        max_chunk_bytes: Optional[int] = None,
+        concurrency: int = 4,
+        count: Optional[CountMethod] = None,
+        returning: ReturnMethod = ReturnMethod.minimal,
+        upsert: bool = False,
+        default_to_null: bool = True,
+    ) -> BulkAPIResponse:
+        """Run an INSERT query for each chunk of a large number of rows.
+
+        The rows are consumed lazily and split into chunks, which are sent
+        concurrently. A chunk that fails does not abort the others: its rows
+        and error are reported in :attr:`BulkAPIResponse.errors`.
+
+        Args:
+            rows: The rows to be inserted, from any iterable or async iterable.
+            chunk_size: The maximum number of rows sent in each request.
+            max_chunk_bytes: The maximum size of the JSON body of each request.
+            concurrency: The maximum number of requests in flight.
+            count: The method to use to get the count of rows returned.
+            returning: Either 'minimal' or 'representation'. Defaults to
+                'minimal' so that the inserted rows are not all kept in memory.
+            upsert: Whether the query should be an upsert.
+            default_to_null: Make missing fields default to `null`.
+                Otherwise, use the default value for the column.
+        Returns:
+            :class:`BulkAPIResponse`
+        """
+        return await self._write_many(
+            rows,
+            lambda chunk: self.insert(
+                chunk,
+                count=count,
+                returning=returning,
+                upsert=upsert,
+                default_to_null=default_to_null,
+            ),
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            concurrency=concurrency,
+        )
+
+    async def upsert_many(
+        self,
+        rows: Union[Iterable[JSON], AsyncIterable[JSON]],
+        *,
+        chunk_size: int = 1000,
+        max_chunk_bytes: Optional[int] = None,
+        concurrency: int = 4,
+        count: Optional[CountMethod] = None,
+        returning: ReturnMethod = ReturnMethod.minimal,
+        ignore_duplicates: bool = False,
+        on_conflict: str = "",
+        default_to_null: bool = True,
+    ) -> BulkAPIResponse:
+        """Run an upsert query for each chunk of a large number of rows.
+
+        See :meth:`insert_many` for how the rows are chunked and sent.
+
+        Args:
+            rows: The rows to be upserted, from any iterable or async iterable.
+            chunk_size: The maximum number of rows sent in each request.
+            max_chunk_bytes: The maximum size of the JSON body of each request.
+            concurrency: The maximum number of requests in flight.
+            count: The method to use to get the count of rows returned.
+            returning: Either 'minimal' or 'representation'.
+            ignore_duplicates: Whether duplicate rows should be ignored.
+            on_conflict: Specified columns to be made to work with UNIQUE constraint.
+            default_to_null: Make missing fields default to `null`.
+        Returns:
+            :class:`BulkAPIResponse`
+        """
+        return await self._write_many(
+            rows,
+            lambda chunk: self.upsert(
+                chunk,
+                count=count,
+                returning=returning,
+                ignore_duplicates=ignore_duplicates,
+                on_conflict=on_conflict,
+                default_to_null=default_to_null,
+            ),
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            concurrency=concurrency,
+        )
+
+    async def update_many(
+        self,
+        rows: Union[Iterable[JSON], AsyncIterable[JSON]],
+        *,
+        key: str = "id",
+        chunk_size: int = 500,
+        max_chunk_bytes: Optional[int] = None,
+        concurrency: int = 4,
+        insert_missing: bool = False,
+    ) -> BulkUpdateResponse:
+        """Update many rows, each identified by its `key`, with a few bulk upserts.
+
+        Each row holds its key and the new values of the columns to update,
+        as would a call to `update(row).eq(key, row[key])`. Rows updating
+        the same columns are grouped into chunks, each sent as a single
+        upsert on `key`, which must be unique. See :meth:`insert_many` for
+        how the chunks are sent.
+
+        Unless `insert_missing` is set, the keys of each chunk are looked up
+        first, since an upsert inserts the rows it does not find: their keys
+        are reported in :attr:`BulkUpdateResponse.missing` instead. A row
+        deleted between the lookup and the upsert is inserted again. The
+        lookup filters on the keys in the URL, so chunks are also cut before
+        their encoded keys exceed 4 KB, keeping the URL under the 8 KB most
+        proxies accept.
+
+        PostgreSQL checks the NOT NULL constraints of the inserted row before
+        resolving the conflict of an upsert. On a table with a NOT NULL
+        column without a default, every row must therefore hold that column,
+        else its chunk fails: update such rows one at a time with
+        :meth:`update` instead.
+
+        When a key appears in several rows, the chunks holding them may be
+        sent concurrently, so their updates are only applied in order with
+        a `concurrency` of 1.
+
+        Args:
+            rows: The rows to be updated, from any iterable or async iterable.
+            key: The unique column identifying the rows.
+            chunk_size: The maximum number of rows sent in each request.
+            max_chunk_bytes: The maximum size of the JSON body of each request.
+            concurrency: The maximum number of chunks in flight.
+            insert_missing: Whether to insert the rows whose key is not found.
+        Returns:
+            :class:`BulkUpdateResponse`
+        Raises:
+            :class:`ValueError` If a row is not an object holding `key`.
+        """
+        chunker = UpdateChunker(
+            key,
+            chunk_size,
+            max_chunk_bytes,
+            max_key_bytes=None if insert_missing else MAX_LOOKUP_KEY_BYTES,
+        )
+
+        async def chunks() -> AsyncIterator[List[JSON]]:
+            async for row in _iter_rows(rows):
+                for chunk in chunker.add(row):  # noqa: UP028
+                    yield chunk
+            for chunk in chunker.flush():  # noqa: UP028
+                yield chunk
+
+        async def send(chunk: List[JSON]) -> APIResponse:
+            keys = [row_value(row, key) for row in chunk]
+            if not insert_missing:
+                lookup = self.select(key).in_(key, keys)
+                # a cached or shared response may be stale, which would insert
+                # rows deleted since, or skip rows inserted since
+                lookup.request.cache = None
+                lookup.request.single_flight = None
+                existing = await lookup.execute()
+                found = {str(row_value(row, key)) for row in existing.data}
+                chunk = [row for row, k in zip(chunk, keys) if str(k) in found]
+                if not chunk:
+                    return existing
+            query = self.upsert(
+                chunk,
+                returning=ReturnMethod.representation,
+                on_conflict=key,
+                default_to_null=False,
+            )
+            # only the keys of the updated rows are returned
+            query.request.params.set("select", key)
+            return await query.execute()
+
+        response = await self._send_chunks(
+            chunks(), send, BulkUpdateResponseBuilder(key), concurrency
+        )
+        return cast(BulkUpdateResponse, response)
+
+    async def _write_many(
+        self,
+        rows: Union[Iterable[JSON], AsyncIterable[JSON]],
+        query: Callable[[List[JSON]], AsyncQueryRequestBuilder],
+        *,
+        chunk_size: int,
+        max_chunk_bytes: Optional[int],
+        concurrency: int,
+    ) -> BulkAPIResponse:
+        chunker = RowChunker(chunk_size, max_chunk_bytes)
+
+        async def chunks() -> AsyncIterator[List[JSON]]:
+            async for row in _iter_rows(rows):
+                chunk = chunker.add(row)
+                if chunk is not None:
+                    yield chunk
+            last_chunk = chunker.flush()
+            if last_chunk:
+                yield last_chunk
+
+        async def send(chunk: List[JSON]) -> APIResponse:
+            return await query(chunk).execute()
+
+        return await self._send_chunks(
+            chunks(), send, BulkResponseBuilder(), concurrency
+        )
+
+    async def _send_chunks(
+        self,
+        chunks: AsyncIterator[List[JSON]],
+        send: AsyncChunkWriter,
+        result: BulkResponseBuilder,
+        concurrency: int,
+    ) -> BulkAPIResponse:
+        async def attempt(chunk: List[JSON]) -> Union[APIResponse, Exception]:
+            try:
+                return await send(chunk)
+            except (APIError, HTTPError) as e:
+                return e
+
+        # at most `concurrency` chunks are held in memory at any time
+        in_flight: Deque[
+            Tuple[int, List[JSON], AsyncFuture[Union[APIResponse, Exception]]]
+        ] = deque()
+        async with AsyncExecutor(concurrency) as executor:
+            index = 0
+            async for chunk in chunks:
+                in_flight.append((index, chunk, executor.submit(attempt, chunk)))
+                index += 1
+                if len(in_flight) >= concurrency:
+                    i, sent, future = in_flight.popleft()
+                    result.add(i, sent, await future.result())
+            while in_flight:
+                i, sent, future = in_flight.popleft()
+                result.add(i, sent, await future.result())
+        return result.build()
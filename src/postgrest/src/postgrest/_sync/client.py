@@ -2,27 +2,78 @@ from __future__ import annotations
 
 import platform
 import sys
-from typing import Any, Dict, Optional, Union, cast
+import time
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Union,
+    cast,
+)
 from warnings import warn
 
 from deprecation import deprecated
-from httpx import Client, Headers, QueryParams, Timeout
+from httpx import (
+    Client,
+    Headers,
+    HTTPError,
+    Limits,
+    Request,
+    Timeout,
+    TransportError,
+)
 from yarl import URL
 
 from ..base_client import BasePostgrestClient
+from ..base_request_builder import ParamList, RPCResult
+from ..cache import CountCache, ResponseCache
+from ..concurrency import SyncExecutor, SyncFuture, SyncSingleFlight
 from ..constants import (
     DEFAULT_POSTGREST_CLIENT_HEADERS,
+    DEFAULT_POSTGREST_CLIENT_LIMITS,
     DEFAULT_POSTGREST_CLIENT_TIMEOUT,
 )
+from ..exceptions import APIError
+from ..pool import PoolMonitor, PoolStats
 from ..types import CountMethod
 from ..version import __version__
 from .request_builder import (
     RequestConfig,
+    SyncExecutable,
     SyncRequestBuilder,
     SyncRPCFilterRequestBuilder,
+    _iter_rows,
+)
+
+if TYPE_CHECKING:
+    from ..explain import ExplainSampler
+    from ..metrics import QueryObserver
+
+# PostgREST connection errors (PGRST000 to PGRST003), serialization
+# failures and deadlocks succeed when the call is made again.
+_TRANSIENT_ERROR_CODES = (
+    "PGRST000",
+    "PGRST001",
+    "PGRST002",
+    "PGRST003",
+    "40001",
+    "40P01",
 )
 
 
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, APIError):
+        return error.code in _TRANSIENT_ERROR_CODES
+    return isinstance(error, TransportError)
+
+
 class SyncPostgrestClient(BasePostgrestClient):
     """PostgREST client."""
 
@@ -36,6 +87,14 @@ class SyncPostgrestClient(BasePostgrestClient):
         verify: Optional[bool] = None,
         proxy: Optional[str] = None,
         http_client: Optional[Client] = None,
+        skip_validation: bool = False,
+        cache: Optional[ResponseCache] = None,
+        single_flight: bool = False,
+        limits: Optional[Limits] = None,
+        http2: bool = True,
+        count_cache: Optional[CountCache] = None,
+        observer: Optional[QueryObserver] = None,
+        explain_sampler: Optional[ExplainSampler] = None,
     ) -> None:
         headers = {
             "X-Client-Info": f"supabase-py/postgrest-py v{__version__}",
@@ -92,6 +151,20 @@ class SyncPostgrestClient(BasePostgrestClient):
             proxy=proxy,
         )
 
+        self.skip_validation = skip_validation
+        self.cache = cache
+        # counts of the queries using `smart_count()`
+        self.count_cache = CountCache() if count_cache is None else count_cache
+        # receives the latency, size and row count of every request
+        self.observer = observer
+        # explains slow or sampled reads in the background
+        self.explain_sampler = explain_sampler
+        # identical reads in flight at the same time share one request
+        self.single_flight = SyncSingleFlight() if single_flight else None
+        self.pool_monitor = PoolMonitor()
+        # schema() clients share the session of the client they come from,
+        # which is the one closing it
+        self._owns_session = True
         self.session = http_client or Client(
             base_url=base_url,
             headers=self.headers,
@@ -99,19 +172,56 @@ class SyncPostgrestClient(BasePostgrestClient):
             verify=self.verify,
             proxy=proxy,
             follow_redirects=True,
-            http2=True,
+            http2=http2,
+            limits=limits or DEFAULT_POSTGREST_CLIENT_LIMITS,
+            event_hooks={"request": [self._trace_pool_wait]},
         )
 
+    def _trace_pool_wait(self, request: Request) -> None:
+        if "trace" in request.extensions:
+            return
+        monitor = self.pool_monitor
+        queued_at = time.monotonic()
+
+        def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name.endswith(".send_request_headers.started"):
+                monitor.record_wait(time.monotonic() - queued_at)
+
+        request.extensions["trace"] = trace
+
+    def pool_stats(self) -> PoolStats:
+        """Utilization of the connection pool, to help sizing it.
+
+        The wait times are only measured on the session created by the
+        client, not on one passed as `http_client`.
+        """
+        return self.pool_monitor.stats(self.session)
+
     def schema(self, schema: str) -> SyncPostgrestClient:
-        """Switch to another schema."""
-        return SyncPostgrestClient(
+        """Switch to another schema.
+
+        The new client shares the connection pool of this one, and is not
+        closing it when closed.
+        """
+        client = SyncPostgrestClient(
             base_url=str(self.base_url),
             schema=schema,
             headers=dict(self.headers),
-            timeout=self.timeout,
-            verify=self.verify,
-            proxy=self.proxy,
+            http_client=self.session,
+            skip_validation=self.skip_validation,
+            cache=self.cache,
+            count_cache=self.count_cache,
+            observer=self.observer,
+            explain_sampler=self.explain_sampler,
         )
+        client.timeout = self.timeout
+        client.verify = self.verify
+        client.proxy = self.proxy
+        client.basic_auth = self.basic_auth
+        client.single_flight = self.single_flight
+        client.pool_monitor = self.pool_monitor
+        client._owns_session = False
+        return client
 
     def __enter__(self) -> SyncPostgrestClient:
         return self
@@ -121,7 +231,8 @@ class SyncPostgrestClient(BasePostgrestClient):
 
     def aclose(self) -> None:
         """Close the underlying HTTP connections."""
-        self.session.close()
+        if self._owns_session:
+            self.session.close()
 
     def from_(self, table: str) -> SyncRequestBuilder:
         """Perform a table operation.
@@ -132,7 +243,16 @@ class SyncPostgrestClient(BasePostgrestClient):
             :class:`AsyncRequestBuilder`
         """
         return SyncRequestBuilder(
-            self.session, self.base_url.joinpath(table), self.headers, self.basic_auth
+            self.session,
+            self.base_url.joinpath(table),
+            self.headers,
+            self.basic_auth,
+            skip_validation=self.skip_validation,
+            cache=self.cache,
+            single_flight=self.single_flight,
+            count_cache=self.count_cache,
+            observer=self.observer,
+            explain_sampler=self.explain_sampler,
         )
 
     def table(self, table: str) -> SyncRequestBuilder:
@@ -179,9 +299,9 @@ class SyncPostgrestClient(BasePostgrestClient):
         headers.update(self.headers)
         # the params here are params to be sent to the RPC and not the queryparams!
         json, http_params = (
-            ({}, QueryParams(params))
+            ({}, ParamList(params))
             if method in ("HEAD", "GET")
-            else (params, QueryParams())
+            else (params, ParamList())
         )
         request = RequestConfig(
             self.session,
@@ -191,5 +311,136 @@ class SyncPostgrestClient(BasePostgrestClient):
             http_params,
             self.basic_auth,
             json,
+            skip_validation=self.skip_validation,
+            cache=self.cache,
+            single_flight=self.single_flight,
+            count_cache=self.count_cache,
+            observer=self.observer,
+            explain_sampler=self.explain_sampler,
         )
         return SyncRPCFilterRequestBuilder(request)
+
+    def rpc_many(
+        self,
+        func: str,
+        params: Union[Iterable[Dict[str, Any]], Iterable[Dict[str, Any]]],
+        *,
+        concurrency: int = 8,
+        ordered: bool = True,
+        get: bool = False,
+        count: Optional[CountMethod] = None,
+        retries: int = 2,
+        retry_delay: float = 0.1,
+    ) -> Iterator[RPCResult]:
+        """Call a stored procedure once for each set of parameters.
+
+        The calls are made concurrently over the client's connections, and
+        a call that fails does not abort the others: its error is reported
+        in the :class:`RPCResult` yielded for it.
+
+        Args:
+            func: The name of the remote procedure to run.
+            params: The parameters of each call, from any iterable or async iterable.
+            concurrency: The maximum number of calls in flight.
+            ordered: Whether the results are yielded in the order of `params`,
+                otherwise they are yielded as soon as the calls complete.
+            get: Call the function with read-only access mode. Only these
+                calls are idempotent, and so retried after a transient error.
+            count: The method to use to get the count of rows returned.
+            retries: The number of times a failed read-only call is retried.
+            retry_delay: The delay before the first retry, doubled for each
+                following one.
+        Example:
+            .. code-block:: python
+
+                async for result in client.rpc_many("score", ({"user_id": i} for i in ids)):
+                    if result.ok:
+                        scores[result.params["user_id"]] = result.response.data
+        """
+
+        def call(index: int, args: Dict[str, Any]) -> RPCResult:
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    response = self.rpc(func, args, count, get=get).execute()
+                    return RPCResult.model_construct(
+                        index=index,
+                        params=args,
+                        response=response,
+                        error=None,
+                        attempts=attempt,
+                    )
+                except (APIError, HTTPError) as e:
+                    if not get or attempt > retries or not _is_transient(e):
+                        return RPCResult.model_construct(
+                            index=index,
+                            params=args,
+                            response=None,
+                            error=e,
+                            attempts=attempt,
+                        )
+                executor.sleep(retry_delay * 2 ** (attempt - 1))
+
+        # a slow call holds back at most this many ordered results
+        window = 2 * concurrency
+        with SyncExecutor(concurrency) as executor:
+            in_order: Deque[SyncFuture[RPCResult]] = deque()
+            pending: Set[SyncFuture[RPCResult]] = set()
+            index = 0
+            for args in _iter_rows(params):
+                future = executor.submit(call, index, cast(Dict[str, Any], args))
+                index += 1
+                if ordered:
+                    in_order.append(future)
+                    if len(in_order) >= window:
+                        yield in_order.popleft().result()
+                    continue
+                pending.add(future)
+                if len(pending) >= window:
+                    for done in executor.wait_first(pending):
+                        pending.discard(done)
+                        yield done.result()
+            while in_order:
+                yield in_order.popleft().result()
+            while pending:
+                for done in executor.wait_first(pending):
+                    pending.discard(done)
+                    yield done.result()
+
+    def gather(
+        self,
+        *queries: SyncExecutable[Any],
+        max_workers: int = 8,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """Execute several queries concurrently, returning their results in order.
+
+        The queries share the client's pooled connections. With the sync
+        client they are executed by a pool of threads, which gives most of
+        the latency benefits of the async client without an event loop.
+
+        Args:
+            *queries: Built queries, anything with an `execute` method.
+            max_workers: The maximum number of queries in flight.
+            return_exceptions: Return the errors of the failed queries in place
+                of their result, instead of raising the first one.
+        Example:
+            .. code-block:: python
+
+                countries, cities = await client.gather(
+                    client.from_("countries").select("*"),
+                    client.from_("cities").select("*").eq("country_id", 1),
+                )
+        """
+        results: List[Any] = []
+        with SyncExecutor(max_workers) as executor:
+            futures = [executor.submit(query.execute) for query in queries]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results.append(e)
+        return results
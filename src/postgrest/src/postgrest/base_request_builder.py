@@ -2,30 +2,45 @@ from __future__ import annotations
 
 import json
 import sys
+import time
+from functools import lru_cache
 from json import JSONDecodeError
 from re import search
 from typing import (
+    TYPE_CHECKING,
     Any,
+    AsyncContextManager,
     Awaitable,
+    ContextManager,
     Dict,
     Generic,
+    Hashable,
     Iterable,
+    Iterator,
     List,
     Literal,
+    Mapping,
     NamedTuple,
     Optional,
+    Set,
     Tuple,
     Type,
     TypeVar,
     Union,
+    cast,
     overload,
 )
+from urllib.parse import quote_plus
 
 from httpx import AsyncClient, BasicAuth, Client, Headers, QueryParams
 from httpx import Response as RequestResponse
 from pydantic import BaseModel, ValidationError
 from yarl import URL
 
+if TYPE_CHECKING:
+    from .explain import ExplainSampler
+    from .metrics import QueryObserver
+
 if sys.version_info >= (3, 11):
     from typing import Self
 else:
@@ -39,14 +54,142 @@ except ImportError:
     from pydantic import validator as field_validator  # type: ignore
 
 from .base_client import BasePostgrestClient
-from .types import JSON, CountMethod, Filters, JSONAdapter, RequestMethod, ReturnMethod
-from .utils import sanitize_param
+from .cache import CacheEntry, CacheKey, CountCache, ResponseCache
+from .concurrency import AsyncSingleFlight, SyncSingleFlight
+from .types import (
+    JSON,
+    CountMethod,
+    Filters,
+    RequestMethod,
+    ReturnMethod,
+    json_adapter,
+)
+from .utils import (
+    json_loads,
+    sanitize_param,
+    typed_json_decoder,
+    typed_rows_converter,
+)
+
+# Only the keys are cached: the column names and operators of the filters
+# repeat from query to query, while the values may be large or sensitive.
+_quote_key = lru_cache(maxsize=256)(quote_plus)
+
+
+def _param_str(value: Any) -> str:
+    # same conversion as httpx.QueryParams
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return ""
+    return str(value)
+
+
+class ParamList:
+    """The query parameters of a request, in the order they were added.
+
+    It reads like :class:`httpx.QueryParams`, but `add` and `set` change the
+    list in place instead of copying every parameter, since a query usually
+    gets one parameter per filter. The query string is encoded once, when
+    the request is sent.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(
+        self,
+        params: Union[
+            QueryParams, ParamList, Mapping[str, Any], Iterable[Tuple[str, Any]], None
+        ] = None,
+    ) -> None:
+        if params is None:
+            self._items: List[Tuple[str, str]] = []
+        elif isinstance(params, ParamList):
+            self._items = list(params._items)
+        elif isinstance(params, QueryParams):
+            self._items = params.multi_items()
+        else:
+            items = params.items() if isinstance(params, Mapping) else params
+            # a list or tuple value repeats its key, as in httpx.QueryParams
+            self._items = [
+                (key, _param_str(item))
+                for key, value in items
+                for item in (value if isinstance(value, (list, tuple)) else (value,))
+            ]
+
+    def add(self, key: str, value: Any) -> ParamList:
+        """Append a parameter, even if `key` is already set."""
+        self._items.append((key, _param_str(value)))
+        return self
+
+    def set(self, key: str, value: Any) -> ParamList:
+        """Set the single value of `key`, in place of its first occurrence."""
+        item = (key, _param_str(value))
+        items = self._items
+        for i, (k, _) in enumerate(items):
+            if k == key:
+                items[i] = item
+                self._items = items[: i + 1] + [
+                    kv for kv in items[i + 1 :] if kv[0] != key
+                ]
+                return self
+        items.append(item)
+        return self
+
+    def get(self, key: str, default: Any = None) -> Any:
+        for k, value in self._items:
+            if k == key:
+                return value
+        return default
+
+    def copy(self) -> ParamList:
+        return ParamList(self)
+
+    def multi_items(self) -> List[Tuple[str, str]]:
+        return list(self._items)
+
+    def keys(self) -> List[str]:
+        return list(dict.fromkeys(key for key, _ in self._items))
+
+    def __getitem__(self, key: str) -> str:
+        for k, value in self._items:
+            if k == key:
+                return value
+        raise KeyError(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return any(k == key for k, _ in self._items)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ParamList, QueryParams)):
+            return sorted(self._items) == sorted(other.multi_items())
+        return NotImplemented
+
+    def __str__(self) -> str:
+        # same encoding as urlencode
+        return "&".join(
+            f"{_quote_key(key)}={quote_plus(value)}" for key, value in self._items
+        )
+
+    def __repr__(self) -> str:
+        return f"ParamList({self._items!r})"
 
 
 class QueryArgs(NamedTuple):
     # groups the method, json, headers and params for a query in a single object
     method: RequestMethod
-    params: QueryParams
+    params: ParamList
     headers: Headers
     json: JSON
 
@@ -55,23 +198,90 @@ C = TypeVar("C", Client, AsyncClient)
 
 
 class RequestConfig(Generic[C]):
+    __slots__ = (
+        "session",
+        "path",
+        "http_method",
+        "headers",
+        "params",
+        "json",
+        "auth",
+        "skip_validation",
+        "row_model",
+        "cache",
+        "single_flight",
+        "count_cache",
+        "smart_count",
+        "observer",
+        "explain_sampler",
+    )
+
     def __init__(
         self,
         session: C,
         path: URL,
         http_method: str,
         headers: Headers,
-        params: QueryParams,
+        params: Union[ParamList, QueryParams],
         auth: BasicAuth | None,
         json: JSON,
+        *,
+        skip_validation: bool = False,
+        row_model: Optional[type] = None,
+        cache: Optional[ResponseCache] = None,
+        single_flight: Optional[Union[AsyncSingleFlight, SyncSingleFlight]] = None,
+        count_cache: Optional[CountCache] = None,
+        observer: Optional[QueryObserver] = None,
+        explain_sampler: Optional[ExplainSampler] = None,
     ) -> None:
         self.session: C = session
         self.path = path
         self.http_method = http_method
         self.headers = headers
-        self.params = params
+        self.params = params if isinstance(params, ParamList) else ParamList(params)
         self.json = None if http_method in {"GET", "HEAD"} else json
         self.auth = auth
+        self.skip_validation = skip_validation
+        self.row_model = row_model
+        self.cache = cache
+        self.single_flight = single_flight
+        self.count_cache = count_cache
+        self.smart_count: Optional[SmartCount] = None
+        self.observer = observer
+        self.explain_sampler = explain_sampler
+
+    def with_params(self, params: ParamList) -> RequestConfig[C]:
+        """Copy of this request with its query parameters replaced."""
+        request = RequestConfig(
+            self.session,
+            self.path,
+            self.http_method,
+            Headers(self.headers),
+            params,
+            self.auth,
+            self.json,
+            skip_validation=self.skip_validation,
+            row_model=self.row_model,
+            cache=self.cache,
+            single_flight=self.single_flight,
+            count_cache=self.count_cache,
+            observer=self.observer,
+            explain_sampler=self.explain_sampler,
+        )
+        request.smart_count = self.smart_count
+        return request
+
+    def accepting(self, media_type: str) -> RequestConfig[C]:
+        """Copy of this request asking for a response in `media_type`."""
+        request = self.with_params(self.params)
+        request.headers["Accept"] = media_type
+        return request
+
+    def url(self) -> str:
+        """The URL of the request, with its encoded query string."""
+        if not self.params:
+            return str(self.path)
+        return f"{self.path}?{self.params}"
 
     @overload
     def send(self: RequestConfig[Client]) -> RequestResponse: ...
@@ -79,22 +289,230 @@ class RequestConfig(Generic[C]):
     def send(self: RequestConfig[AsyncClient]) -> Awaitable[RequestResponse]: ...
 
     def send(self: RequestConfig[C]):
+        url = self.url()
+        if self.observer is None and self.explain_sampler is None:
+            return self._send(url)
+        if isinstance(self.session, AsyncClient):
+            return self._send_observed_async(url)
+        return self._send_observed(url)
+
+    def _send(self, url: str):
+        if self.cache is None:
+            return self._request(url, self.headers)
+        if isinstance(self.session, AsyncClient):
+            return self._send_cached_async(self.cache, url)
+        return self._send_cached(self.cache, url)
+
+    def fingerprint(self) -> str:
+        """Identifies the shape of the query, regardless of its filter values."""
+        from .metrics import fingerprint
+
+        return fingerprint(self.http_method, self.path.path, self.params.multi_items())
+
+    def _send_observed(self: RequestConfig[Client], url: str) -> RequestResponse:
+        start = time.perf_counter()
+        r: RequestResponse = self._send(url)
+        self._observed(time.perf_counter() - start, r)
+        return r
+
+    async def _send_observed_async(
+        self: RequestConfig[AsyncClient], url: str
+    ) -> RequestResponse:
+        start = time.perf_counter()
+        r: RequestResponse = await self._send(url)
+        self._observed(time.perf_counter() - start, r)
+        return r
+
+    def _request(self, url: str, headers: Headers):
         return self.session.request(
             self.http_method,
-            str(self.path),
+            url,
+            json=self.json,
+            headers=headers,
+            auth=self.auth,
+        )
+
+    def _conditional_headers(self, entry: Optional[CacheEntry]) -> Headers:
+        if entry is None:
+            return self.headers
+        headers = Headers(self.headers)
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _send_cached(
+        self: RequestConfig[Client], cache: ResponseCache, url: str
+    ) -> RequestResponse:
+        if self.http_method not in {"GET", "HEAD"}:
+            r: RequestResponse = self._request(url, self.headers)
+            cache.invalidate(self.path.name)
+            return r
+        key = self.request_key(url)
+        entry = cache.lookup(key)
+        if entry is not None and cache.is_fresh(entry):
+            return entry.response
+        generation = cache.generation(self.path.name)
+        r = self._request(url, self._conditional_headers(entry))
+        return self._cache_response(cache, key, entry, r, generation)
+
+    async def _send_cached_async(
+        self: RequestConfig[AsyncClient], cache: ResponseCache, url: str
+    ) -> RequestResponse:
+        if self.http_method not in {"GET", "HEAD"}:
+            r: RequestResponse = await self._request(url, self.headers)
+            cache.invalidate(self.path.name)
+            return r
+        key = self.request_key(url)
+        entry = cache.lookup(key)
+        if entry is not None and cache.is_fresh(entry):
+            return entry.response
+        generation = cache.generation(self.path.name)
+        r = await self._request(url, self._conditional_headers(entry))
+        return self._cache_response(cache, key, entry, r, generation)
+
+    def _observed(self, latency: float, r: RequestResponse) -> None:
+        fingerprint = self.fingerprint()
+        if self.observer is not None:
+            _observe(self.observer, fingerprint, latency, r)
+        if self.explain_sampler is not None and r.is_success:
+            self.explain_sampler.sample(self, fingerprint, latency)
+
+    def request_key(self, url: Optional[str] = None) -> CacheKey:
+        """Identifies the requests returning the same response as this one."""
+        return ResponseCache.key(
+            self.http_method,
+            url or self.url(),
+            self.headers,
+            self.session.headers,
+        )
+
+    def _cache_response(
+        self,
+        cache: ResponseCache,
+        key: CacheKey,
+        entry: Optional[CacheEntry],
+        r: RequestResponse,
+        generation: int,
+    ) -> RequestResponse:
+        if r.status_code == 304 and entry is not None:
+            cache.refresh(key, entry)
+            return entry.response
+        if r.is_success:
+            cache.store(key, self.path.name, r, generation)
+        return r
+
+    @overload
+    def stream(self: RequestConfig[Client]) -> ContextManager[RequestResponse]: ...
+    @overload
+    def stream(
+        self: RequestConfig[AsyncClient],
+    ) -> AsyncContextManager[RequestResponse]: ...
+
+    def stream(self: RequestConfig[C]):
+        """Send the request without reading the response body up front."""
+        return self.session.stream(
+            self.http_method,
+            self.url(),
             json=self.json,
-            params=self.params,
             headers=self.headers,
             auth=self.auth,
         )
 
 
+def _observe(
+    observer: QueryObserver, fingerprint: str, latency: float, r: RequestResponse
+) -> None:
+    from .metrics import QuerySample, rows_from_content_range
+
+    observer.record(
+        QuerySample(
+            fingerprint,
+            latency,
+            len(r.content),
+            rows_from_content_range(r.headers.get("Content-Range")),
+            r.status_code,
+        )
+    )
+
+
+def _set_count_preference(headers: Headers, count: Optional[CountMethod]) -> None:
+    """Replace the count method of the Prefer header, or remove it."""
+    preferences = [
+        preference
+        for preference in headers.get("Prefer", "").split(",")
+        if preference and not preference.startswith("count=")
+    ]
+    if count is not None:
+        preferences.append(f"count={count}")
+    if preferences:
+        headers["Prefer"] = ",".join(preferences)
+    elif "Prefer" in headers:
+        del headers["Prefer"]
+
+
+# parameters that don't change the number of rows matched by a query
+_PAGING_PARAMS = {"order", "limit", "offset"}
+
+
+class SmartCount:
+    """Counts the rows exactly below `threshold`, and estimates them above."""
+
+    __slots__ = ("threshold", "cache")
+
+    def __init__(self, threshold: int, cache: CountCache) -> None:
+        self.threshold = threshold
+        self.cache = cache
+
+    @staticmethod
+    def _filters(request: RequestConfig[Any]) -> ParamList:
+        # `select` is kept, its `!inner` embeddings filter the rows too
+        return ParamList(
+            (key, value)
+            for key, value in request.params.multi_items()
+            if key.rsplit(".", 1)[-1] not in _PAGING_PARAMS
+        )
+
+    def key(self, request: RequestConfig[Any]) -> Hashable:
+        """The shape of the query, as far as the count is concerned."""
+        headers, default_headers = request.headers, request.session.headers
+        filters = self._filters(request).multi_items()
+        if "(" not in request.params.get("select", "("):
+            # plain columns, every such query counts the same rows
+            filters = [(key, value) for key, value in filters if key != "select"]
+        return (
+            str(request.path),
+            str(ParamList(filters)),
+            *(
+                headers.get(name) or default_headers.get(name, "")
+                for name in ("Authorization", "apikey", "Accept-Profile")
+            ),
+        )
+
+    def count_request(self, request: RequestConfig[C]) -> RequestConfig[C]:
+        """A HEAD request for the exact count of the rows matched by `request`."""
+        headers = Headers(request.headers)
+        headers["Accept"] = "application/json"
+        _set_count_preference(headers, CountMethod.exact)
+        return RequestConfig(
+            request.session,
+            request.path,
+            "HEAD",
+            headers,
+            self._filters(request),
+            request.auth,
+            None,
+        )
+
+
 def _unique_columns(json: List[Dict[str, JSON]]):
     unique_keys = {key for row in json for key in row.keys()}
     columns = ",".join([f'"{k}"' for k in unique_keys])
     return columns
 
 
+@lru_cache(maxsize=256)
 def _cleaned_columns(columns: Tuple[str, ...]) -> str:
     quoted = False
     cleaned = []
@@ -119,7 +537,7 @@ def pre_select(
 ) -> QueryArgs:
     method = RequestMethod.HEAD if head else RequestMethod.GET
     cleaned_columns = _cleaned_columns(columns or ("*",))
-    params = QueryParams({"select": cleaned_columns})
+    params = ParamList([("select", cleaned_columns)])
 
     headers = Headers({"Prefer": f"count={count}"}) if count else Headers()
     return QueryArgs(method, params, headers, {})
@@ -145,7 +563,7 @@ def pre_insert(
     query_params = {}
     if isinstance(json, list):
         query_params = {"columns": _unique_columns(json)}
-    return QueryArgs(RequestMethod.POST, QueryParams(query_params), headers, json)
+    return QueryArgs(RequestMethod.POST, ParamList(query_params), headers, json)
 
 
 def pre_upsert(
@@ -171,7 +589,7 @@ def pre_upsert(
     # Adding 'columns' query parameters
     if isinstance(json, list):
         query_params["columns"] = _unique_columns(json)
-    return QueryArgs(RequestMethod.POST, QueryParams(query_params), headers, json)
+    return QueryArgs(RequestMethod.POST, ParamList(query_params), headers, json)
 
 
 def pre_update(
@@ -184,7 +602,7 @@ def pre_update(
     if count:
         prefer_headers.append(f"count={count}")
     headers = Headers({"Prefer": ",".join(prefer_headers)})
-    return QueryArgs(RequestMethod.PATCH, QueryParams(), headers, json)
+    return QueryArgs(RequestMethod.PATCH, ParamList(), headers, json)
 
 
 def pre_delete(
@@ -196,7 +614,56 @@ def pre_delete(
     if count:
         prefer_headers.append(f"count={count}")
     headers = Headers({"Prefer": ",".join(prefer_headers)})
-    return QueryArgs(RequestMethod.DELETE, QueryParams(), headers, {})
+    return QueryArgs(RequestMethod.DELETE, ParamList(), headers, {})
+
+
+def _decode_typed(
+    request_response: RequestResponse, row_model: type, many: bool
+) -> Any:
+    if not request_response.content:
+        return [] if many else None
+    try:
+        return typed_json_decoder(row_model, many)(request_response.content)
+    except ValueError as e:
+        # not caught by the builders, which would report it as an API error
+        raise ValueError(
+            f"Could not decode the response into {_model_name(row_model)}: {e}"
+        ) from e
+
+
+def _convert_typed(rows: List[Any], row_model: type) -> List[Any]:
+    try:
+        return typed_rows_converter(row_model)(rows)
+    except ValueError as e:
+        raise ValueError(
+            f"Could not decode the response into {_model_name(row_model)}: {e}"
+        ) from e
+
+
+def _model_name(row_model: Any) -> str:
+    return getattr(row_model, "__name__", None) or repr(row_model)
+
+
+def row_value(row: Any, key: str) -> Any:
+    """The value of the `key` column of a row, a mapping or a `returns()` model.
+
+    Raises:
+        :class:`ValueError` If the row does not hold `key`.
+    """
+    if isinstance(row, Mapping):
+        if key in row:
+            return row[key]
+    elif hasattr(row, key):
+        return getattr(row, key)
+    raise ValueError(f"'{key}' must be part of the selected columns")
+
+
+def _decode_unvalidated(request_response: RequestResponse) -> Any:
+    """Decode the body straight into Python objects, skipping pydantic."""
+    try:
+        return json_loads(request_response.content)
+    except JSONDecodeError:
+        return request_response.text if len(request_response.text) > 0 else []
 
 
 class APIResponse(BaseModel):
@@ -204,6 +671,13 @@ class APIResponse(BaseModel):
     """The data returned by the query."""
     count: Optional[int] = None
     """The number of rows returned."""
+    count_method: Optional[CountMethod] = None
+    """How :attr:`count` was computed. Only `exact` counts are exact, the
+    others are estimates from the query planner."""
+
+    @property
+    def is_count_exact(self) -> bool:
+        return self.count_method == CountMethod.exact
 
     @field_validator("data")
     @classmethod
@@ -244,13 +718,51 @@ class APIResponse(BaseModel):
         return None
 
     @staticmethod
-    def from_http_request_response(request_response: RequestResponse) -> APIResponse:
+    def _get_count_method_from_http_request_response(
+        request_response: RequestResponse,
+    ) -> Optional[CountMethod]:
+        prefer_header: str = request_response.request.headers.get("prefer", "")
+        match = search(
+            f"count=({'|'.join([cm.value for cm in CountMethod])})", prefer_header
+        )
+        return CountMethod(match.group(1)) if match else None
+
+    @staticmethod
+    def _get_count_and_method(
+        request_response: RequestResponse,
+    ) -> Tuple[Optional[int], Optional[CountMethod]]:
         count = APIResponse._get_count_from_http_request_response(request_response)
+        if count is None:
+            return None, None
+        return count, APIResponse._get_count_method_from_http_request_response(
+            request_response
+        )
+
+    @staticmethod
+    def from_http_request_response(
+        request_response: RequestResponse,
+        *,
+        skip_validation: bool = False,
+        row_model: Optional[type] = None,
+    ) -> APIResponse:
+        count, count_method = APIResponse._get_count_and_method(request_response)
+        if row_model is not None:
+            return APIResponse.model_construct(
+                data=_decode_typed(request_response, row_model, many=True),
+                count=count,
+                count_method=count_method,
+            )
+        if skip_validation:
+            return APIResponse.model_construct(
+                data=_decode_unvalidated(request_response),
+                count=count,
+                count_method=count_method,
+            )
         try:
-            data = JSONAdapter.validate_json(request_response.content)
+            data = json_adapter().validate_json(request_response.content)
         except ValidationError:
             data = request_response.text if len(request_response.text) > 0 else []
-        return APIResponse(data=data, count=count)
+        return APIResponse(data=data, count=count, count_method=count_method)
 
 
 class SingleAPIResponse(APIResponse):
@@ -260,20 +772,318 @@ class SingleAPIResponse(APIResponse):
     @staticmethod
     def from_http_request_response(
         request_response: RequestResponse,
+        *,
+        skip_validation: bool = False,
+        row_model: Optional[type] = None,
     ) -> SingleAPIResponse:
-        count = APIResponse._get_count_from_http_request_response(request_response)
+        count, count_method = APIResponse._get_count_and_method(request_response)
+        if row_model is not None:
+            return SingleAPIResponse.model_construct(
+                data=_decode_typed(request_response, row_model, many=False),
+                count=count,
+                count_method=count_method,
+            )
+        if skip_validation:
+            return SingleAPIResponse.model_construct(
+                data=_decode_unvalidated(request_response),
+                count=count,
+                count_method=count_method,
+            )
         try:
             data = request_response.json()
         except JSONDecodeError:
             data = request_response.text if len(request_response.text) > 0 else []
-        return SingleAPIResponse(data=data, count=count)
+        return SingleAPIResponse(data=data, count=count, count_method=count_method)
+
+
+class BulkChunkError(BaseModel, arbitrary_types_allowed=True):
+    """A chunk of rows that could not be written by a bulk operation."""
+
+    index: int
+    """The position of the chunk in the input, starting at 0."""
+    rows: List[JSON]
+    """The rows of the chunk, so that they can be retried."""
+    error: Exception
+    """The error raised while writing the chunk."""
+
+
+class BulkAPIResponse(BaseModel, arbitrary_types_allowed=True):
+    """The aggregated outcome of a chunked bulk operation."""
+
+    data: List[JSON]
+    """The rows returned by the successful chunks."""
+    count: Optional[int]
+    """The sum of the counts returned by the successful chunks, if requested."""
+    row_count: int
+    """The number of rows sent in the successful chunks."""
+    errors: List[BulkChunkError]
+    """The chunks that failed."""
+
+
+class BulkUpdateResponse(BulkAPIResponse):
+    """The aggregated outcome of `update_many`."""
+
+    row_count: int
+    """The number of rows written by the successful chunks, without the missing ones."""
+    keys: List[Any]
+    """The keys of the rows that were updated."""
+    missing: List[Any]
+    """The keys of the successful chunks matching no row, which were not updated."""
+
+
+class RPCResult(BaseModel, arbitrary_types_allowed=True):
+    """The outcome of one of the calls made by `rpc_many`."""
+
+    index: int
+    """The position of the call in the input, starting at 0."""
+    params: Dict[str, Any]
+    """The parameters the function was called with."""
+    response: Optional[SingleAPIResponse]
+    """The response of the call, if it succeeded."""
+    error: Optional[Exception]
+    """The error raised by the last attempt, if the call failed."""
+    attempts: int
+    """The number of requests made for the call."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BulkResponseBuilder:
+    """Aggregates the responses of the chunks of a bulk operation."""
+
+    def __init__(self) -> None:
+        self.data: List[JSON] = []
+        self.count: Optional[int] = None
+        self.row_count = 0
+        self.errors: List[BulkChunkError] = []
+
+    def add(
+        self, index: int, rows: List[JSON], outcome: Union[APIResponse, Exception]
+    ) -> None:
+        if isinstance(outcome, Exception):
+            self.errors.append(
+                BulkChunkError.model_construct(index=index, rows=rows, error=outcome)
+            )
+            return
+        self.row_count += len(rows)
+        self.data.extend(outcome.data)
+        if outcome.count is not None:
+            self.count = (self.count or 0) + outcome.count
+
+    def build(self) -> BulkAPIResponse:
+        # the rows were already validated chunk by chunk
+        return BulkAPIResponse.model_construct(
+            data=self.data,
+            count=self.count,
+            row_count=self.row_count,
+            errors=self.errors,
+        )
+
+
+class BulkUpdateResponseBuilder(BulkResponseBuilder):
+    """Aggregates the responses of `update_many`, which return the updated keys."""
+
+    def __init__(self, key: str) -> None:
+        super().__init__()
+        self.key = key
+        self.keys: List[Any] = []
+        self.missing: List[Any] = []
+
+    def add(
+        self, index: int, rows: List[JSON], outcome: Union[APIResponse, Exception]
+    ) -> None:
+        super().add(index, rows, outcome)
+        if isinstance(outcome, Exception):
+            return
+        key = self.key
+        updated = [cast(Mapping[str, Any], row)[key] for row in outcome.data]
+        # compared as strings, since PostgREST may return `1` for a key sent as `"1"`
+        found = {str(k) for k in updated}
+        self.keys.extend(updated)
+        # the rows found missing by the lookup were never sent
+        self.row_count += len(updated) - len(rows)
+        self.missing.extend(
+            row[key]
+            for row in cast(List[Mapping[str, Any]], rows)
+            if str(row[key]) not in found
+        )
+
+    def build(self) -> BulkUpdateResponse:
+        return BulkUpdateResponse.model_construct(
+            data=self.data,
+            count=self.count,
+            row_count=self.row_count,
+            errors=self.errors,
+            keys=self.keys,
+            missing=self.missing,
+        )
 
 
-class BaseFilterRequestBuilder(Generic[C]):
+# The keys `update_many` looks up in the URL, encoded. Proxies such as nginx
+# and Kong refuse request lines over 8 KB by default, this leaves room for
+# the rest of the URL.
+MAX_LOOKUP_KEY_BYTES = 4096
+
+
+class _UpdateGroup:
+    """The pending chunk of the rows updating the same columns."""
+
+    __slots__ = ("chunker", "keys", "key_bytes")
+
+    def __init__(self, chunker: RowChunker) -> None:
+        self.chunker = chunker
+        self.keys: Set[str] = set()
+        self.key_bytes = 0
+
+    def restart(self) -> None:
+        self.keys.clear()
+        self.key_bytes = 0
+
+
+class UpdateChunker:
+    """Groups the rows of `update_many` into chunks of rows with the same columns.
+
+    A bulk upsert sets every column it is given, to null for the rows
+    missing it, so only rows updating the same columns can share a
+    request. A chunk is also flushed before it would hold the same key
+    twice, which PostgreSQL refuses in a single upsert, or, with
+    `max_key_bytes`, before the keys looked up in the URL by `update_many`
+    would exceed that many bytes once encoded.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        chunk_size: int,
+        max_chunk_bytes: Optional[int] = None,
+        max_key_bytes: Optional[int] = None,
+    ) -> None:
+        _check_chunk_limits(chunk_size, max_chunk_bytes)
+        if max_key_bytes is not None and max_key_bytes < 1:
+            raise ValueError("max_key_bytes must be at least 1")
+        self.key = key
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_key_bytes = max_key_bytes
+        self._groups: Dict[Tuple[str, ...], _UpdateGroup] = {}
+
+    def add(self, row: JSON) -> List[List[JSON]]:
+        """Add a row, returning the chunks that are now full."""
+        if not isinstance(row, dict) or self.key not in row:
+            raise ValueError(f"Every row must be an object with a '{self.key}' key")
+        columns = tuple(sorted(row))
+        group = self._groups.get(columns)
+        if group is None:
+            group = self._groups[columns] = _UpdateGroup(
+                RowChunker(self.chunk_size, self.max_chunk_bytes)
+            )
+        full: List[List[JSON]] = []
+        value = str(row[self.key])
+        key_bytes = 0
+        if self.max_key_bytes is not None:
+            # as in the `in_` filter: sanitized, encoded and separated by `%2C`
+            key_bytes = len(quote_plus(sanitize_param(row[self.key]))) + 3
+        if value in group.keys or (
+            group.keys
+            and self.max_key_bytes is not None
+            and group.key_bytes + key_bytes > self.max_key_bytes
+        ):
+            full.append(group.chunker.flush())
+            group.restart()
+        chunk = group.chunker.add(row)
+        if chunk is not None:
+            full.append(chunk)
+            group.restart()
+        group.keys.add(value)
+        group.key_bytes += key_bytes
+        return full
+
+    def flush(self) -> List[List[JSON]]:
+        """Return the rows of every pending chunk."""
+        chunks = [group.chunker.flush() for group in self._groups.values()]
+        self._groups.clear()
+        return [chunk for chunk in chunks if chunk]
+
+
+class ColumnBuilder:
+    """Transposes batches of rows into one list of values per column.
+
+    PostgREST returns the same keys for every row of a response, so the
+    columns are the keys of the first row.
+    """
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, List[Any]] = {}
+
+    def extend(self, rows: List[JSON]) -> None:
+        if not rows:
+            return
+        if not self.columns:
+            self.columns = {key: [] for key in cast(Mapping[str, Any], rows[0])}
+        records = cast(List[Mapping[str, Any]], rows)
+        for key, values in self.columns.items():
+            values.extend([row.get(key) for row in records])
+
+
+def _check_chunk_limits(chunk_size: int, max_chunk_bytes: Optional[int]) -> None:
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if max_chunk_bytes is not None and max_chunk_bytes < 1:
+        raise ValueError("max_chunk_bytes must be at least 1")
+
+
+class RowChunker:
+    """Groups rows into chunks bounded by a number of rows and, optionally,
+    by the size of their JSON encoding in bytes."""
+
+    def __init__(self, chunk_size: int, max_chunk_bytes: Optional[int] = None) -> None:
+        _check_chunk_limits(chunk_size, max_chunk_bytes)
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self._rows: List[JSON] = []
+        self._bytes = 2  # the enclosing brackets
+
+    def add(self, row: JSON) -> Optional[List[JSON]]:
+        """Add a row, returning the previous chunk if it is now full."""
+        size = 0
+        if self.max_chunk_bytes is not None:
+            # the same compact encoding httpx uses, plus the separating comma
+            encoded = json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+            size = len(encoded.encode()) + 1
+        full = None
+        if self._rows and (
+            len(self._rows) >= self.chunk_size
+            or (
+                self.max_chunk_bytes is not None
+                and self._bytes + size > self.max_chunk_bytes
+            )
+        ):
+            full = self.flush()
+        self._rows.append(row)
+        self._bytes += size
+        return full
+
+    def flush(self) -> List[JSON]:
+        """Return the rows of the current chunk and start a new one."""
+        rows, self._rows, self._bytes = self._rows, [], 2
+        return rows
+
+
+class BaseRequestBuilder(Generic[C]):
+    # The only class of the builder hierarchy with non-empty slots, so that
+    # the builders can inherit from several of them without layout conflicts.
+    __slots__ = ("request", "negate_next")
+
     def __init__(self, request: RequestConfig[C]) -> None:
         self.request: RequestConfig[C] = request
         self.negate_next = False
 
+
+class BaseFilterRequestBuilder(BaseRequestBuilder[C]):
+    __slots__ = ()
+
     @property
     def not_(self: Self) -> Self:
         """Whether the filter applied next should be negated."""
@@ -558,6 +1368,8 @@ class BaseFilterRequestBuilder(Generic[C]):
 
 
 class BaseSelectRequestBuilder(BaseFilterRequestBuilder[C]):
+    __slots__ = ()
+
     def order(
         self: Self,
         column: str,
@@ -629,8 +1441,81 @@ class BaseSelectRequestBuilder(BaseFilterRequestBuilder[C]):
         )
         return self
 
+    def returns(self: Self, model: type) -> Self:
+        """Decode the returned rows into instances of `model`.
+
+        The response body is decoded in a single pass, without building the
+        intermediate JSON objects, and :attr:`APIResponse.data` then holds
+        `model` instances instead of dictionaries.
+
+        Args:
+            model: A pydantic model, dataclass or TypedDict, or a msgspec Struct
+                when msgspec is installed.
+        Example:
+            .. code-block:: python
+
+                class Country(BaseModel):
+                    id: int
+                    name: str
+
+                r = await client.from_("countries").select("id, name").returns(Country).execute()
+        """
+        self.request.row_model = model
+        return self
+
+    def smart_count(self: Self, threshold: int = 100_000) -> Self:
+        """Count the rows exactly only when there are few of them.
+
+        The query asks PostgREST for the count estimated by the query
+        planner, which is cheap. When the estimate is below `threshold`, the
+        exact count is then fetched with a second request. Counts are cached
+        per query shape, ignoring the order, pagination and selected columns
+        unless they embed other tables, so that paging through a result
+        doesn't count its rows again.
+        :attr:`APIResponse.count_method` tells which count was returned.
+
+        Args:
+            threshold: The estimated number of rows above which the estimate
+                is returned instead of an exact count.
+        Example:
+            .. code-block:: python
+
+                r = await client.from_("events").select("*").smart_count().limit(50).execute()
+                label = f"{r.count} events" if r.is_count_exact else f"~{r.count} events"
+        """
+        cache = self.request.count_cache
+        self.request.smart_count = SmartCount(
+            threshold, CountCache() if cache is None else cache
+        )
+        return self
+
+    def _keyset_request(
+        self, key: str, page_size: int, desc: bool, after: Any
+    ) -> RequestConfig[C]:
+        """Request for the page of rows that come after `after` in `key` order."""
+        params = (
+            self.request.params.copy()
+            .set("order", f"{key}.{'desc' if desc else 'asc'}")
+            .set("limit", page_size)
+        )
+        if after is not None:
+            operator = Filters.LT if desc else Filters.GT
+            params = params.add(sanitize_param(key), f"{operator}.{after}")
+        return self.request.with_params(params)
+
+    def _check_keyset_pagination(self, key: str, page_size: int) -> None:
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        for param in ("order", "limit", "offset"):
+            if param in self.request.params:
+                raise ValueError(
+                    f"Keyset pagination on '{key}' cannot be combined with '{param}'"
+                )
+
 
 class BaseRPCRequestBuilder(BaseSelectRequestBuilder):
+    __slots__ = ()
+
     def select(
         self,
         *columns: str,
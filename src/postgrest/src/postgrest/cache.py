@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+
+from httpx import Headers
+from httpx import Response as RequestResponse
+
+from .types import CountMethod
+
+# Request headers changing the response for the same URL. Authorization and
+# apikey matter because row level security shows different rows to each user.
+_VARY_HEADERS = (
+    "Accept",
+    "Accept-Profile",
+    "Prefer",
+    "Range",
+    "Authorization",
+    "apikey",
+)
+
+CacheKey = Tuple[str, ...]
+
+
+class CacheEntry(NamedTuple):
+    response: RequestResponse
+    table: str
+    expires_at: Optional[float]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class ResponseCache:
+    """In memory LRU cache of the responses to GET and HEAD queries.
+
+    Entries expire after `ttl` seconds, when set. Expired entries are
+    revalidated with a conditional request if the server sent an `ETag` or
+    `Last-Modified` header, so that an unchanged result isn't sent again.
+    Writes made through the client invalidate the cached queries of the
+    table they touch, and :meth:`invalidate` can be called for changes
+    made elsewhere.
+
+    All the operations are synchronous and guarded by a lock, so a cache
+    can be shared by concurrent tasks and threads.
+
+    Example:
+        .. code-block:: python
+
+            cache = ResponseCache(maxsize=512, ttl=60)
+            client = AsyncPostgrestClient(url, cache=cache)
+            flags = await client.from_("feature_flags").select("*").execute()
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        # bumped on every invalidation, so that a response requested before
+        # a write isn't cached once the write has gone through
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(
+        method: str, url: str, headers: Headers, default_headers: Headers
+    ) -> CacheKey:
+        return (
+            method,
+            url,
+            *(
+                headers.get(name) or default_headers.get(name, "")
+                for name in _VARY_HEADERS
+            ),
+        )
+
+    def generation(self, table: str) -> int:
+        return self._epoch + self._generations.get(table, 0)
+
+    def lookup(self, key: CacheKey) -> Optional[CacheEntry]:
+        """Return the entry for `key`, if it is fresh or can be revalidated."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if self.is_fresh(entry):
+                self.hits += 1
+                return entry
+            self.misses += 1
+            if entry.etag is None and entry.last_modified is None:
+                # nothing to revalidate with
+                del self._entries[key]
+                return None
+            return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return entry.expires_at is None or entry.expires_at > time.monotonic()
+
+    def store(
+        self, key: CacheKey, table: str, response: RequestResponse, generation: int
+    ) -> None:
+        """Cache `response`, unless `table` was invalidated since `generation`."""
+        entry = CacheEntry(
+            response,
+            table,
+            None if self.ttl is None else time.monotonic() + self.ttl,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+        with self._lock:
+            if self.generation(table) != generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key: CacheKey, entry: CacheEntry) -> None:
+        """Mark `entry` as fresh again, after the server confirmed it unchanged."""
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if self._entries.get(key) is entry:
+                self._entries[key] = entry._replace(expires_at=expires_at)
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Drop the cached queries of `table`, or of every table if not given."""
+        with self._lock:
+            if table is None:
+                self._epoch += 1
+                self._entries.clear()
+                return
+            self._generations[table] = self._generations.get(table, 0) + 1
+            for key in [k for k, e in self._entries.items() if e.table == table]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CountCache:
+    """LRU cache of row counts, which expire after `ttl` seconds.
+
+    Counting the rows matched by a query can be as expensive as a full scan
+    of the table, while dashboards don't need a count more recent than a
+    few seconds.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, Tuple[float, int, CountMethod]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[int, CountMethod]]:
+        """The count cached for `key` and how it was computed, if not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, count, method = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return count, method
+
+    def put(self, key: Hashable, count: int, method: CountMethod) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, count, method)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
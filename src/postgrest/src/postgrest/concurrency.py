@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+    cast,
+)
+
+T = TypeVar("T")
+
+SyncFuture = Future
+
+
+class AsyncFuture(Generic[T]):
+    """Handle on a coroutine scheduled by :class:`AsyncExecutor`."""
+
+    def __init__(self, task: asyncio.Task[T]) -> None:
+        self._task = task
+
+    async def result(self) -> T:
+        """Wait for the coroutine to finish and return its result."""
+        return await self._task
+
+    def cancel(self) -> bool:
+        return self._task.cancel()
+
+
+class AsyncExecutor:
+    """Runs coroutines in the background, at most `max_workers` at a time.
+
+    This is the asynchronous twin of :class:`SyncExecutor`, so that the same
+    code can schedule concurrent requests for both flavours of the client.
+    Pending work is cancelled when leaving the ``async with`` block.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task[Any]] = set()
+
+    def submit(
+        self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+    ) -> AsyncFuture[T]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        semaphore = self._semaphore
+
+        async def run() -> T:
+            async with semaphore:
+                return await fn(*args, **kwargs)
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return AsyncFuture(task)
+
+    async def wait_first(
+        self, futures: Iterable[AsyncFuture[T]]
+    ) -> List[AsyncFuture[T]]:
+        """Wait until any of `futures` is done, and return the ones that are."""
+        by_task = {future._task: future for future in futures}
+        done, _ = await asyncio.wait(by_task, return_when=asyncio.FIRST_COMPLETED)
+        return [by_task[task] for task in done]
+
+    @staticmethod
+    async def sleep(seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    async def shutdown(self) -> None:
+        """Cancel the work that has not finished yet."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> AsyncExecutor:
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.shutdown()
+
+
+class SyncExecutor:
+    """Runs functions in a thread pool, at most `max_workers` at a time.
+
+    httpx clients are thread safe, so the pooled connections of a single
+    client are shared by all the workers.
+    Pending work is cancelled when leaving the ``with`` block.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> SyncFuture[T]:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="postgrest"
+            )
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def wait_first(self, futures: Iterable[SyncFuture[T]]) -> List[SyncFuture[T]]:
+        """Wait until any of `futures` is done, and return the ones that are."""
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        return list(done)
+
+    @staticmethod
+    def sleep(seconds: float) -> None:
+        time.sleep(seconds)
+
+    def shutdown(self) -> None:
+        """Cancel the work that has not started yet and wait for the rest."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> SyncExecutor:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+
+class AsyncSingleFlight:
+    """Coalesces identical concurrent calls into a single one.
+
+    While a call for a key is in flight, further calls for the same key
+    wait for it and get its result instead of running again. `calls` counts
+    every call and `coalesced` the ones that were served this way.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, asyncio.Future[Any]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # a cancelled caller must not cancel the call the others wait for
+        return await asyncio.shield(future)
+
+
+class SyncSingleFlight:
+    """Coalesces identical concurrent calls from several threads into one.
+
+    The first thread runs the call while the others wait for its result.
+    `calls` counts every call and `coalesced` the ones that were served
+    this way.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, Future[Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if future is None:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return cast(T, future.result())
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._done(key)
+            future.set_exception(e)
+            raise
+        self._done(key)
+        future.set_result(result)
+        return result
+
+    def _done(self, key: Hashable) -> None:
+        with self._lock:
+            del self._in_flight[key]
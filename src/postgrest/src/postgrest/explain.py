@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Union,
+)
+
+from httpx import AsyncClient, Client
+from pydantic import BaseModel
+
+from .types import JSON
+
+if TYPE_CHECKING:
+    from .base_request_builder import RequestConfig
+
+
+class ExplainPlan(BaseModel):
+    """The plan of a query captured by an :class:`ExplainSampler`."""
+
+    fingerprint: str
+    """Identifies the shape of the query, see :func:`postgrest.metrics.fingerprint`."""
+    url: str
+    latency: float
+    """The time the sampled request took, in seconds."""
+    plan: JSON
+    """The plan PostgreSQL returned for ``EXPLAIN (FORMAT JSON)``."""
+    captured_at: float
+    """When the plan was captured, as a UNIX timestamp."""
+
+
+class ExplainSampler:
+    """Captures the plans of slow or sampled queries in the background.
+
+    A read taking longer than `threshold` seconds, or one out of `every`
+    reads, is sent again with an explain header once its response is
+    received, without delaying it. Writes are never sent again. The plans
+    are kept in a ring buffer of the `maxsize` most recent ones, which
+    :meth:`dump` writes out for offline analysis.
+
+    PostgREST only returns plans when its `db-plan-enabled` setting is on.
+
+    Example:
+        .. code-block:: python
+
+            sampler = ExplainSampler(threshold=0.5, every=1000)
+            client = AsyncPostgrestClient(url, explain_sampler=sampler)
+            ...
+            sampler.dump("plans.jsonl")
+
+    Args:
+        threshold: The latency above which a query is explained, in seconds,
+            or `None` to only sample.
+        every: Explain one out of `every` queries, or `None` to only
+            explain slow ones.
+        maxsize: The number of plans kept.
+        cooldown: The minimum time between two plans of the same fingerprint,
+            in seconds, so that a query that is always slow is not explained
+            on every call.
+        analyze: Whether to run the queries to report their actual costs,
+            which makes them as slow as the sampled one again.
+        max_pending: The maximum number of explain requests in flight, above
+            which queries are not sampled.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = 1.0,
+        *,
+        every: Optional[int] = None,
+        maxsize: int = 100,
+        cooldown: float = 60.0,
+        analyze: bool = False,
+        max_pending: int = 2,
+    ) -> None:
+        if every is not None and every < 1:
+            raise ValueError("every must be at least 1")
+        if maxsize < 1 or max_pending < 1:
+            raise ValueError("maxsize and max_pending must be at least 1")
+        self.threshold = threshold
+        self.every = every
+        self.cooldown = cooldown
+        self.analyze = analyze
+        self.max_pending = max_pending
+        self.errors = 0
+        """The number of explain requests that failed."""
+        self._plans: Deque[ExplainPlan] = deque(maxlen=maxsize)
+        self._last_explained: Dict[str, float] = {}
+        self._calls = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def plans(self) -> List[ExplainPlan]:
+        """The plans captured, the oldest first."""
+        with self._lock:
+            return list(self._plans)
+
+    def sample(
+        self, request: RequestConfig[Any], fingerprint: str, latency: float
+    ) -> None:
+        """Explain `request` in the background, if it is selected."""
+        if request.http_method not in {"GET", "HEAD"}:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._calls += 1
+            selected = (self.threshold is not None and latency > self.threshold) or (
+                self.every is not None and self._calls % self.every == 0
+            )
+            last = self._last_explained.get(fingerprint)
+            if (
+                not selected
+                or self._pending >= self.max_pending
+                or (last is not None and now - last < self.cooldown)
+            ):
+                return
+            self._last_explained[fingerprint] = now
+            self._pending += 1
+
+        explain = self._explain_request(request)
+        if isinstance(explain.session, AsyncClient):
+            task = asyncio.ensure_future(
+                self._explain_async(explain, fingerprint, latency)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    self.max_pending, thread_name_prefix="postgrest-explain"
+                )
+            self._pool.submit(self._explain, explain, fingerprint, latency)
+
+    def _explain_request(self, request: RequestConfig[Any]) -> RequestConfig[Any]:
+        explain = request.with_params(request.params.copy())
+        options = "analyze" if self.analyze else ""
+        explain.headers["Accept"] = (
+            f"application/vnd.pgrst.plan+json; options={options}"
+        )
+        explain.http_method = "GET"
+        explain.cache = None
+        explain.observer = None
+        explain.explain_sampler = None
+        return explain
+
+    def _explain(
+        self, request: RequestConfig[Client], fingerprint: str, latency: float
+    ) -> None:
+        try:
+            r = request.send()
+        except Exception:
+            # explaining is best effort, the sampled query already succeeded
+            r = None
+        self._store(request, fingerprint, latency, r)
+
+    async def _explain_async(
+        self, request: RequestConfig[AsyncClient], fingerprint: str, latency: float
+    ) -> None:
+        try:
+            r = await request.send()
+        except Exception:
+            r = None
+        self._store(request, fingerprint, latency, r)
+
+    def _store(
+        self,
+        request: RequestConfig[Any],
+        fingerprint: str,
+        latency: float,
+        r: Any,
+    ) -> None:
+        plan = None
+        if r is not None and r.is_success:
+            try:
+                plan = r.json()
+            except ValueError:
+                pass
+        with self._lock:
+            self._pending -= 1
+            if plan is None:
+                self.errors += 1
+                return
+            self._plans.append(
+                ExplainPlan(
+                    fingerprint=fingerprint,
+                    url=request.url(),
+                    latency=latency,
+                    plan=plan,
+                    captured_at=time.time(),
+                )
+            )
+
+    def dump(self, destination: Union[str, os.PathLike[str], IO[str]]) -> int:
+        """Write the captured plans as JSON lines, returning how many there were."""
+        if isinstance(destination, (str, os.PathLike)):
+            with open(destination, "w", encoding="utf-8") as f:
+                return self.dump(f)
+        plans = self.plans
+        for plan in plans:
+            destination.write(json.dumps(plan.model_dump(mode="json")) + "\n")
+        return len(plans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self._last_explained.clear()
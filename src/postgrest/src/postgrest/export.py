@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Sequence, Type, Union
+
+from pydantic import BaseModel
+
+from .types import JSON
+
+ExportFormat = Literal["jsonl", "csv", "parquet"]
+
+# The fractional seconds PostgreSQL writes are trimmed of their trailing zeros,
+# while `datetime.fromisoformat` only accepts 3 or 6 digits before Python 3.11.
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def _parse_timestamp(value: str) -> Union[datetime, date]:
+    if len(value) == 10:
+        return date.fromisoformat(value)
+    value = value.replace(" ", "T", 1)
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    value = _FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), value, 1)
+    return datetime.fromisoformat(value)
+
+
+def split_range(low: Any, high: Any, partitions: int) -> List[Any]:
+    """Split the `low`..`high` range of a key into `partitions` ranges.
+
+    The key is either numeric, or a date or timestamp in ISO format as
+    returned by PostgREST. Returns the inner boundaries, `partitions - 1`
+    at most, in increasing order.
+
+    Raises:
+        :class:`ValueError` If the key cannot be split automatically.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    if isinstance(low, bool) or isinstance(high, bool):
+        raise ValueError("Cannot partition on a boolean key")
+    if isinstance(low, int) and isinstance(high, int):
+        step = -(-(high - low + 1) // partitions)
+        return [low + i * step for i in range(1, partitions) if low + i * step <= high]
+    if isinstance(low, (int, float)) and isinstance(high, (int, float)):
+        width = (high - low) / partitions
+        bounds = [low + i * width for i in range(1, partitions)]
+        return sorted({b for b in bounds if low < b < high})
+    if isinstance(low, str) and isinstance(high, str):
+        try:
+            start, end = _parse_timestamp(low), _parse_timestamp(high)
+        except ValueError:
+            raise ValueError(
+                f"Cannot partition on {low!r}..{high!r}, pass the boundaries explicitly"
+            ) from None
+        width = (end - start) / partitions
+        bounds = [start + i * width for i in range(1, partitions)]
+        return [b.isoformat() for b in sorted({b for b in bounds if start < b < end})]
+    raise ValueError(
+        f"Cannot partition on {low!r}..{high!r}, pass the boundaries explicitly"
+    )
+
+
+class PartitionState(BaseModel):
+    """Progress of the export of one key range, saved in the checkpoint."""
+
+    index: int
+    lower: Any = None
+    """The smallest key of the partition, or `None` when unbounded."""
+    upper: Any = None
+    """The key after the last one of the partition, or `None` when unbounded."""
+    last_key: Any = None
+    """The last key written, from which an interrupted export resumes."""
+    rows: int = 0
+    done: bool = False
+    sink: Optional[Dict[str, Any]] = None
+    """What the sink needs to append to the partial file, see `ExportSink.state`."""
+
+
+class ExportResult(BaseModel):
+    """The outcome of a table export."""
+
+    partitions: List[PartitionState]
+    files: List[Path]
+
+    @property
+    def rows(self) -> int:
+        return sum(p.rows for p in self.partitions)
+
+
+class ExportCheckpoint:
+    """JSON file recording the progress of every partition of an export.
+
+    It is rewritten atomically after every page, so an interrupted export
+    resumes from the last page that was fully written.
+    """
+
+    def __init__(
+        self, path: Path, key: str, format: str, partitions: List[PartitionState]
+    ) -> None:
+        self.path = path
+        self.key = key
+        self.format = format
+        self.partitions = partitions
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path, key: str, format: str) -> Optional[ExportCheckpoint]:
+        """Read the checkpoint at `path`, if there is one.
+
+        Raises:
+            :class:`ValueError` If it belongs to an export of another key or format.
+        """
+        try:
+            content = json.loads(path.read_text("utf-8"))
+        except FileNotFoundError:
+            return None
+        if content["key"] != key or content["format"] != format:
+            raise ValueError(
+                f"The checkpoint {path} is for an export of '{content['key']}' "
+                f"as {content['format']}, delete it to start over"
+            )
+        partitions = [PartitionState(**p) for p in content["partitions"]]
+        return cls(path, key, format, partitions)
+
+    def save(self) -> None:
+        with self._lock:
+            self._write()
+
+    def update(self, partition: PartitionState, **fields: Any) -> None:
+        """Change the progress of `partition` and save it.
+
+        The fields are changed under the lock, so that a partition is never
+        saved halfway through an update made by another thread.
+        """
+        with self._lock:
+            for name, value in fields.items():
+                setattr(partition, name, value)
+            self._write()
+
+    def _write(self) -> None:
+        content = {
+            "key": self.key,
+            "format": self.format,
+            "partitions": [p.model_dump(mode="json") for p in self.partitions],
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(content), "utf-8")
+        os.replace(tmp, self.path)
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class ExportSink(ABC):
+    """Writes the rows of one partition to a file, page after page."""
+
+    extension = ""
+
+    def __init__(self, path: Path, state: Optional[Dict[str, Any]] = None) -> None:
+        self.path = path
+
+    @abstractmethod
+    def write(self, rows: List[JSON]) -> None:
+        """Append `rows` to the file."""
+
+    def state(self) -> Optional[Dict[str, Any]]:
+        """What is needed to append to the file after the rows written so far.
+
+        `None` means the sink cannot resume, and an interrupted partition is
+        exported again from the start.
+        """
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class _TextSink(ExportSink):
+    def __init__(self, path: Path, state: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(path, state)
+        if state is None:
+            self._file = open(path, "w", encoding="utf-8", newline="")
+        else:
+            # drop what was written after the last checkpoint
+            self._file = open(path, "r+", encoding="utf-8", newline="")
+            self._file.seek(state["offset"])
+            self._file.truncate()
+
+    def state(self) -> Dict[str, Any]:
+        self._file.flush()
+        return {"offset": self._file.tell()}
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JSONLinesSink(_TextSink):
+    """Writes one JSON document per line."""
+
+    extension = ".jsonl"
+
+    def write(self, rows: List[JSON]) -> None:
+        self._file.writelines(
+            json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for row in rows
+        )
+
+
+class CSVSink(_TextSink):
+    """Writes a header line with the columns of the first row, then the rows.
+
+    Nested values are written as JSON and nulls as empty fields, like the
+    CSV output of PostgREST.
+    """
+
+    extension = ".csv"
+
+    def __init__(self, path: Path, state: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(path, state)
+        self._columns: Optional[List[str]] = None if state is None else state["columns"]
+        self._writer = csv.writer(self._file, lineterminator="\n")
+
+    def write(self, rows: List[JSON]) -> None:
+        for row in rows:
+            if not isinstance(row, dict):
+                raise TypeError(
+                    f"CSV rows must be objects, got {type(row).__name__}: {row!r}"
+                )
+            if self._columns is None:
+                self._columns = list(row)
+                self._writer.writerow(self._columns)
+            self._writer.writerow(
+                "" if value is None else _csv_value(value)
+                for value in (row.get(column) for column in self._columns)
+            )
+
+    def state(self) -> Dict[str, Any]:
+        state = super().state()
+        state["columns"] = self._columns
+        return state
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return value
+
+
+class ParquetSink(ExportSink):
+    """Writes the rows as a Parquet file, one row group per page.
+
+    The schema is inferred from the first page. Requires the `pyarrow`
+    package. A Parquet file cannot be appended to, so an interrupted
+    partition is exported again from the start.
+    """
+
+    extension = ".parquet"
+
+    def __init__(self, path: Path, state: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(path, state)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "Parquet exports require pyarrow, install it with `pip install postgrest[arrow]`"
+            ) from e
+        self._pyarrow = pyarrow
+        self._writer: Any = None
+
+    def write(self, rows: List[JSON]) -> None:
+        pa = self._pyarrow
+        if self._writer is None:
+            table = pa.Table.from_pylist(rows)
+            self._writer = pa.parquet.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pylist(rows, schema=self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+SINKS: Dict[str, Type[ExportSink]] = {
+    "jsonl": JSONLinesSink,
+    "csv": CSVSink,
+    "parquet": ParquetSink,
+}
+
+
+def plan_partitions(boundaries: Sequence[Any]) -> List[PartitionState]:
+    """The partitions delimited by `boundaries`, the first and last being unbounded.
+
+    Leaving the outer partitions open makes the export include the rows
+    inserted outside of the key range while it runs.
+    """
+    bounds = [None, *boundaries, None]
+    return [
+        PartitionState(index=i, lower=lower, upper=upper)
+        for i, (lower, upper) in enumerate(zip(bounds, bounds[1:]))
+    ]
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+from pydantic import BaseModel
+
+# parameters describing the shape of the query rather than filtering rows
+_SHAPE_PARAMS = {"select", "columns", "on_conflict"}
+_PAGING_PARAMS = {"limit", "offset"}
+_LOGICAL_OPERATORS = {"or", "and", "not.or", "not.and"}
+# `column.operator.value` within the conditions of `or=(...)` and `and=(...)`
+_CONDITION = re.compile(
+    r"([\w\"-]+(?:->>?[\w\"-]+)*)\.((?:not\.)?[a-z]+)(?:\([^)]*\))?\.(?:\([^)]*\)|[^,()]*)"
+)
+_CONTENT_RANGE = re.compile(r"^(\d+)-(\d+)/")
+
+
+def _operator_only(match: re.Match[str]) -> str:
+    return f"{match.group(1)}.{match.group(2)}"
+
+
+def fingerprint(method: str, path: str, params: Iterable[Tuple[str, str]]) -> str:
+    """A deterministic identifier of the shape of a query.
+
+    It keeps the table, the selected columns and the filter operators, but
+    drops the filter values and the pagination, so that all the queries
+    differing only by their arguments share the same fingerprint.
+
+    Example:
+        ``GET /countries?select=id,name&id=eq.1&limit=10`` becomes
+        ``GET countries limit select=id,name id=eq``.
+    """
+    shape: List[str] = []
+    filters: List[str] = []
+    for key, value in params:
+        name = key.rsplit(".", 1)[-1]
+        if name in _SHAPE_PARAMS:
+            shape.append(f"{key}={''.join(value.split())}")
+        elif name == "order":
+            shape.append(f"{key}={value}")
+        elif name in _PAGING_PARAMS:
+            shape.append(key)
+        elif name in _LOGICAL_OPERATORS or key in _LOGICAL_OPERATORS:
+            filters.append(f"{key}={_CONDITION.sub(_operator_only, value)}")
+        else:
+            operator = value.split(".", 2)
+            negated = operator[0] == "not" and len(operator) > 1
+            op = ".".join(operator[:2]) if negated else operator[0]
+            filters.append(f"{key}={op.split('(', 1)[0]}")
+    table = path.rstrip("/").rsplit("/", 2)
+    name = "/".join(table[-2:]) if len(table) > 1 and table[-2] == "rpc" else table[-1]
+    return " ".join([method, name, *sorted(shape), *sorted(filters)])
+
+
+def rows_from_content_range(content_range: Optional[str]) -> Optional[int]:
+    """The number of rows in a response, from its `Content-Range` header."""
+    if content_range is None:
+        return None
+    if content_range.startswith("*/"):
+        return 0
+    match = _CONTENT_RANGE.match(content_range)
+    if match is None:
+        return None
+    return int(match.group(2)) - int(match.group(1)) + 1
+
+
+class QuerySample(NamedTuple):
+    """Measures of one request, passed to a :class:`QueryObserver`."""
+
+    fingerprint: str
+    latency: float
+    """The time from sending the request to receiving the whole response, in seconds."""
+    bytes: int
+    """The size of the response body."""
+    rows: Optional[int]
+    """The number of rows in the response, when PostgREST reported it."""
+    status_code: int
+
+
+class QueryObserver(Protocol):
+    """Receives the measures of every request sent by a client.
+
+    It is called synchronously after each response, possibly from several
+    threads, so it must be quick and thread safe.
+    """
+
+    def record(self, sample: QuerySample) -> None: ...
+
+
+class Histogram(Protocol):
+    """Distribution of the values recorded for a fingerprint."""
+
+    count: int
+
+    def record(self, value: float) -> None: ...
+
+    def quantile(self, q: float) -> float: ...
+
+
+class LogHistogram:
+    """Histogram with logarithmic buckets, for a bounded relative error.
+
+    Each bucket spans values within `precision` of each other, so the
+    memory used only depends on the range of the values and not on their
+    number, and quantiles are within `precision` of the exact ones.
+    """
+
+    __slots__ = ("precision", "count", "_log_base", "_buckets", "_zeros")
+
+    def __init__(self, precision: float = 0.01) -> None:
+        if not 0 < precision < 1:
+            raise ValueError("precision must be between 0 and 1")
+        self.precision = precision
+        self.count = 0
+        self._log_base = math.log1p(2 * precision)
+        self._buckets: Dict[int, int] = {}
+        self._zeros = 0
+
+    def record(self, value: float) -> None:
+        self.count += 1
+        if value <= 0:
+            self._zeros += 1
+            return
+        index = math.floor(math.log(value) / self._log_base)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        """The value below which falls the `q` fraction of the recorded values."""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                # middle of the bucket, within `precision` of its bounds
+                return math.exp((index + 0.5) * self._log_base)
+        return math.exp((max(self._buckets) + 0.5) * self._log_base)
+
+
+class Percentiles(BaseModel):
+    p50: float
+    p95: float
+    p99: float
+
+
+class QueryStats(BaseModel):
+    """Distribution of the measures of the requests sharing a fingerprint."""
+
+    fingerprint: str
+    count: int
+    errors: int
+    """The number of responses with an error status code."""
+    latency: Percentiles
+    """In seconds."""
+    bytes: Percentiles
+    rows: Percentiles
+    """Only over the responses reporting their number of rows."""
+
+
+def _percentiles(histogram: Histogram) -> Percentiles:
+    return Percentiles(
+        p50=histogram.quantile(0.5),
+        p95=histogram.quantile(0.95),
+        p99=histogram.quantile(0.99),
+    )
+
+
+class _Entry:
+    __slots__ = ("latency", "bytes", "rows", "errors")
+
+    def __init__(self, histogram: Callable[[], Histogram]) -> None:
+        self.latency = histogram()
+        self.bytes = histogram()
+        self.rows = histogram()
+        self.errors = 0
+
+
+class QueryMetrics:
+    """In process :class:`QueryObserver` aggregating the measures per fingerprint.
+
+    Example:
+        .. code-block:: python
+
+            metrics = QueryMetrics()
+            client = AsyncPostgrestClient(url, observer=metrics)
+            ...
+            for stats in metrics.report():
+                print(stats.fingerprint, stats.latency.p99)
+
+    Args:
+        histogram: Creates the histogram of each measure, a
+            :class:`LogHistogram` by default.
+    """
+
+    def __init__(self, histogram: Callable[[], Histogram] = LogHistogram) -> None:
+        self._histogram = histogram
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sample: QuerySample) -> None:
+        with self._lock:
+            entry = self._entries.get(sample.fingerprint)
+            if entry is None:
+                entry = self._entries[sample.fingerprint] = _Entry(self._histogram)
+            entry.latency.record(sample.latency)
+            entry.bytes.record(sample.bytes)
+            if sample.rows is not None:
+                entry.rows.record(sample.rows)
+            if sample.status_code >= 400:
+                entry.errors += 1
+
+    def report(self) -> List[QueryStats]:
+        """The statistics of every fingerprint, the slowest at p95 first."""
+        with self._lock:
+            stats = [
+                QueryStats(
+                    fingerprint=fingerprint,
+                    count=entry.latency.count,
+                    errors=entry.errors,
+                    latency=_percentiles(entry.latency),
+                    bytes=_percentiles(entry.bytes),
+                    rows=_percentiles(entry.rows),
+                )
+                for fingerprint, entry in self._entries.items()
+            ]
+        return sorted(stats, key=lambda s: s.latency.p95, reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Union
+
+from httpx import AsyncClient, Client
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    """Utilization of the connection pool of a client."""
+
+    connections: int
+    """The number of open connections."""
+    idle_connections: int
+    """The open connections not serving any request."""
+    queued_requests: int
+    """The requests waiting for a connection to become available."""
+    requests: int
+    """The number of requests sent since the client was created."""
+    total_wait: float
+    """The time requests spent before being sent, in seconds. It includes
+    waiting for a free connection, and opening one when needed."""
+    max_wait: float
+    """The longest time a request spent before being sent, in seconds."""
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0.0
+
+
+class PoolMonitor:
+    """Accumulates the time requests wait before being sent."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def stats(self, session: Union[AsyncClient, Client]) -> PoolStats:
+        # httpx doesn't expose its connection pool, which is only found on
+        # its default transport; other transports report no connections
+        pool: Any = getattr(getattr(session, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        requests = list(getattr(pool, "_requests", []))
+        with self._lock:
+            return PoolStats(
+                connections=len(connections),
+                idle_connections=sum(1 for c in connections if c.is_idle()),
+                queued_requests=sum(1 for r in requests if r.is_queued()),
+                requests=self.requests,
+                total_wait=self.total_wait,
+                max_wait=self.max_wait,
+            )
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Generic,
+    Mapping,
+    Optional,
+    Tuple,
+    overload,
+)
+from urllib.parse import quote_plus
+
+from httpx import AsyncClient, Client, Headers
+from httpx import Response as RequestResponse
+
+if TYPE_CHECKING:
+    from .metrics import QueryObserver
+
+from .base_request_builder import C, ParamList, RequestConfig, _observe
+from .utils import Param, sanitize_param
+
+# A bound name percent encoded in the query string, see `Param.__str__`,
+# followed by `%01` when the builder sanitizes the value, see `sanitize_param`.
+_PLACEHOLDER = re.compile(r"%00([A-Za-z_][A-Za-z0-9_]*)(%01)?%00")
+# The same placeholder in a param value, before it is encoded.
+_RAW_PLACEHOLDER = re.compile("\x00([A-Za-z_][A-Za-z0-9_]*)(\x01)?\x00")
+
+
+class QueryTemplate(Generic[C]):
+    """A request compiled once, where only the bound values change.
+
+    The query string is encoded a single time and split around the
+    placeholders, so executing the query only has to encode the bound
+    values and join the pieces back together. Values bound where the
+    builder method quotes its input, like the items of `in_`, are quoted
+    the same way.
+
+    The response cache, single flight, smart count and explain sampling of
+    the client need the request itself: when one of them is configured,
+    `request` holds the compiled request and :meth:`bind` copies it with the
+    values bound, to be executed like a chained query.
+    """
+
+    def __init__(self, request: RequestConfig[C]) -> None:
+        self.session: C = request.session
+        self.http_method = request.http_method
+        self.headers = Headers(request.headers)
+        self.auth = request.auth
+        self.skip_validation = request.skip_validation
+        self.row_model = request.row_model
+        self.observer = request.observer
+        self.fingerprint = request.fingerprint()
+        self.content: Optional[bytes] = None
+        if request.json is not None:
+            # same encoding httpx uses for `json=`, done once instead of per request
+            self.content = json.dumps(
+                request.json, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+            ).encode("utf-8")
+            self.headers["Content-Type"] = "application/json"
+
+        parts = _PLACEHOLDER.split(str(request.params))
+        path = str(request.path)
+        parts[0] = f"{path}?{parts[0]}" if parts != [""] else path
+        self._literals: Tuple[str, ...] = tuple(parts[0::3])
+        self._names: Tuple[str, ...] = tuple(parts[1::3])
+        self._sanitized: Tuple[bool, ...] = tuple(bool(flag) for flag in parts[2::3])
+        self.names = frozenset(self._names)
+
+        self.request: Optional[RequestConfig[C]] = None
+        if (
+            request.cache is not None
+            or request.single_flight is not None
+            or request.smart_count is not None
+            or request.explain_sampler is not None
+        ):
+            self.request = request.with_params(request.params.copy())
+
+    def _check(self, values: Mapping[str, Any]) -> None:
+        if values.keys() != self.names:
+            missing = sorted(self.names - values.keys())
+            unknown = sorted(values.keys() - self.names)
+            raise ValueError(
+                f"Parameters do not match the query, missing: {missing}, unknown: {unknown}"
+            )
+
+    def bind(self, values: Mapping[str, Any]) -> RequestConfig[C]:
+        """Copy of :attr:`request` with `values` bound to the placeholders."""
+        if self.request is None:
+            raise ValueError("The query is sent from its template, see `send`")
+        self._check(values)
+
+        def value(match: re.Match[str]) -> str:
+            bound = values[match[1]]
+            return sanitize_param(bound) if match[2] else str(bound)
+
+        params = ParamList(
+            [
+                (key, _RAW_PLACEHOLDER.sub(value, param))
+                for key, param in self.request.params.multi_items()
+            ]
+        )
+        return self.request.with_params(params)
+
+    def url(self, values: Mapping[str, Any]) -> str:
+        """The URL of the request, with `values` bound to the placeholders."""
+        self._check(values)
+        literals = self._literals
+        if not self._names:
+            return literals[0]
+        pieces = [literals[0]]
+        for name, sanitized, literal in zip(self._names, self._sanitized, literals[1:]):
+            value = values[name]
+            pieces.append(
+                quote_plus(sanitize_param(value) if sanitized else str(value))
+            )
+            pieces.append(literal)
+        return "".join(pieces)
+
+    @overload
+    def send(
+        self: QueryTemplate[Client], values: Mapping[str, Any]
+    ) -> RequestResponse: ...
+    @overload
+    def send(
+        self: QueryTemplate[AsyncClient], values: Mapping[str, Any]
+    ) -> Awaitable[RequestResponse]: ...
+
+    def send(self: QueryTemplate[C], values: Mapping[str, Any]):
+        url = self.url(values)
+        if self.observer is None:
+            return self._request(url)
+        if isinstance(self.session, AsyncClient):
+            return self._send_observed_async(self.observer, url)
+        return self._send_observed(self.observer, url)
+
+    def _request(self, url: str):
+        return self.session.request(
+            self.http_method,
+            url,
+            content=self.content,
+            headers=self.headers,
+            auth=self.auth,
+        )
+
+    def _send_observed(
+        self: QueryTemplate[Client], observer: QueryObserver, url: str
+    ) -> RequestResponse:
+        start = time.perf_counter()
+        r: RequestResponse = self._request(url)
+        _observe(observer, self.fingerprint, time.perf_counter() - start, r)
+        return r
+
+    async def _send_observed_async(
+        self: QueryTemplate[AsyncClient], observer: QueryObserver, url: str
+    ) -> RequestResponse:
+        start = time.perf_counter()
+        r: RequestResponse = await self._request(url)
+        _observe(observer, self.fingerprint, time.perf_counter() - start, r)
+        return r
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import re
+from json import JSONDecodeError, JSONDecoder
+from typing import Dict, List, Optional
+
+from .types import JSON
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+_CSV_SPECIAL = re.compile(r'["\n]')
+
+
+class JSONArrayStreamDecoder:
+    """Incrementally decodes the elements of a top level JSON array.
+
+    Chunks of the response body are passed to :meth:`feed` as they arrive,
+    and every element that has been fully received is returned right away,
+    so only the element currently being received is kept in memory.
+    """
+
+    def __init__(self) -> None:
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self._done = False
+        self._expect_value = True
+        self._count = 0
+        # Length the buffer has to reach before an incomplete element is
+        # decoded again, so that big elements are not rescanned on every chunk.
+        self._retry_at = 0
+
+    def feed(self, chunk: bytes) -> List[JSON]:
+        """Feed a chunk of the body and return the elements it completed."""
+        self._buffer += self._text.decode(chunk)
+        if len(self._buffer) < self._retry_at:
+            return []
+        return self._drain(final=False)
+
+    def close(self) -> List[JSON]:
+        """Signal the end of the body and return the remaining elements.
+
+        An empty body, as sent for a HEAD request, holds no elements.
+
+        Raises:
+            :class:`json.JSONDecodeError` If the body is not a complete JSON array.
+        """
+        self._buffer += self._text.decode(b"", final=True)
+        rows = self._drain(final=True)
+        if not self._started and not self._buffer.strip(_WHITESPACE):
+            return rows
+        if not self._done:
+            raise JSONDecodeError("Unterminated JSON array", self._buffer, 0)
+        return rows
+
+    def _drain(self, final: bool) -> List[JSON]:
+        rows: List[JSON] = []
+        buffer = self._buffer
+        end = len(buffer)
+        pos = 0
+        self._retry_at = 0
+        while not self._done:
+            while pos < end and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == end:
+                break
+            char = buffer[pos]
+            if not self._started:
+                if char != "[":
+                    raise JSONDecodeError("Expecting '['", buffer, pos)
+                self._started = True
+                pos += 1
+            elif self._expect_value and not (char == "]" and self._count == 0):
+                try:
+                    row, value_end = self._decoder.raw_decode(buffer, pos)
+                except JSONDecodeError:
+                    if final:
+                        raise
+                    self._retry_at = 2 * (end - pos)
+                    break
+                if not final and (
+                    value_end == end or buffer[value_end] not in _DELIMITERS
+                ):
+                    # a number like `1.5e3` might have been cut off after `1.5`
+                    break
+                rows.append(row)
+                self._count += 1
+                self._expect_value = False
+                pos = value_end
+            elif char == "]":
+                self._done = True
+                pos += 1
+            elif char == "," and not self._expect_value:
+                self._expect_value = True
+                pos += 1
+            else:
+                raise JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+        self._buffer = buffer[pos:]
+        return rows
+
+
+class CSVStreamDecoder:
+    """Incrementally decodes a CSV body into rows keyed by the header.
+
+    Chunks of the response body are passed to :meth:`feed` as they arrive,
+    and every record that has been fully received is returned right away.
+    A newline only ends a record outside of a quoted field, so the decoder
+    tracks whether the end of the buffer is within quotes, and never scans
+    the same characters twice.
+    """
+
+    def __init__(self) -> None:
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        # length of the buffer already scanned for the end of a record
+        self._scanned = 0
+        self._in_quotes = False
+        self._columns: Optional[List[str]] = None
+
+    @property
+    def columns(self) -> Optional[List[str]]:
+        """The header of the CSV body, once it has been received."""
+        return self._columns
+
+    def feed(self, chunk: bytes) -> List[Dict[str, str]]:
+        """Feed a chunk of the body and return the rows it completed."""
+        self._buffer += self._text.decode(chunk)
+        buffer = self._buffer
+        in_quotes = self._in_quotes
+        end = 0
+        for match in _CSV_SPECIAL.finditer(buffer, self._scanned):
+            if match.group() == '"':
+                # an escaped quote `""` toggles twice
+                in_quotes = not in_quotes
+            elif not in_quotes:
+                end = match.end()
+        self._in_quotes = in_quotes
+        self._scanned = len(buffer) - end
+        if not end:
+            return []
+        self._buffer = buffer[end:]
+        return self._parse(buffer[:end])
+
+    def close(self) -> List[Dict[str, str]]:
+        """Signal the end of the body and return the remaining rows.
+
+        Raises:
+            :class:`csv.Error` If the body ends within a quoted field.
+        """
+        self._buffer += self._text.decode(b"", final=True)
+        records, self._buffer, self._scanned = self._buffer, "", 0
+        if self._in_quotes:
+            raise csv.Error("Unterminated quoted field at the end of the CSV body")
+        return self._parse(records) if records else []
+
+    def _parse(self, records: str) -> List[Dict[str, str]]:
+        reader = csv.reader(io.StringIO(records, newline=""))
+        if self._columns is None:
+            self._columns = next(reader, None)
+        columns = self._columns
+        if columns is None:
+            return []
+        return [dict(zip(columns, record)) for record in reader if record]
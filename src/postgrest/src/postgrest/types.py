@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import sys
 from collections.abc import Mapping, Sequence
-from typing import Union
+from functools import cache
+from typing import Any, Union
 
 from httpx import AsyncClient, BasicAuth, Client, Headers, QueryParams
 from pydantic import TypeAdapter
@@ -18,7 +19,19 @@ else:
 JSON = TypeAliasType(
     "JSON", "Union[None, bool, str, int, float, Sequence[JSON], Mapping[str, JSON]]"
 )
-JSONAdapter: TypeAdapter = TypeAdapter(JSON)
+
+
+@cache
+def json_adapter() -> TypeAdapter[Any]:
+    """The validator of JSON values, built on first use since it is costly."""
+    return TypeAdapter(JSON)
+
+
+def __getattr__(name: str) -> Any:
+    # `JSONAdapter` used to be built at import time
+    if name == "JSONAdapter":
+        return json_adapter()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class CountMethod(StrEnum):
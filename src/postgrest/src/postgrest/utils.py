@@ -1,16 +1,28 @@
 from __future__ import annotations
 
-from typing import Any, Type, TypeVar, cast, get_origin
+from functools import cache, partial
+from typing import Any, Callable, List, Type, TypeVar, Union, cast, get_origin
 from urllib.parse import urlparse
 
 from deprecation import deprecated
 from httpx import AsyncClient  # noqa: F401
 from httpx import Client as BaseClient  # noqa: F401
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from yarl import URL
 
 from .version import __version__
 
+try:
+    # optional, but much faster at decoding big responses
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads  # type: ignore
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # type: ignore
+
 
 class SyncClient(BaseClient):
     @deprecated(
@@ -29,7 +41,39 @@ class SyncClient(BaseClient):
         self.close()
 
 
+class Param:
+    """Placeholder for a value bound when a prepared query is executed.
+
+    It can be used anywhere a builder method takes a filter value or a
+    modifier argument, each placeholder standing for a single value.
+
+    Example:
+        .. code-block:: python
+
+            by_id = client.from_("countries").select("*").eq("id", Param("id")).prepare()
+            response = await by_id.execute(id=42)
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str) -> None:
+        if not (name.isidentifier() and name.isascii()):
+            raise ValueError(f"Invalid parameter name: {name!r}")
+        self.name = name
+
+    def __str__(self) -> str:
+        # NUL can't appear in a query string, so its encoded form `%00`
+        # unambiguously marks the placeholder once the query is compiled.
+        return f"\x00{self.name}\x00"
+
+    def __repr__(self) -> str:
+        return f"Param({self.name!r})"
+
+
 def sanitize_param(param: Any) -> str:
+    if isinstance(param, Param):
+        # the bound value is sanitized instead, see `QueryTemplate.url`
+        return f"\x00{param.name}\x01\x00"
     param_str = str(param)
     reserved_chars = ",:()"
     if any(char in param_str for char in reserved_chars):
@@ -57,3 +101,40 @@ def model_validate_json(model: Type[TBaseModel], contents) -> TBaseModel:
     except AttributeError:
         # pydantic < 2
         return model.parse_raw(contents)
+
+
+@cache
+def typed_json_decoder(model: type, many: bool) -> Callable[[bytes], Any]:
+    """Decoder of a JSON document into instances of `model`, in a single pass.
+
+    msgspec Structs are decoded with msgspec, anything else pydantic supports
+    (models, dataclasses, TypedDicts...) with a :class:`pydantic.TypeAdapter`.
+    Decoders are cached, since building them is much more expensive than
+    decoding a typical response.
+    """
+    target: Any = List[model] if many else model  # type: ignore[valid-type]
+    if _is_struct(model):
+        return msgspec.json.Decoder(target).decode
+    return TypeAdapter(target).validate_json
+
+
+@cache
+def typed_rows_converter(model: type) -> Callable[[List[Any]], List[Any]]:
+    """Converter of already decoded rows into instances of `model`.
+
+    The counterpart of :func:`typed_json_decoder` for the rows of a stream,
+    which are decoded as they are received.
+    """
+    target: Any = List[model]  # type: ignore[valid-type]
+    if _is_struct(model):
+        return partial(msgspec.convert, type=target)
+    return TypeAdapter(target).validate_python
+
+
+def _is_struct(model: Any) -> bool:
+    # `model` may also be a typing construct like `Union[...]`, not a class
+    return (
+        msgspec is not None
+        and isinstance(model, type)
+        and issubclass(model, msgspec.Struct)
+    )
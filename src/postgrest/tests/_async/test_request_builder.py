@@ -1,13 +1,43 @@
-from typing import Any, AsyncIterable, Dict, List
+import io
+import json
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Union,
+)
 
 import pytest
-from httpx import AsyncClient, Headers, QueryParams, Request, Response
+from httpx import AsyncClient, Headers, MockTransport, QueryParams, Request, Response
+from pydantic import BaseModel
 from yarl import URL
 
-from postgrest import AsyncRequestBuilder, AsyncSingleRequestBuilder
+from postgrest import (
+    APIError,
+    AsyncRequestBuilder,
+    AsyncSingleRequestBuilder,
+    Param,
+    ResponseCache,
+)
+from postgrest._async import request_builder as request_builder_module
 from postgrest._async.request_builder import RequestConfig
-from postgrest.base_request_builder import APIResponse, SingleAPIResponse
-from postgrest.types import JSON, CountMethod
+from postgrest.base_request_builder import (
+    APIResponse,
+    RowChunker,
+    SingleAPIResponse,
+    UpdateChunker,
+)
+from postgrest.cache import CountCache
+from postgrest.concurrency import AsyncExecutor, AsyncSingleFlight
+from postgrest.types import JSON, CountMethod, ReturnMethod
+from postgrest.utils import typed_json_decoder
 
 
 @pytest.fixture
@@ -16,6 +46,27 @@ async def request_builder() -> AsyncIterable[AsyncRequestBuilder]:
         yield AsyncRequestBuilder(client, URL("/example_table"), Headers(), None)
 
 
+Handler = Callable[[Request], Any]
+MakeBuilder = Callable[..., AsyncRequestBuilder]
+
+
+@pytest.fixture
+async def make_builder() -> AsyncIterator[MakeBuilder]:
+    """Request builders answered by `handler`, their clients closed after the test."""
+    async with AsyncExitStack() as stack:
+
+        def make(handler: Handler, **kwargs: Any) -> AsyncRequestBuilder:
+            client = AsyncClient(
+                base_url="http://example.com", transport=MockTransport(handler)
+            )
+            stack.push_async_exit(client)
+            return AsyncRequestBuilder(
+                client, URL("/example_table"), Headers(), None, **kwargs
+            )
+
+        yield make
+
+
 def test_constructor(request_builder):
     assert str(request_builder.path) == "/example_table"
 
@@ -52,6 +103,25 @@ class TestSelect:
         assert isinstance(builder, AsyncSingleRequestBuilder)
 
 
+class TestSkipValidation:
+    def test_per_query(self, request_builder: AsyncRequestBuilder):
+        builder = request_builder.select("*").skip_validation().eq("id", 1)
+        assert builder.request.skip_validation is True
+        assert builder.request.params["id"] == "eq.1"
+
+    def test_off_by_default(self, request_builder: AsyncRequestBuilder):
+        assert request_builder.select("*").request.skip_validation is False
+        assert request_builder.insert({}).request.skip_validation is False
+
+    async def test_per_builder(self):
+        async with AsyncClient() as client:
+            builder = AsyncRequestBuilder(
+                client, URL("/example_table"), Headers(), None, skip_validation=True
+            )
+            assert builder.select("*").request.skip_validation is True
+            assert builder.delete().request.skip_validation is True
+
+
 class TestInsert:
     def test_insert(self, request_builder: AsyncRequestBuilder):
         builder = request_builder.insert({"key1": "val1"})
@@ -281,6 +351,996 @@ class TestRange:
         assert builder.request.params[f"{foreign_table}.offset"] == "1"
 
 
+def streaming_handler(chunks: List[bytes], status_code: int = 200) -> Handler:
+    async def body():
+        for chunk in chunks:  # noqa: UP028
+            yield chunk
+
+    def handler(request: Request) -> Response:
+        return Response(status_code, content=body())
+
+    return handler
+
+
+class TestExecuteStream:
+    async def test_rows_split_across_chunks(self, make_builder: MakeBuilder):
+        builder = make_builder(
+            streaming_handler(
+                [b'[{"id": 1, "na', b'me": "\xc3', b'\xa9"},', b' {"id": 2', b"3}]"]
+            )
+        )
+        rows = [row async for row in builder.select("*").execute_stream()]
+        assert rows == [{"id": 1, "name": "é"}, {"id": 23}]
+
+    async def test_batches(self, make_builder: MakeBuilder):
+        body = b"[" + b",".join(b'{"id": %d}' % i for i in range(5)) + b"]"
+        builder = make_builder(streaming_handler([body[:20], body[20:]]))
+        batches = [
+            batch async for batch in builder.select("*").execute_stream_batches(2)
+        ]
+        assert batches == [
+            [{"id": 0}, {"id": 1}],
+            [{"id": 2}, {"id": 3}],
+            [{"id": 4}],
+        ]
+
+    async def test_empty_result(self, make_builder: MakeBuilder):
+        builder = make_builder(streaming_handler([b"[", b"]"]))
+        rows = [row async for row in builder.select("*").execute_stream()]
+        assert rows == []
+
+    async def test_head(self, make_builder: MakeBuilder):
+        builder = make_builder(streaming_handler([]))
+        rows = [row async for row in builder.select("*", head=True).execute_stream()]
+        assert rows == []
+
+    async def test_api_error(self, make_builder: MakeBuilder):
+        builder = make_builder(
+            streaming_handler(
+                [
+                    b'{"message": "permission denied", "code": "42501",',
+                    b' "hint": null, "details": null}',
+                ],
+                status_code=401,
+            )
+        )
+        with pytest.raises(APIError) as exc_info:
+            async for _ in builder.select("*").execute_stream():
+                pass
+        assert exc_info.value.code == "42501"
+
+
+class TestExecuteCSVStream:
+    async def test_rows(self, make_builder: MakeBuilder):
+        builder = make_builder(
+            streaming_handler(
+                [b'id,name\n1,"a\nb"\n2,', b'"say ""hi"""\n3,\xc3', b"\xa9\n"]
+            )
+        )
+        rows = [row async for row in builder.select("*").execute_csv_stream()]
+        assert rows == [
+            {"id": "1", "name": "a\nb"},
+            {"id": "2", "name": 'say "hi"'},
+            {"id": "3", "name": "é"},
+        ]
+
+    async def test_raw_chunks(self, make_builder: MakeBuilder):
+        chunks = [b"id\n1\n", b"2\n"]
+        builder = make_builder(streaming_handler(chunks))
+        received = [
+            chunk async for chunk in builder.select("*").execute_csv_stream(raw=True)
+        ]
+        assert b"".join(received) == b"id\n1\n2\n"
+
+    async def test_to_file(self, tmp_path: Path, make_builder: MakeBuilder):
+        builder = make_builder(streaming_handler([b"id,name\n", b"1,a\n"]))
+        path = tmp_path / "out.csv"
+        assert await builder.select("*").csv_to_file(path) == 12
+        assert path.read_bytes() == b"id,name\n1,a\n"
+
+        builder = make_builder(streaming_handler([b"id\n", b"1\n"]))
+        buffer = io.BytesIO()
+        await builder.select("*").csv_to_file(buffer)
+        assert buffer.getvalue() == b"id\n1\n"
+
+    async def test_api_error(self, make_builder: MakeBuilder):
+        builder = make_builder(
+            streaming_handler(
+                [
+                    b'{"message": "denied", "code": "42501", "hint": null, "details": null}'
+                ],
+                status_code=401,
+            )
+        )
+        with pytest.raises(APIError):
+            async for _ in builder.select("*").execute_csv_stream():
+                pass
+
+
+class TestColumnar:
+    async def test_columns(self, make_builder: MakeBuilder):
+        builder = make_builder(
+            streaming_handler(
+                [b'[{"id": 1, "name": "a"}, {"id"', b': 2, "name": null}]']
+            )
+        )
+        columns = await builder.select("id, name").execute_columnar()
+        assert columns == {"id": [1, 2], "name": ["a", None]}
+
+    async def test_empty_result(self, make_builder: MakeBuilder):
+        builder = make_builder(streaming_handler([b"[]"]))
+        assert await builder.select("*").execute_columnar() == {}
+
+    async def test_to_arrow(self, make_builder: MakeBuilder):
+        pytest.importorskip("pyarrow")
+        requests: List[Request] = []
+        builder = make_builder(recording_handler(requests, b"id,name\n1,a\n2,\n"))
+        table = await builder.select("id, name").to_arrow()
+        assert requests[0].headers["accept"] == "text/csv"
+        assert table.to_pydict() == {"id": [1, 2], "name": ["a", None]}
+
+    async def test_to_arrow_keeps_the_query(
+        self, make_builder: MakeBuilder, monkeypatch: pytest.MonkeyPatch
+    ):
+        pytest.importorskip("pyarrow")
+        monkeypatch.setattr(request_builder_module, "_SPOOL_MAX_BYTES", 4)
+        requests: List[Request] = []
+        builder = make_builder(
+            recording_handler(requests, b"id,name\n1,a\n2,b\n")
+        ).select("id, name")
+        table = await builder.to_arrow()
+        assert table.to_pydict() == {"id": [1, 2], "name": ["a", "b"]}
+        assert "accept" not in builder.request.headers
+        await builder.csv_to_file(io.BytesIO())
+        assert "accept" not in builder.request.headers
+
+
+def table_handler(rows: List[Dict[str, Any]], requests: List[Request]) -> Handler:
+    def handler(request: Request) -> Response:
+        requests.append(request)
+        params = request.url.params
+        page = sorted(
+            rows, key=lambda row: row["id"], reverse="desc" in params["order"]
+        )
+        if "id" in params:
+            operator, value = params["id"].split(".")
+            if operator == "gt":
+                page = [row for row in page if row["id"] > int(value)]
+            else:
+                page = [row for row in page if row["id"] < int(value)]
+        return Response(200, json=page[: int(params["limit"])])
+
+    return handler
+
+
+class TestPaginate:
+    @pytest.mark.parametrize("prefetch", [False, True])
+    async def test_walks_all_pages(self, prefetch: bool, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        rows = [{"id": i} for i in range(7)]
+        builder = make_builder(table_handler(rows, requests))
+        pages = [
+            page.data
+            async for page in builder.select("id").paginate(
+                "id", page_size=3, prefetch=prefetch
+            )
+        ]
+        assert pages == [rows[0:3], rows[3:6], rows[6:7]]
+        assert [str(r.url.params) for r in requests] == [
+            "select=id&order=id.asc&limit=3",
+            "select=id&order=id.asc&limit=3&id=gt.2",
+            "select=id&order=id.asc&limit=3&id=gt.5",
+        ]
+
+    async def test_descending(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(table_handler([{"id": i} for i in range(4)], requests))
+        pages = [
+            page.data
+            async for page in builder.select("id").paginate(
+                "id", page_size=2, desc=True
+            )
+        ]
+        assert pages == [[{"id": 3}, {"id": 2}], [{"id": 1}, {"id": 0}]]
+        assert requests[-1].url.params["id"] == "lt.0"
+
+    async def test_rejects_offset_pagination(
+        self, request_builder: AsyncRequestBuilder
+    ):
+        with pytest.raises(ValueError):
+            async for _ in request_builder.select("id").range(0, 10).paginate("id"):
+                pass
+
+
+def range_handler(
+    rows: List[Dict[str, Any]],
+    requests: List[Request],
+    fail_after: Optional[int] = None,
+) -> Handler:
+    operators = {
+        "gt": lambda a, b: a > b,
+        "gte": lambda a, b: a >= b,
+        "lt": lambda a, b: a < b,
+    }
+
+    def handler(request: Request) -> Response:
+        requests.append(request)
+        params = request.url.params
+        if fail_after is not None and len(requests) > fail_after:
+            return Response(
+                503,
+                json={"message": "busy", "code": "503", "hint": None, "details": None},
+            )
+        order = params["order"]
+        page = sorted(rows, key=lambda row: row["id"], reverse=".desc" in order)
+        for condition in params.get_list("id"):
+            operator, value = condition.split(".")
+            page = [row for row in page if operators[operator](row["id"], int(value))]
+        columns = params["select"].split(",")
+        if columns != ["*"]:
+            page = [{c: row[c] for c in columns} for row in page]
+        return Response(200, json=page[: int(params["limit"])])
+
+    return handler
+
+
+def read_jsonl(paths: List[Path]) -> List[Any]:
+    return [json.loads(line) for path in paths for line in path.open()]
+
+
+class TestExport:
+    async def test_splits_key_range(self, tmp_path: Path, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        rows = [{"id": i, "name": f"n{i}"} for i in range(10, 110)]
+        builder = make_builder(range_handler(rows, requests))
+        result = await builder.select("*").export(
+            tmp_path, partitions=4, concurrency=2, page_size=10
+        )
+        assert [str(r.url.params) for r in requests[:2]] == [
+            "select=id&order=id.asc.nullslast&limit=1",
+            "select=id&order=id.desc.nullslast&limit=1",
+        ]
+        assert [(p.lower, p.upper) for p in result.partitions] == [
+            (None, 35),
+            (35, 60),
+            (60, 85),
+            (85, None),
+        ]
+        assert [p.rows for p in result.partitions] == [25, 25, 25, 25]
+        assert result.rows == 100
+        assert [f.name for f in result.files] == [
+            f"part-0000{i}.jsonl" for i in range(4)
+        ]
+        assert read_jsonl(result.files) == rows
+        assert not (tmp_path / "_checkpoint.json").exists()
+
+    async def test_explicit_boundaries_to_csv(
+        self, tmp_path: Path, make_builder: MakeBuilder
+    ):
+        requests: List[Request] = []
+        rows = [{"id": i, "tags": [i]} for i in range(6)]
+        builder = make_builder(range_handler(rows, requests))
+        result = await builder.select("*").export(
+            tmp_path, boundaries=[3], format="csv"
+        )
+        assert [f.read_text() for f in result.files] == [
+            "id,tags\n0,[0]\n1,[1]\n2,[2]\n",
+            "id,tags\n3,[3]\n4,[4]\n5,[5]\n",
+        ]
+        assert {str(r.url.params) for r in requests} == {
+            "select=%2A&id=lt.3&order=id.asc&limit=10000",
+            "select=%2A&id=gte.3&order=id.asc&limit=10000",
+        }
+
+    async def test_to_parquet(self, tmp_path: Path, make_builder: MakeBuilder):
+        pq = pytest.importorskip("pyarrow.parquet")
+        rows = [{"id": i, "name": f"n{i}"} for i in range(5)]
+        builder = make_builder(range_handler(rows, []))
+        result = await builder.select("*").export(
+            tmp_path, partitions=2, page_size=2, format="parquet"
+        )
+        tables = [pq.read_table(f).to_pylist() for f in result.files]
+        assert tables == [rows[:3], rows[3:]]
+
+    async def test_empty_table(self, tmp_path: Path, make_builder: MakeBuilder):
+        builder = make_builder(range_handler([], []))
+        result = await builder.select("*").export(tmp_path)
+        assert result.rows == 0
+        assert len(result.partitions) == 1
+
+    async def test_resumes_from_checkpoint(
+        self, tmp_path: Path, make_builder: MakeBuilder
+    ):
+        requests: List[Request] = []
+        rows = [{"id": i} for i in range(20)]
+        builder = make_builder(range_handler(rows, requests, fail_after=5))
+        with pytest.raises(APIError):
+            await builder.select("id").export(
+                tmp_path, boundaries=[10], concurrency=1, page_size=3
+            )
+        checkpoint = json.loads((tmp_path / "_checkpoint.json").read_text())
+        assert [p["last_key"] for p in checkpoint["partitions"]] == [9, 12]
+
+        requests.clear()
+        builder = make_builder(range_handler(rows, requests))
+        result = await builder.select("id").export(
+            tmp_path, boundaries=[10], concurrency=1, page_size=3
+        )
+        assert read_jsonl(result.files) == rows
+        assert [p.rows for p in result.partitions] == [10, 10]
+        assert str(requests[0].url.params) == (
+            "select=id&id=gt.12&order=id.asc&limit=3"
+        )
+
+    async def test_rejects_other_checkpoint(
+        self, tmp_path: Path, make_builder: MakeBuilder
+    ):
+        builder = make_builder(range_handler([{"id": 1}], []))
+        (tmp_path / "_checkpoint.json").write_text(
+            json.dumps({"key": "created_at", "format": "jsonl", "partitions": []})
+        )
+        with pytest.raises(ValueError):
+            await builder.select("*").export(tmp_path)
+
+
+def bulk_handler(requests: List[Request]) -> Handler:
+    def handler(request: Request) -> Response:
+        requests.append(request)
+        rows = json.loads(request.content)
+        if any(row.get("fail") for row in rows):
+            return Response(400, json={"message": "bad row", "code": "22P02"})
+        return Response(
+            201,
+            headers={"content-range": f"*/{len(rows)}"},
+            json=rows if "return=representation" in request.headers["prefer"] else [],
+        )
+
+    return handler
+
+
+class Country(BaseModel):
+    id: int
+    name: str
+
+
+@dataclass
+class City:
+    id: int
+    name: str
+
+
+def json_handler(body: bytes) -> Handler:
+    def handler(request: Request) -> Response:
+        return Response(200, content=body)
+
+    return handler
+
+
+def recording_handler(requests: List[Request], body: bytes = b"[]") -> Handler:
+    def handler(request: Request) -> Response:
+        requests.append(request)
+        return Response(200, content=body)
+
+    return handler
+
+
+class TestPrepare:
+    async def test_same_request_as_builder(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(recording_handler(requests))
+        prepared = (
+            builder.select("id, name")
+            .eq("name", Param("name"))
+            .gte("id", Param("min_id"))
+            .limit(10)
+            .prepare()
+        )
+        await prepared.execute(name="a b&c=ä", min_id=3)
+        await prepared.execute(name="x", min_id=0)
+        await (
+            builder.select("id, name").eq("name", "a b&c=ä").gte("id", 3).limit(10)
+        ).execute()
+        assert requests[0].url == requests[2].url
+        assert requests[1].url.params["name"] == "eq.x"
+        assert requests[1].url.params["id"] == "gte.0"
+
+    @pytest.mark.parametrize("value", ["a,b", "f(x)", 'say "hi"', "a:b", "plain"])
+    async def test_values_sanitized_as_builder(
+        self, value: str, make_builder: MakeBuilder
+    ):
+        requests: List[Request] = []
+        builder = make_builder(recording_handler(requests))
+        prepared = (
+            builder.select("*")
+            .in_("name", [Param("name"), "other"])
+            .eq("note", Param("note"))
+            .prepare()
+        )
+        await prepared.execute(name=value, note=value)
+        await (
+            builder.select("*").in_("name", [value, "other"]).eq("note", value)
+        ).execute()
+        assert requests[0].url == requests[1].url
+
+    async def test_single(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(recording_handler(requests, b'{"id": 1}'))
+        prepared = builder.select("*").eq("id", Param("id")).single().prepare()
+        response = await prepared.execute(id=1)
+        assert response.data == {"id": 1}
+        assert requests[0].headers["accept"] == "application/vnd.pgrst.object+json"
+
+    async def test_json_body(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(recording_handler(requests))
+        prepared = builder.update({"done": True}).eq("id", Param("id")).prepare()
+        await prepared.execute(id=7)
+        assert requests[0].method == "PATCH"
+        assert json.loads(requests[0].content) == {"done": True}
+        assert requests[0].url.params["id"] == "eq.7"
+
+    async def test_through_the_cache(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(cached_handler(requests), cache=ResponseCache())
+        prepared = builder.select("*").in_("name", [Param("name")]).prepare()
+        first = await prepared.execute(name="a,b")
+        again = await prepared.execute(name="a,b")
+        await prepared.execute(name="c")
+        assert again.data == first.data
+        assert [r.url.params["name"] for r in requests] == ['in.("a,b")', "in.(c)"]
+
+    async def test_smart_count(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(
+            counting_handler(requests, estimate=10, exact=2), count_cache=CountCache()
+        )
+        prepared = (
+            builder.select("*").eq("id", Param("id")).smart_count().limit(2).prepare()
+        )
+        response = await prepared.execute(id=1)
+        assert response.count == 2
+        assert response.count_method == CountMethod.exact
+        assert [r.url.params["id"] for r in requests] == ["eq.1", "eq.1"]
+
+    async def test_mismatched_params(self, request_builder: AsyncRequestBuilder):
+        prepared = request_builder.select("*").eq("id", Param("id")).prepare()
+        with pytest.raises(ValueError):
+            await prepared.execute()
+        with pytest.raises(ValueError):
+            await prepared.execute(id=1, name="a")
+
+    def test_invalid_param_name(self):
+        with pytest.raises(ValueError):
+            Param("not a name")
+
+
+def cached_handler(requests: List[Request], etag: Optional[str] = None) -> Handler:
+    def handler(request: Request) -> Response:
+        requests.append(request)
+        if etag is not None and request.headers.get("if-none-match") == etag:
+            return Response(304)
+        headers = {"ETag": etag} if etag is not None else {}
+        return Response(200, headers=headers, json=[{"id": len(requests)}])
+
+    return handler
+
+
+class TestResponseCache:
+    async def test_repeated_query_hits_cache(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        cache = ResponseCache()
+        builder = make_builder(cached_handler(requests), cache=cache)
+        first = await builder.select("*").eq("id", 1).execute()
+        second = await builder.select("*").eq("id", 1).execute()
+        other = await builder.select("*").eq("id", 2).execute()
+        assert first.data == second.data == [{"id": 1}]
+        assert other.data == [{"id": 2}]
+        assert len(requests) == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    async def test_vary_on_headers(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(cached_handler(requests), cache=ResponseCache())
+        await builder.select("*").execute()
+        builder.headers["Authorization"] = "Bearer other-user"
+        await builder.select("*").execute()
+        assert len(requests) == 2
+
+    async def test_revalidates_with_etag(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(
+            cached_handler(requests, etag='"v1"'), cache=ResponseCache(ttl=0)
+        )
+        first = await builder.select("*").execute()
+        second = await builder.select("*").execute()
+        assert first.data == second.data == [{"id": 1}]
+        assert requests[1].headers["if-none-match"] == '"v1"'
+
+    async def test_expired_without_validator(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(cached_handler(requests), cache=ResponseCache(ttl=0))
+        await builder.select("*").execute()
+        response = await builder.select("*").execute()
+        assert response.data == [{"id": 2}]
+        assert "if-none-match" not in requests[1].headers
+
+    async def test_write_invalidates_table(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        cache = ResponseCache()
+        builder = make_builder(cached_handler(requests), cache=cache)
+        await builder.select("*").execute()
+        await builder.delete().eq("id", 1).execute()
+        assert len(cache) == 0
+        response = await builder.select("*").execute()
+        assert response.data == [{"id": 3}]
+
+    async def test_manual_invalidation(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        cache = ResponseCache()
+        builder = make_builder(cached_handler(requests), cache=cache)
+        await builder.select("*").execute()
+        cache.invalidate("other_table")
+        await builder.select("*").execute()
+        assert len(requests) == 1
+        cache.invalidate("example_table")
+        await builder.select("*").execute()
+        assert len(requests) == 2
+
+    async def test_lru_eviction(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        cache = ResponseCache(maxsize=2)
+        builder = make_builder(cached_handler(requests), cache=cache)
+        for value in (1, 2, 1, 3, 1):
+            await builder.select("*").eq("id", value).execute()
+        assert len(cache) == 2
+        assert [r.url.params["id"] for r in requests] == ["eq.1", "eq.2", "eq.3"]
+
+
+def slow_handler(
+    requests: List[Request],
+    single_flight: AsyncSingleFlight,
+    status_code: int = 200,
+    callers: int = 0,
+) -> Handler:
+    async def handler(request: Request) -> Response:
+        requests.append(request)
+        # keep the request in flight until the other callers arrive
+        for _ in range(500):
+            if single_flight.calls >= callers:
+                break
+            await AsyncExecutor.sleep(0.01)
+        if status_code != 200:
+            return Response(status_code, json={"message": "boom", "code": "XX000"})
+        return Response(200, json=[{"id": 1}])
+
+    return handler
+
+
+class TestSingleFlight:
+    async def test_identical_reads_share_one_request(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        single_flight = AsyncSingleFlight()
+        builder = make_builder(
+            slow_handler(requests, single_flight, callers=8),
+            single_flight=single_flight,
+        )
+        async with AsyncExecutor(8) as executor:
+            futures = [
+                executor.submit(builder.select("*").eq("id", 1).execute)
+                for _ in range(8)
+            ]
+            responses = [await future.result() for future in futures]
+        assert len(requests) == 1
+        assert all(response.data == [{"id": 1}] for response in responses)
+        assert (single_flight.calls, single_flight.coalesced) == (8, 7)
+
+    async def test_different_reads_are_not_coalesced(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        single_flight = AsyncSingleFlight()
+        builder = make_builder(
+            slow_handler(requests, single_flight, callers=2),
+            single_flight=single_flight,
+        )
+        async with AsyncExecutor(2) as executor:
+            first = executor.submit(builder.select("*").eq("id", 1).execute)
+            second = executor.submit(builder.select("*").eq("id", 2).execute)
+            await first.result()
+            await second.result()
+        assert len(requests) == 2
+        assert single_flight.coalesced == 0
+
+    async def test_errors_are_shared(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        single_flight = AsyncSingleFlight()
+        builder = make_builder(
+            slow_handler(requests, single_flight, 500, callers=4),
+            single_flight=single_flight,
+        )
+        async with AsyncExecutor(4) as executor:
+            futures = [executor.submit(builder.select("*").execute) for _ in range(4)]
+            for future in futures:
+                with pytest.raises(APIError):
+                    await future.result()
+        assert len(requests) == 1
+
+    async def test_writes_are_not_coalesced(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        single_flight = AsyncSingleFlight()
+        builder = make_builder(
+            slow_handler(requests, single_flight), single_flight=single_flight
+        )
+        async with AsyncExecutor(2) as executor:
+            futures = [
+                executor.submit(builder.delete().eq("id", 1).execute) for _ in range(2)
+            ]
+            for future in futures:
+                await future.result()
+        assert len(requests) == 2
+
+
+def counting_handler(requests: List[Request], estimate: int, exact: int) -> Handler:
+    def handler(request: Request) -> Response:
+        requests.append(request)
+        prefer = request.headers.get("prefer", "")
+        total = exact if "count=exact" in prefer else estimate
+        if request.method == "HEAD":
+            return Response(200, headers={"content-range": f"*/{total}"})
+        headers = {"content-range": f"0-1/{total}" if "count=" in prefer else "0-1/*"}
+        return Response(200, headers=headers, json=[{"id": 1}, {"id": 2}])
+
+    return handler
+
+
+class TestSmartCount:
+    async def test_estimate_above_threshold(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(
+            counting_handler(requests, estimate=2_000_000, exact=1_999_998),
+            count_cache=CountCache(),
+        )
+        response = await builder.select("*").smart_count().limit(2).execute()
+        assert response.count == 2_000_000
+        assert response.count_method == CountMethod.planned
+        assert not response.is_count_exact
+        assert [r.headers["prefer"] for r in requests] == ["count=planned"]
+
+    async def test_exact_below_threshold(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(
+            counting_handler(requests, estimate=60, exact=57), count_cache=CountCache()
+        )
+        response = await (
+            builder.select("id", count=CountMethod.exact)
+            .eq("status", "open")
+            .smart_count(threshold=100)
+            .order("id")
+            .limit(2)
+            .execute()
+        )
+        assert response.count == 57
+        assert response.is_count_exact
+        head = requests[1]
+        assert head.method == "HEAD"
+        assert head.headers["prefer"] == "count=exact"
+        assert str(head.url.params) == "select=id&status=eq.open"
+
+    async def test_inner_embedding_counted_with_select(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(
+            counting_handler(requests, estimate=60, exact=57), count_cache=CountCache()
+        )
+        await (
+            builder.select("id, cities!inner(name)")
+            .eq("cities.name", "Oslo")
+            .smart_count()
+            .execute()
+        )
+        assert requests[1].url.params["select"] == "id,cities!inner(name)"
+        await builder.select("id").eq("cities.name", "Oslo").smart_count().execute()
+        assert [r.method for r in requests] == ["GET", "HEAD", "GET", "HEAD"]
+
+    def test_kept_by_request_copies(self, request_builder: AsyncRequestBuilder):
+        request = request_builder.select("*").smart_count().request
+        copy = request.with_params(request.params.copy())
+        assert copy.smart_count is request.smart_count is not None
+
+    async def test_counts_are_cached_per_shape(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(
+            counting_handler(requests, estimate=60, exact=57), count_cache=CountCache()
+        )
+        await builder.select("*").eq("status", "open").smart_count().execute()
+        response = await (
+            builder.select("id").eq("status", "open").smart_count().range(2, 3)
+        ).execute()
+        assert len(requests) == 3
+        assert "prefer" not in requests[2].headers
+        assert (response.count, response.count_method) == (57, CountMethod.exact)
+        await builder.select("*").eq("status", "closed").smart_count().execute()
+        assert len(requests) == 5
+
+    async def test_count_method_of_plain_count(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(
+            counting_handler(requests, estimate=60, exact=57), count_cache=CountCache()
+        )
+        response = await builder.select("*", count=CountMethod.exact).execute()
+        assert (response.count, response.count_method) == (57, CountMethod.exact)
+        response = await builder.select("*").execute()
+        assert (response.count, response.count_method) == (None, None)
+
+
+class TestReturns:
+    @pytest.mark.parametrize("model", [Country, City])
+    async def test_rows_into_model(self, model: type, make_builder: MakeBuilder):
+        builder = make_builder(
+            json_handler(b'[{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]')
+        )
+        response = await builder.select("id, name").returns(model).execute()
+        assert response.data == [model(id=1, name="a"), model(id=2, name="b")]
+
+    async def test_single_row_into_model(self, make_builder: MakeBuilder):
+        builder = make_builder(json_handler(b'{"id": 1, "name": "a"}'))
+        response = await builder.select("id, name").returns(Country).single().execute()
+        assert response.data == Country(id=1, name="a")
+
+    async def test_msgspec_struct(self, make_builder: MakeBuilder):
+        msgspec = pytest.importorskip("msgspec")
+
+        class Town(msgspec.Struct):  # type: ignore[name-defined]
+            id: int
+
+        builder = make_builder(json_handler(b'[{"id": 1, "name": "a"}]'))
+        response = await builder.select("id").returns(Town).execute()
+        assert response.data == [Town(id=1)]
+
+    async def test_mismatching_rows(self, make_builder: MakeBuilder):
+        builder = make_builder(json_handler(b'[{"id": "one", "name": "a"}]'))
+        with pytest.raises(ValueError, match="Country"):
+            await builder.select("id, name").returns(Country).execute()
+
+    def test_decoder_is_cached(self):
+        assert typed_json_decoder(Country, True) is typed_json_decoder(Country, True)
+        assert typed_json_decoder(Country, True) is not typed_json_decoder(
+            Country, False
+        )
+
+    def test_decoder_of_union(self):
+        decode = typed_json_decoder(Union[Country, int], True)
+        assert decode(b'[{"id": 1, "name": "a"}, 2]') == [Country(id=1, name="a"), 2]
+
+    async def test_stream_rows_into_model(self, make_builder: MakeBuilder):
+        builder = make_builder(
+            streaming_handler(
+                [b'[{"id": 1, "name": "a"}, {"id"', b': 2, "name": "b"}]']
+            )
+        )
+        query = builder.select("id, name").returns(City)
+        rows = [row async for row in query.execute_stream()]
+        assert rows == [City(id=1, name="a"), City(id=2, name="b")]
+
+        builder = make_builder(streaming_handler([b'[{"id": "one"}]']))
+        with pytest.raises(ValueError, match="City"):
+            async for _ in builder.select("id").returns(City).execute_stream():
+                pass
+
+    async def test_paginate_model_rows(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        rows = [{"id": i, "name": f"n{i}"} for i in range(3)]
+        builder = make_builder(table_handler(rows, requests))
+        pages = [
+            page.data
+            async for page in builder.select("id, name")
+            .returns(Country)
+            .paginate("id", page_size=2)
+        ]
+        assert pages == [
+            [Country(id=0, name="n0"), Country(id=1, name="n1")],
+            [Country(id=2, name="n2")],
+        ]
+        assert requests[-1].url.params["id"] == "gt.1"
+
+    async def test_export_rejects_model_rows(
+        self, tmp_path: Path, make_builder: MakeBuilder
+    ):
+        builder = make_builder(range_handler([], []))
+        with pytest.raises(ValueError, match="returns"):
+            await builder.select("*").returns(Country).export(tmp_path)
+
+
+class TestBulkWrite:
+    async def test_insert_many_in_chunks(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(bulk_handler(requests))
+        result = await builder.insert_many(
+            ({"id": i} for i in range(10)),
+            chunk_size=4,
+            concurrency=2,
+            count=CountMethod.exact,
+        )
+        assert result.row_count == 10
+        assert result.count == 10
+        assert result.data == []
+        assert result.errors == []
+        assert sorted(len(json.loads(r.content)) for r in requests) == [2, 4, 4]
+        assert all(
+            r.headers["prefer"] == "return=minimal,count=exact" for r in requests
+        )
+
+    async def test_chunk_errors_do_not_abort(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(bulk_handler(requests))
+        rows = [{"id": i, "fail": i == 3} for i in range(6)]
+        result = await builder.insert_many(
+            rows, chunk_size=2, returning=ReturnMethod.representation
+        )
+        assert result.row_count == 4
+        assert result.data == rows[:2] + rows[4:]
+        assert len(result.errors) == 1
+        assert result.errors[0].index == 1
+        assert result.errors[0].rows == rows[2:4]
+        assert isinstance(result.errors[0].error, APIError)
+
+    async def test_upsert_many_from_async_iterable(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        builder = make_builder(bulk_handler(requests))
+
+        async def rows():
+            for i in range(3):
+                yield {"id": i}
+
+        result = await builder.upsert_many(rows(), chunk_size=2, on_conflict="id")
+        assert result.row_count == 3
+        assert all(r.url.params["on_conflict"] == "id" for r in requests)
+        assert all(
+            "resolution=merge-duplicates" in r.headers["prefer"] for r in requests
+        )
+
+
+def update_handler(
+    table: Dict[int, Dict[str, Any]], requests: List[Request]
+) -> Handler:
+    def handler(request: Request) -> Response:
+        requests.append(request)
+        params = request.url.params
+        if request.method == "GET":
+            keys = params["id"][len("in.(") : -1].split(",")
+            return Response(200, json=[{"id": int(k)} for k in keys if int(k) in table])
+        rows = json.loads(request.content)
+        if any(row.get("fail") for row in rows):
+            return Response(
+                400,
+                json={"message": "bad", "code": "22P02", "hint": None, "details": None},
+            )
+        for row in rows:
+            table.setdefault(row["id"], {}).update(row)
+        return Response(201, json=[{"id": row["id"]} for row in rows])
+
+    return handler
+
+
+class TestUpdateMany:
+    async def test_groups_rows_by_columns(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        table = {i: {"id": i, "name": "a", "age": 0} for i in range(5)}
+        builder = make_builder(update_handler(table, requests))
+        rows: List[JSON] = [
+            {"id": 0, "name": "x"},
+            {"id": 1, "age": 1},
+            {"id": 2, "name": "y"},
+            {"id": 9, "name": "z"},
+            {"id": 3, "age": 3},
+        ]
+        result = await builder.update_many(rows, concurrency=1)
+        assert sorted(result.keys) == [0, 1, 2, 3]
+        assert result.missing == [9]
+        assert result.row_count == 4
+        assert result.errors == []
+        assert table == {
+            0: {"id": 0, "name": "x", "age": 0},
+            1: {"id": 1, "name": "a", "age": 1},
+            2: {"id": 2, "name": "y", "age": 0},
+            3: {"id": 3, "name": "a", "age": 3},
+            4: {"id": 4, "name": "a", "age": 0},
+        }
+        upserts = [r for r in requests if r.method == "POST"]
+        assert len(upserts) == 2
+        for upsert in upserts:
+            assert upsert.url.params["on_conflict"] == "id"
+            assert upsert.url.params["select"] == "id"
+            assert "missing=default" in upsert.headers["prefer"]
+            assert "return=representation" in upsert.headers["prefer"]
+
+    async def test_lookup_bypasses_the_cache(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        table: Dict[int, Dict[str, Any]] = {}
+        builder = make_builder(update_handler(table, requests), cache=ResponseCache())
+        result = await builder.update_many([{"id": 1, "name": "a"}])
+        assert result.missing == [1]
+        assert result.row_count == 0
+        table[1] = {"id": 1}
+        result = await builder.update_many([{"id": 1, "name": "a"}])
+        assert result.keys == [1]
+        assert result.row_count == 1
+        assert table == {1: {"id": 1, "name": "a"}}
+
+    async def test_insert_missing(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        table: Dict[int, Dict[str, Any]] = {}
+        builder = make_builder(update_handler(table, requests))
+        result = await builder.update_many(
+            [{"id": 1, "name": "a"}], insert_missing=True
+        )
+        assert result.keys == [1]
+        assert result.missing == []
+        assert [r.method for r in requests] == ["POST"]
+
+    async def test_duplicate_keys_split_chunks(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        table = {1: {"id": 1, "n": 0}}
+        builder = make_builder(update_handler(table, requests))
+        rows = [{"id": 1, "n": 1}, {"id": 1, "n": 2}]
+        result = await builder.update_many(rows, concurrency=1)
+        assert result.keys == [1, 1]
+        assert table[1]["n"] == 2
+        assert len([r for r in requests if r.method == "POST"]) == 2
+
+    async def test_chunk_errors(self, make_builder: MakeBuilder):
+        table = {i: {"id": i} for i in range(4)}
+        builder = make_builder(update_handler(table, []))
+        rows: List[JSON] = [{"id": i, "fail": i == 3} for i in range(4)]
+        result = await builder.update_many(rows, chunk_size=2)
+        assert sorted(result.keys) == [0, 1]
+        assert [e.rows for e in result.errors] == [rows[2:]]
+
+    async def test_lookup_url_stays_short(self, make_builder: MakeBuilder):
+        requests: List[Request] = []
+        keys = [10**30 + i for i in range(500)]
+        table = {k: {"id": k, "n": 0} for k in keys}
+        builder = make_builder(update_handler(table, requests))
+        result = await builder.update_many([{"id": k, "n": 1} for k in keys])
+        assert len(result.keys) == 500
+        lookups = [r for r in requests if r.method == "GET"]
+        assert len(lookups) == 5
+        assert all(len(str(r.url)) < 8192 for r in lookups)
+
+    def test_chunks_bounded_by_key_bytes(self):
+        chunker = UpdateChunker("id", 100, max_key_bytes=20)
+        # `"a,b"` is sanitized and encoded as `%22a%2Cb%22`, 11 bytes plus the separator
+        assert chunker.add({"id": "a,b"}) == []
+        assert chunker.add({"id": "c"}) == []
+        assert chunker.add({"id": "d"}) == [[{"id": "a,b"}, {"id": "c"}]]
+        assert chunker.flush() == [[{"id": "d"}]]
+
+    def test_chunker_limits(self):
+        with pytest.raises(ValueError):
+            UpdateChunker("id", 0)
+        with pytest.raises(ValueError):
+            UpdateChunker("id", 10, max_key_bytes=0)
+
+    async def test_rows_need_a_key(self, make_builder: MakeBuilder):
+        builder = make_builder(update_handler({}, []))
+        with pytest.raises(ValueError):
+            await builder.update_many([{"name": "a"}])
+
+
+class TestRowChunker:
+    def test_chunk_size(self):
+        chunker = RowChunker(2)
+        assert [chunker.add({"id": i}) for i in range(3)] == [
+            None,
+            None,
+            [{"id": 0}, {"id": 1}],
+        ]
+        assert chunker.flush() == [{"id": 2}]
+
+    def test_max_chunk_bytes(self):
+        # each row is 8 bytes, plus 1 for the comma and 2 for the brackets
+        chunker = RowChunker(100, max_chunk_bytes=20)
+        chunks = [chunker.add({"id": i}) for i in range(3)]
+        assert chunks == [None, None, [{"id": 0}, {"id": 1}]]
+
+
 @pytest.fixture
 def csv_api_response() -> str:
     return "id,name\n1,foo\n"
@@ -520,6 +1580,35 @@ class TestApiResponse:
         assert result.data == single_api_response
         assert result.count == 2
 
+    def test_from_http_request_response_skip_validation(
+        self, request_response_with_data: Response, api_response: List[Dict[str, Any]]
+    ):
+        result = APIResponse.from_http_request_response(
+            request_response_with_data, skip_validation=True
+        )
+        assert isinstance(result, APIResponse)
+        assert result.data == api_response
+        assert result.count == 2
+
+    def test_single_from_http_request_response_skip_validation(
+        self,
+        request_response_with_single_data: Response,
+        single_api_response: Dict[str, Any],
+    ):
+        result = SingleAPIResponse.from_http_request_response(
+            request_response_with_single_data, skip_validation=True
+        )
+        assert result.data == single_api_response
+        assert result.count == 2
+
+    def test_skip_validation_with_csv_data(
+        self, request_response_with_csv_data: Response, csv_api_response: str
+    ):
+        result = SingleAPIResponse.from_http_request_response(
+            request_response_with_csv_data, skip_validation=True
+        )
+        assert result.data == csv_api_response
+
     def test_single_with_csv_data(
         self, request_response_with_csv_data: Response, csv_api_response: str
     ):
@@ -1,3 +1,7 @@
+import io
+import json
+import time
+from typing import Dict, List, Optional
 from unittest.mock import patch
 
 import pytest
@@ -7,12 +11,14 @@ from httpx import (
     Headers,
     HTTPTransport,
     Limits,
+    MockTransport,
     Request,
     Response,
     Timeout,
 )
 
-from postgrest import SyncPostgrestClient
+from postgrest import ExplainSampler, Param, QueryMetrics, SyncPostgrestClient
+from postgrest.concurrency import SyncExecutor
 from postgrest.exceptions import APIError
 
 
@@ -92,6 +98,160 @@ class TestAuth:
         )
 
 
+def test_skip_validation():
+    with SyncPostgrestClient("https://example.com", skip_validation=True) as client:
+        assert client.from_("test").select("*").request.skip_validation is True
+        assert client.rpc("func", {}).request.skip_validation is True
+        assert client.schema("private").skip_validation is True
+
+
+class TestConnectionPool:
+    def test_limits(self):
+        limits = Limits(max_connections=7, max_keepalive_connections=3)
+        with SyncPostgrestClient(
+            "https://example.com", limits=limits, http2=False
+        ) as client:
+            pool = client.session._transport._pool  # type: ignore[attr-defined]
+            assert pool._max_connections == 7
+            assert pool._max_keepalive_connections == 3
+            assert pool._http2 is False
+
+    def test_schema_shares_session(self):
+        client = SyncPostgrestClient("https://example.com")
+        private = client.schema("private")
+        assert private.session is client.session
+        assert private.pool_monitor is client.pool_monitor
+        private.aclose()
+        assert not client.session.is_closed
+        client.aclose()
+        assert client.session.is_closed
+
+    def test_pool_stats(self, postgrest_client: SyncPostgrestClient):
+        request = Request("GET", "https://example.com/test")
+        postgrest_client._trace_pool_wait(request)
+        request.extensions["trace"]("http2.send_request_headers.started", {})
+        stats = postgrest_client.pool_stats()
+        assert stats.connections == stats.idle_connections == 0
+        assert stats.queued_requests == 0
+        assert stats.requests == 1
+        assert 0 <= stats.average_wait == stats.max_wait == stats.total_wait
+
+
+class TestQueryMetrics:
+    def test_records_every_request(self):
+        def handler(request: Request) -> Response:
+            if request.url.params.get("id") == "eq.0":
+                return Response(404, json=api_error("PGRST116"))
+            return Response(
+                200, headers={"Content-Range": "0-1/*"}, json=[{"id": 1}, {"id": 2}]
+            )
+
+        metrics = QueryMetrics()
+        session = Client(
+            base_url="https://example.com", transport=MockTransport(handler)
+        )
+        with SyncPostgrestClient(
+            "https://example.com", http_client=session, observer=metrics
+        ) as client:
+            for id in (1, 2):
+                client.from_("countries").select("id").eq("id", id).execute()
+            query = client.schema("private").from_("countries").select("id")
+            query.eq("id", Param("id")).prepare().execute(id=5)
+            with pytest.raises(APIError):
+                client.from_("countries").select("id").eq("id", 0).execute()
+
+        (stats,) = metrics.report()
+        assert stats.fingerprint == "GET countries select=id id=eq"
+        assert stats.count == 4
+        assert stats.errors == 1
+        assert stats.rows.p50 == pytest.approx(2, rel=0.01)
+        assert stats.bytes.p50 > 0
+        assert 0 < stats.latency.p50 <= stats.latency.p99
+
+
+def explained_client(
+    requests: List[Request], sampler: ExplainSampler, plan_status: int = 200
+) -> SyncPostgrestClient:
+    def handler(request: Request) -> Response:
+        requests.append(request)
+        if "vnd.pgrst.plan+json" in request.headers["accept"]:
+            SyncExecutor.sleep(0.01)
+            return Response(plan_status, json=[{"Plan": {"Node Type": "Seq Scan"}}])
+        return Response(200, json=[{"id": 1}])
+
+    session = Client(base_url="https://example.com", transport=MockTransport(handler))
+    return SyncPostgrestClient(
+        "https://example.com", http_client=session, explain_sampler=sampler
+    )
+
+
+def wait_for_plans(
+    sampler: ExplainSampler, count: int, fingerprint: Optional[str] = None
+) -> None:
+    for _ in range(200):
+        plans = [p for p in sampler.plans if fingerprint in (None, p.fingerprint)]
+        if len(plans) + sampler.errors >= count:
+            return
+        SyncExecutor.sleep(0.01)
+
+
+class TestExplainSampler:
+    def test_explains_slow_reads(self):
+        requests: List[Request] = []
+        sampler = ExplainSampler(threshold=0)
+        with explained_client(requests, sampler) as client:
+            client.from_("countries").select("id").eq("id", 1).execute()
+            client.from_("countries").insert({"id": 2}).execute()
+            wait_for_plans(sampler, 1)
+
+        (plan,) = sampler.plans
+        assert plan.fingerprint == "GET countries select=id id=eq"
+        assert plan.plan == [{"Plan": {"Node Type": "Seq Scan"}}]
+        assert plan.url.endswith("/countries?select=id&id=eq.1")
+        (explain,) = [r for r in requests if "plan" in r.headers["accept"]]
+        assert explain.headers["accept"] == "application/vnd.pgrst.plan+json; options="
+        assert explain.url.params["id"] == "eq.1"
+
+    def test_samples_one_in_n(self):
+        requests: List[Request] = []
+        sampler = ExplainSampler(threshold=None, every=2, cooldown=0, max_pending=8)
+        with explained_client(requests, sampler) as client:
+            for id in range(4):
+                client.from_("countries").select("id").eq("id", id).execute()
+            wait_for_plans(sampler, 2)
+        assert sorted(p.url[-1] for p in sampler.plans) == ["1", "3"]
+
+    def test_cooldown_and_ring_buffer(self):
+        requests: List[Request] = []
+        sampler = ExplainSampler(threshold=0, maxsize=2, max_pending=8)
+        with explained_client(requests, sampler) as client:
+            for table in ("a", "b", "c"):
+                client.from_(table).select("*").execute()
+                # one at a time, for the plans to be stored in order
+                wait_for_plans(sampler, 1, f"GET {table} select=*")
+            client.from_("a").select("*").execute()
+        assert [p.fingerprint for p in sampler.plans] == [
+            "GET b select=*",
+            "GET c select=*",
+        ]
+        buffer = io.StringIO()
+        assert sampler.dump(buffer) == 2
+        lines = buffer.getvalue().splitlines()
+        assert [json.loads(line)["fingerprint"] for line in lines] == [
+            "GET b select=*",
+            "GET c select=*",
+        ]
+
+    def test_failed_explain(self):
+        requests: List[Request] = []
+        sampler = ExplainSampler(threshold=0)
+        with explained_client(requests, sampler, plan_status=406) as client:
+            client.from_("countries").select("*").execute()
+            wait_for_plans(sampler, 1)
+        assert sampler.plans == []
+        assert sampler.errors == 1
+
+
 def test_schema(postgrest_client: SyncPostgrestClient):
     client = postgrest_client.schema("private")
     subheaders = {
@@ -184,3 +344,133 @@ def test_response_client_invalid_response_but_valid_json(
         assert isinstance(exc_response.get("message"), str)
         assert exc_response.get("message") == "JSON could not be generated"
         assert "code" in exc_response and int(exc_response["code"]) == 502
+
+
+def api_error(code: str) -> Dict[str, Optional[str]]:
+    return {"message": "failed", "code": code, "hint": None, "details": None}
+
+
+def rpc_client(calls: List[Request]) -> SyncPostgrestClient:
+    attempts: Dict[str, int] = {}
+
+    def handler(request: Request) -> Response:
+        calls.append(request)
+        if request.method == "GET":
+            x = request.url.params["x"]
+            attempts[x] = attempts.get(x, 0) + 1
+            if attempts[x] == 1:
+                return Response(503, json=api_error("PGRST001"))
+        else:
+            x = str(json.loads(request.content)["x"])
+        if x == "3":
+            return Response(400, json=api_error("22023"))
+        return Response(200, json=int(x) * 2)
+
+    http_client = Client(
+        base_url="https://example.com", transport=MockTransport(handler)
+    )
+    return SyncPostgrestClient("https://example.com", http_client=http_client)
+
+
+class TestRPCMany:
+    def test_results_in_order(self):
+        calls: List[Request] = []
+        client = rpc_client(calls)
+        results = [
+            result
+            for result in client.rpc_many(
+                "double", ({"x": x} for x in range(6)), concurrency=2
+            )
+        ]
+        assert [result.index for result in results] == list(range(6))
+        assert [result.response.data for result in results if result.response] == [
+            0,
+            2,
+            4,
+            8,
+            10,
+        ]
+        failed = results[3]
+        assert not failed.ok
+        assert isinstance(failed.error, APIError)
+        assert failed.error.code == "22023"
+        assert failed.params == {"x": 3}
+        assert len(calls) == 6
+
+    def test_unordered(self):
+        client = rpc_client([])
+        results = [
+            result
+            for result in client.rpc_many(
+                "double", [{"x": x} for x in range(10)], ordered=False, concurrency=3
+            )
+        ]
+        assert sorted(result.index for result in results) == list(range(10))
+
+    def test_retries_read_only_calls(self):
+        calls: List[Request] = []
+        client = rpc_client(calls)
+        results = [
+            result
+            for result in client.rpc_many(
+                "double", [{"x": 1}, {"x": 3}], get=True, retry_delay=0
+            )
+        ]
+        assert results[0].response and results[0].response.data == 2
+        assert results[0].attempts == 2
+        assert results[1].error and results[1].attempts == 2
+        assert len(calls) == 4
+
+    def test_no_retries_left(self):
+        client = rpc_client([])
+        results = [
+            result
+            for result in client.rpc_many("double", [{"x": 1}], get=True, retries=0)
+        ]
+        assert isinstance(results[0].error, APIError)
+        assert results[0].error.code == "PGRST001"
+
+
+def table_client(delay: float = 0) -> SyncPostgrestClient:
+    def handler(request: Request) -> Response:
+        SyncExecutor.sleep(delay)
+        table = request.url.path.rsplit("/", 1)[-1]
+        if table == "missing":
+            return Response(404, json=api_error("42P01"))
+        return Response(200, json=[{"table": table}])
+
+    http_client = Client(
+        base_url="https://example.com", transport=MockTransport(handler)
+    )
+    return SyncPostgrestClient("https://example.com", http_client=http_client)
+
+
+class TestGather:
+    def test_results_in_order(self):
+        client = table_client()
+        countries, cities, city = client.gather(
+            client.from_("countries").select("*"),
+            client.from_("cities").select("*"),
+            client.from_("cities").select("*").single(),
+        )
+        assert countries.data == [{"table": "countries"}]
+        assert cities.data == [{"table": "cities"}]
+        assert city.data == [{"table": "cities"}]
+
+    def test_runs_concurrently(self):
+        client = table_client(delay=0.1)
+        started = time.monotonic()
+        results = client.gather(
+            *(client.from_(f"t{i}").select("*") for i in range(4)), max_workers=4
+        )
+        assert len(results) == 4
+        assert time.monotonic() - started < 0.3
+
+    def test_errors(self):
+        client = table_client()
+        queries = [client.from_("missing").select("*"), client.from_("a").select("*")]
+        with pytest.raises(APIError):
+            client.gather(*queries)
+        missing, found = client.gather(*queries, return_exceptions=True)
+        assert isinstance(missing, APIError) and missing.code == "42P01"
+        assert found.data == [{"table": "a"}]
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+
+from postgrest.export import CSVSink, ExportSink, plan_partitions, split_range
+
+
+def test_split_integers():
+    assert split_range(1, 100, 4) == [26, 51, 76]
+    assert split_range(1, 2, 4) == [2]
+    assert split_range(5, 5, 3) == []
+
+
+def test_split_floats():
+    assert split_range(0.0, 1.0, 4) == [0.25, 0.5, 0.75]
+
+
+def test_split_timestamps():
+    assert split_range("2024-01-01T00:00:00.5Z", "2024-01-03T00:00:00.5Z", 2) == [
+        "2024-01-02T00:00:00.500000+00:00"
+    ]
+    assert split_range("2024-01-01 00:00:00", "2024-01-01 12:00:00", 3) == [
+        "2024-01-01T04:00:00",
+        "2024-01-01T08:00:00",
+    ]
+    assert split_range("2024-01-01", "2024-01-05", 2) == ["2024-01-03"]
+
+
+@pytest.mark.parametrize("low, high", [("a", "z"), (False, True), (1, "z")])
+def test_split_unsupported_keys(low, high):
+    with pytest.raises(ValueError):
+        split_range(low, high, 2)
+
+
+def test_plan_partitions():
+    partitions = plan_partitions([10, 20])
+    assert [(p.lower, p.upper) for p in partitions] == [
+        (None, 10),
+        (10, 20),
+        (20, None),
+    ]
+    assert plan_partitions([])[0].lower is None
+
+
+def test_sink_needs_write(tmp_path: Path):
+    with pytest.raises(TypeError):
+        ExportSink(tmp_path / "rows")  # type: ignore[abstract]
+
+
+def test_csv_sink_rejects_non_objects(tmp_path: Path):
+    sink = CSVSink(tmp_path / "rows.csv")
+    sink.write([{"id": 1, "tags": ["a"], "name": None}])
+    assert sink.state() == {"offset": 26, "columns": ["id", "tags", "name"]}
+    with pytest.raises(TypeError, match="objects"):
+        sink.write([[1, 2]])
+    sink.close()
+    assert (tmp_path / "rows.csv").read_text() == 'id,tags,name\n1,"[""a""]",\n'
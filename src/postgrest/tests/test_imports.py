@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+from typing import List
+
+import pytest
+
+import postgrest
+
+
+def loaded_modules(statement: str) -> List[str]:
+    code = f"{statement}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    modules: List[str] = json.loads(out)
+    return modules
+
+
+def test_import_is_lazy():
+    modules = loaded_modules("import postgrest")
+    assert [m for m in modules if m.startswith("postgrest")] == [
+        "postgrest",
+        "postgrest.version",
+    ]
+    for dependency in ("httpx", "pydantic", "yarl", "deprecation"):
+        assert dependency not in modules
+
+
+def test_client_flavours_are_independent():
+    modules = loaded_modules("from postgrest import AsyncPostgrestClient")
+    assert "postgrest._async.client" in modules
+    for module in ("postgrest._sync.client", "postgrest.export", "postgrest.metrics"):
+        assert module not in modules
+
+
+@pytest.mark.parametrize("name", postgrest.__all__)
+def test_public_names_resolve(name):
+    assert getattr(postgrest, name) is not None
+    assert name in dir(postgrest)
+
+
+def test_submodules_stay_reachable():
+    assert postgrest.exceptions.APIError is postgrest.APIError
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        postgrest.does_not_exist  # noqa: B018
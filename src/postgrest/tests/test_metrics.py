@@ -0,0 +1,82 @@
+import pytest
+
+from postgrest.metrics import (
+    LogHistogram,
+    QueryMetrics,
+    QuerySample,
+    fingerprint,
+    rows_from_content_range,
+)
+
+
+def test_fingerprint_drops_values():
+    first = fingerprint(
+        "GET",
+        "/rest/v1/countries",
+        [("select", "id, name"), ("id", "eq.1"), ("limit", "10")],
+    )
+    second = fingerprint(
+        "GET",
+        "/rest/v1/countries",
+        [("limit", "20"), ("id", "eq.2"), ("select", "id,name")],
+    )
+    assert first == second == "GET countries limit select=id,name id=eq"
+
+
+def test_fingerprint_operators():
+    params = [
+        ("name", "not.ilike.*a*"),
+        ("tags", "cs.{a,b}"),
+        ("body", "fts(english).cat"),
+        ("or", "(id.in.(1,2),and(age.gt.2,name.not.eq.x))"),
+        ("order", "id.desc"),
+    ]
+    assert fingerprint("GET", "/countries", params) == (
+        "GET countries order=id.desc body=fts name=not.ilike "
+        "or=(id.in,and(age.gt,name.not.eq)) tags=cs"
+    )
+
+
+def test_fingerprint_rpc():
+    assert fingerprint("POST", "/rest/v1/rpc/search", []) == "POST rpc/search"
+
+
+@pytest.mark.parametrize(
+    "header, rows",
+    [(None, None), ("0-9/*", 10), ("5-5/100", 1), ("*/0", 0), ("bogus", None)],
+)
+def test_rows_from_content_range(header, rows):
+    assert rows_from_content_range(header) == rows
+
+
+def test_histogram_quantiles():
+    histogram = LogHistogram(precision=0.01)
+    for value in range(1, 1001):
+        histogram.record(value)
+    assert histogram.count == 1000
+    assert histogram.quantile(0.5) == pytest.approx(500, rel=0.02)
+    assert histogram.quantile(0.99) == pytest.approx(990, rel=0.02)
+    assert LogHistogram().quantile(0.5) == 0.0
+
+
+def test_histogram_zeros():
+    histogram = LogHistogram()
+    for value in (0, 0, 0, 5):
+        histogram.record(value)
+    assert histogram.quantile(0.5) == 0.0
+    assert histogram.quantile(1.0) == pytest.approx(5, rel=0.01)
+
+
+def test_metrics_report_slowest_first():
+    metrics = QueryMetrics()
+    for latency in (0.1, 0.2, 0.3):
+        metrics.record(QuerySample("GET a", latency, 100, 1, 200))
+    metrics.record(QuerySample("GET b", 2.0, 10, None, 500))
+    fast, slow = sorted(metrics.report(), key=lambda s: s.latency.p95)
+    assert [s.fingerprint for s in metrics.report()] == ["GET b", "GET a"]
+    assert fast.count == 3
+    assert fast.latency.p50 == pytest.approx(0.2, rel=0.01)
+    assert slow.errors == 1
+    assert slow.rows.p50 == 0.0
+    metrics.reset()
+    assert metrics.report() == []
@@ -0,0 +1,43 @@
+from httpx import QueryParams
+
+from postgrest.base_request_builder import ParamList
+
+
+def test_encoding_matches_query_params():
+    items = [
+        ("select", "id,name"),
+        ("name", "eq.a b&c=ä"),
+        ("id", "in.(1,2)"),
+    ]
+    params = ParamList()
+    for key, value in items:
+        params.add(key, value)
+    assert str(params) == str(QueryParams(tuple(items)))
+
+
+def test_set_replaces_in_place():
+    params = ParamList([("a", 1), ("b", 2), ("a", 3)])
+    params.set("a", True).set("c", None)
+    assert params.multi_items() == [("a", "true"), ("b", "2"), ("c", "")]
+
+
+def test_reads_like_query_params():
+    params = ParamList({"select": "*"}).add("id", "eq.1").add("id", "neq.2")
+    assert params["id"] == "eq.1"
+    assert params.get("missing") is None
+    assert "select" in params
+    assert len(params) == 2
+    assert params == QueryParams("select=*&id=eq.1&id=neq.2")
+
+
+def test_copy_is_independent():
+    params = ParamList({"select": "*"})
+    copy = params.copy().add("limit", 1)
+    assert "limit" not in params
+    assert "limit" in copy
+
+
+def test_list_values_repeat_the_key():
+    params = {"v": [1, 2], "flag": (True, None), "name": "a"}
+    assert str(ParamList(params)) == str(QueryParams(params))
+    assert str(ParamList(params)) == "v=1&v=2&flag=true&flag=&name=a"
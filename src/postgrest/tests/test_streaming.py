@@ -0,0 +1,95 @@
+import csv
+from json import JSONDecodeError
+
+import pytest
+
+from postgrest.streaming import CSVStreamDecoder, JSONArrayStreamDecoder
+
+
+def decode_chunks(chunks):
+    decoder = JSONArrayStreamDecoder()
+    rows = []
+    for chunk in chunks:
+        rows.extend(decoder.feed(chunk))
+    rows.extend(decoder.close())
+    return rows
+
+
+def test_decodes_elements_as_they_complete():
+    decoder = JSONArrayStreamDecoder()
+    assert decoder.feed(b' [{"a": [1, 2]}, {"b"') == [{"a": [1, 2]}]
+    assert decoder.feed(b': "x"}, 3') == [{"b": "x"}]
+    assert decoder.feed(b"4") == []
+    assert decoder.feed(b"]") == [34]
+    assert decoder.close() == []
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_any_chunk_size(size):
+    body = '[{"name": "Curaçao", "tags": ["a", "]"]}, null, true, 1.5e3, "x,y"]'
+    data = body.encode()
+    chunks = [data[i : i + size] for i in range(0, len(data), size)]
+    assert decode_chunks(chunks) == [
+        {"name": "Curaçao", "tags": ["a", "]"]},
+        None,
+        True,
+        1500.0,
+        "x,y",
+    ]
+
+
+def test_empty_array():
+    assert decode_chunks([b"[ ", b" ]"]) == []
+
+
+@pytest.mark.parametrize("chunks", [[], [b""], [b" \n", b"\r\n"]])
+def test_empty_body(chunks):
+    assert decode_chunks(chunks) == []
+
+
+@pytest.mark.parametrize(
+    "chunks", [[b'[{"a": 1}'], [b'{"a": 1}'], [b"[1 2]"], [b"[1,]"]]
+)
+def test_malformed_body(chunks):
+    with pytest.raises(JSONDecodeError):
+        decode_chunks(chunks)
+
+
+def decode_csv_chunks(chunks):
+    decoder = CSVStreamDecoder()
+    rows = []
+    for chunk in chunks:
+        rows.extend(decoder.feed(chunk))
+    rows.extend(decoder.close())
+    return rows
+
+
+def test_csv_rows_as_they_complete():
+    decoder = CSVStreamDecoder()
+    assert decoder.feed(b"id,name\n1,") == []
+    assert decoder.columns == ["id", "name"]
+    assert decoder.feed(b'"a\n') == []
+    assert decoder.feed(b'b"\n2,c') == [{"id": "1", "name": "a\nb"}]
+    assert decoder.close() == [{"id": "2", "name": "c"}]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_csv_any_chunk_size(size):
+    body = 'id,text\r\n1,"Curaçao, ""quoted""\r\nline"\r\n2,\r\n3,x\r\n'
+    data = body.encode()
+    chunks = [data[i : i + size] for i in range(0, len(data), size)]
+    assert decode_csv_chunks(chunks) == [
+        {"id": "1", "text": 'Curaçao, "quoted"\r\nline'},
+        {"id": "2", "text": ""},
+        {"id": "3", "text": "x"},
+    ]
+
+
+def test_csv_empty_body():
+    assert decode_csv_chunks([]) == []
+    assert decode_csv_chunks([b"id,name\n"]) == []
+
+
+def test_csv_unterminated_quote():
+    with pytest.raises(csv.Error):
+        decode_csv_chunks([b'id\n"abc'])
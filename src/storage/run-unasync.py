@@ -9,7 +9,11 @@ rules = (
     unasync.Rule(
         fromdir="/_async/",
         todir="/_sync/",
-        additional_replacements={"AsyncClient": "Client"},
+        additional_replacements={
+            "AsyncClient": "Client",
+            "aiter_bytes": "iter_bytes",
+            "aread": "read",
+        },
     ),
     unasync._DEFAULT_RULE,
 )
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Union
+
+from httpx import HTTPError
+
+from ..concurrency import AsyncExecutor
+from ..dir_sync import (
+    PLACEHOLDER,
+    REMOVE_BATCH_SIZE,
+    RemoteFile,
+    SyncReport,
+    content_type,
+    is_changed,
+    join_path,
+    remote_file,
+    walk_local,
+)
+from ..utils import StorageException
+
+if TYPE_CHECKING:
+    from .file_api import AsyncBucketActionsMixin
+
+LIST_PAGE_SIZE = 1000
+
+# what a failed transfer raises, the other files are still synced
+_ERRORS = (StorageException, HTTPError, OSError)
+
+
+class AsyncDirSync:
+    """Mirrors a local directory to a folder of a bucket, or the other way."""
+
+    def __init__(
+        self,
+        bucket: AsyncBucketActionsMixin,
+        *,
+        delete: bool = False,
+        dry_run: bool = False,
+        checksum: bool = False,
+        concurrency: int = 8,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._bucket = bucket
+        self._delete = delete
+        self._dry_run = dry_run
+        self._checksum = checksum
+        self._concurrency = concurrency
+
+    async def remote_files(self, prefix: str) -> Dict[str, RemoteFile]:
+        """The objects under `prefix`, by their path relative to it."""
+        files: Dict[str, RemoteFile] = {}
+        start = len(prefix) + 1 if prefix else 0
+        async for entry in self._bucket.iter_objects(
+            prefix, page_size=LIST_PAGE_SIZE, concurrency=self._concurrency
+        ):
+            if entry["name"] != PLACEHOLDER:
+                files[entry["path"][start:]] = remote_file(entry)
+        return files
+
+    async def upload(
+        self, local_dir: Union[str, os.PathLike[str]], prefix: str
+    ) -> SyncReport:
+        prefix = prefix.strip("/")
+        local = walk_local(local_dir)
+        remote = await self.remote_files(prefix)
+        report = SyncReport(direction="upload", dry_run=self._dry_run)
+        changed: List[str] = []
+        for path, file in sorted(local.items()):
+            if path in remote and not is_changed(
+                file, remote[path], "upload", self._checksum
+            ):
+                report.unchanged += 1
+            else:
+                changed.append(path)
+        stale = sorted(remote.keys() - local.keys()) if self._delete else []
+        if self._dry_run:
+            report.transferred = changed
+            report.bytes = sum(local[path].size for path in changed)
+            report.deleted = stale
+            return report
+
+        async with AsyncExecutor(self._concurrency) as executor:
+            futures = [
+                (
+                    path,
+                    executor.submit(
+                        self._bucket.upload,
+                        join_path(prefix, path),
+                        local[path].path,
+                        {
+                            "content-type": content_type(local[path].path),
+                            "upsert": "true",
+                        },
+                    ),
+                )
+                for path in changed
+            ]
+            for path, future in futures:
+                try:
+                    await future.result()
+                except _ERRORS as e:
+                    report.failed[path] = str(e)
+                    continue
+                report.transferred.append(path)
+                report.bytes += local[path].size
+
+        for start in range(0, len(stale), REMOVE_BATCH_SIZE):
+            batch = stale[start : start + REMOVE_BATCH_SIZE]
+            try:
+                await self._bucket.remove([join_path(prefix, path) for path in batch])
+            except _ERRORS as e:
+                report.failed.update(dict.fromkeys(batch, str(e)))
+                continue
+            report.deleted.extend(batch)
+        return report
+
+    async def download(
+        self, prefix: str, local_dir: Union[str, os.PathLike[str]]
+    ) -> SyncReport:
+        prefix = prefix.strip("/")
+        root = Path(local_dir).resolve()
+        remote = await self.remote_files(prefix)
+        local = walk_local(root) if root.exists() else {}
+        report = SyncReport(direction="download", dry_run=self._dry_run)
+        changed: List[str] = []
+        for path, file in sorted(remote.items()):
+            if path in local and not is_changed(
+                local[path], file, "download", self._checksum
+            ):
+                report.unchanged += 1
+            elif not root.joinpath(path).resolve().is_relative_to(root):
+                report.failed[path] = "The object is outside of the local directory"
+            else:
+                changed.append(path)
+        stale = sorted(local.keys() - remote.keys()) if self._delete else []
+        if self._dry_run:
+            report.transferred = changed
+            report.bytes = sum(remote[path].size or 0 for path in changed)
+            report.deleted = stale
+            return report
+
+        async with AsyncExecutor(self._concurrency) as executor:
+            futures = [
+                (
+                    path,
+                    executor.submit(
+                        self._download, prefix, path, root / path, remote[path]
+                    ),
+                )
+                for path in changed
+            ]
+            for path, future in futures:
+                try:
+                    report.bytes += await future.result()
+                except _ERRORS as e:
+                    report.failed[path] = str(e)
+                    continue
+                report.transferred.append(path)
+
+        for path in stale:
+            try:
+                local[path].path.unlink()
+            except OSError as e:
+                report.failed[path] = str(e)
+                continue
+            report.deleted.append(path)
+        return report
+
+    async def _download(
+        self, prefix: str, path: str, target: Path, remote: RemoteFile
+    ) -> int:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        written = await self._bucket.download_to(join_path(prefix, path), target)
+        if remote.modified is not None:
+            # so that the next sync sees the file as unchanged
+            timestamp = remote.modified.timestamp()
+            os.utime(target, (timestamp, timestamp))
+        return written
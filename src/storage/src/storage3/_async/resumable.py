@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, Optional, Set, Union
+
+from httpx import AsyncClient, Headers, Response, TransportError
+from yarl import URL
+
+from ..concurrency import AsyncExecutor
+from ..constants import DEFAULT_FILE_OPTIONS
+from ..resumable import (
+    TUS_VERSION,
+    ProgressCallback,
+    ResumableUploadState,
+    UploadPart,
+    UploadSource,
+    UploadStateStore,
+    encode_metadata,
+    plan_parts,
+    tus_error,
+)
+from ..types import FileOptions, UploadResponse
+
+
+class AsyncResumableUpload:
+    """Uploads a file in chunks with the TUS protocol of Supabase Storage.
+
+    Each chunk is acknowledged by the server before the next one is sent,
+    so a failed request is retried from the last acknowledged byte rather
+    than from the start, and the progress saved to `state_path` lets
+    another process resume the upload. When the server supports the
+    `concatenation` extension, the file is split into `parallel` parts
+    uploaded concurrently and then concatenated.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        base_url: URL,
+        headers: Headers,
+        bucket_id: str,
+        path: str,
+        source: UploadSource,
+        file_options: Optional[FileOptions] = None,
+        *,
+        chunk_size: int,
+        parallel: int = 1,
+        retries: int = 3,
+        state_path: Optional[Union[str, os.PathLike[str]]] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        if chunk_size < 1 or parallel < 1 or retries < 0:
+            raise ValueError(
+                "chunk_size and parallel must be at least 1, and retries at least 0"
+            )
+        self._client = client
+        self._endpoint = base_url.joinpath("upload", "resumable")
+        self._bucket_id = bucket_id
+        self._path = path
+        self._source = source
+        self._chunk_size = chunk_size
+        self._parallel = parallel
+        self._retries = retries
+        self._store = UploadStateStore(state_path)
+        self._on_progress = on_progress
+        self._headers, self._metadata = self._upload_headers(headers, file_options)
+
+    def _upload_headers(
+        self, headers: Headers, file_options: Optional[FileOptions]
+    ) -> tuple[Dict[str, str], Dict[str, str]]:
+        options = file_options or {}
+        upsert = (
+            options.get("upsert")
+            or options.get("x-upsert")
+            or DEFAULT_FILE_OPTIONS["x-upsert"]
+        )
+        upload_headers = {
+            **headers,
+            **options.get("headers", {}),
+            "Tus-Resumable": TUS_VERSION,
+            "x-upsert": upsert,
+        }
+        metadata = {
+            "bucketName": self._bucket_id,
+            "objectName": self._path,
+            "contentType": options.get(
+                "content-type", DEFAULT_FILE_OPTIONS["content-type"]
+            ),
+            "cacheControl": options.get(
+                "cache-control", DEFAULT_FILE_OPTIONS["cache-control"]
+            ),
+        }
+        if user_metadata := options.get("metadata"):
+            metadata["metadata"] = json.dumps(user_metadata)
+        return upload_headers, metadata
+
+    async def run(self) -> UploadResponse:
+        state = self._store.load(self._new_state(self._parallel))
+        # checked for a saved state too, the server may no longer support it
+        if len(state.parts) > 1 and "concatenation" not in await self._extensions():
+            state = self._new_state(1)
+        partial = len(state.parts) > 1
+        pending = [part for part in state.parts if not part.done]
+        async with AsyncExecutor(self._parallel) as executor:
+            futures = [
+                executor.submit(self._upload_part, state, part, partial)
+                for part in pending
+            ]
+            for future in futures:
+                await future.result()
+        if partial:
+            await self._concatenate(state)
+        self._store.remove()
+        return UploadResponse(path=self._path, Key=f"{self._bucket_id}/{self._path}")
+
+    def _new_state(self, parallel: int) -> ResumableUploadState:
+        return ResumableUploadState(
+            bucket_id=self._bucket_id,
+            path=self._path,
+            size=self._source.size,
+            chunk_size=self._chunk_size,
+            fingerprint=self._source.fingerprint,
+            parts=plan_parts(self._source.size, self._chunk_size, parallel),
+        )
+
+    async def _extensions(self) -> Set[str]:
+        response = await self._client.options(
+            str(self._endpoint), headers=self._headers
+        )
+        extensions = response.headers.get("Tus-Extension", "")
+        return {extension.strip() for extension in extensions.split(",")}
+
+    async def _send(self, method: str, url: str, **kwargs) -> Response:
+        response = await self._client.request(method, url, **kwargs)
+        if response.is_error:
+            raise tus_error(response)
+        return response
+
+    async def _create(
+        self, state: ResumableUploadState, part: UploadPart, partial: bool
+    ) -> None:
+        headers = {
+            **self._headers,
+            "Upload-Length": str(part.end - part.start),
+            "Upload-Metadata": encode_metadata(self._metadata),
+        }
+        if partial:
+            headers["Upload-Concat"] = "partial"
+        response = await self._send("POST", str(self._endpoint), headers=headers)
+        location = response.headers.get("Location")
+        if location is None:
+            raise tus_error(response)
+        url = str(self._endpoint.join(URL(location)))
+        self._store.update(state, part, url=url, offset=0)
+
+    async def _resync(
+        self, state: ResumableUploadState, part: UploadPart, partial: bool
+    ) -> None:
+        """Get the offset the server has for `part`, or create it again."""
+        assert part.url is not None
+        response = await self._client.head(part.url, headers=self._headers)
+        if response.status_code in {403, 404, 410}:
+            # the upload expired or was never created
+            await self._create(state, part, partial)
+            return
+        if response.is_error:
+            raise tus_error(response)
+        self._store.update(state, part, offset=int(response.headers["Upload-Offset"]))
+
+    async def _upload_part(
+        self, state: ResumableUploadState, part: UploadPart, partial: bool
+    ) -> None:
+        failures = 0
+        while True:
+            try:
+                if part.url is None:
+                    await self._create(state, part, partial)
+                else:
+                    await self._resync(state, part, partial)
+                while not part.done:
+                    await self._upload_chunk(state, part)
+                return
+            except TransportError:
+                failures += 1
+                if failures > self._retries:
+                    raise
+                await AsyncExecutor.sleep(0.5 * 2 ** (failures - 1))
+
+    async def _upload_chunk(
+        self, state: ResumableUploadState, part: UploadPart
+    ) -> None:
+        assert part.url is not None
+        offset = part.start + part.offset
+        chunk = self._source.read(offset, min(self._chunk_size, part.end - offset))
+        response = await self._send(
+            "PATCH",
+            part.url,
+            headers={
+                **self._headers,
+                "Upload-Offset": str(part.offset),
+                "Content-Type": "application/offset+octet-stream",
+            },
+            content=chunk,
+        )
+        self._store.update(state, part, offset=int(response.headers["Upload-Offset"]))
+        if self._on_progress is not None:
+            self._on_progress(state.uploaded, state.size)
+
+    async def _concatenate(self, state: ResumableUploadState) -> None:
+        urls = " ".join(part.url or "" for part in state.parts)
+        await self._send(
+            "POST",
+            str(self._endpoint),
+            headers={
+                **self._headers,
+                "Upload-Concat": f"final;{urls}",
+                "Upload-Metadata": encode_metadata(self._metadata),
+            },
+        )
@@ -2,17 +2,35 @@ from __future__ import annotations
 
 import base64
 import json
+import mmap
+import os
 import urllib.parse
+from collections import deque
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
 from io import BufferedReader, FileIO
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Union, cast
+from typing import (
+    IO,
+    Any,
+    Deque,
+    Dict,
+    List,
+    Literal,
+    NoReturn,
+    Optional,
+    Union,
+    cast,
+)
 
 from httpx import Client, Headers, HTTPStatusError, Response
 from yarl import URL
 
+from ..concurrency import SyncExecutor, SyncFuture
 from ..constants import DEFAULT_FILE_OPTIONS, DEFAULT_SEARCH_OPTIONS
+from ..dir_sync import SyncReport, join_path
 from ..exceptions import StorageApiError
+from ..resumable import DEFAULT_CHUNK_SIZE, ProgressCallback, UploadSource
 from ..types import (
     BaseBucket,
     CreateSignedUploadUrlOptions,
@@ -34,9 +52,25 @@ from ..types import (
     transform_to_dict,
 )
 from ..utils import StorageException
+from .dir_sync import SyncDirSync
+from .resumable import SyncResumableUpload
 
 __all__ = ["SyncBucket"]
 
+# the size of the slices a memory buffer is streamed by
+BUFFER_CHUNK_SIZE = 64 * 1024
+
+FileContent = Union[
+    BufferedReader,
+    bytes,
+    FileIO,
+    str,
+    Path,
+    memoryview,
+    mmap.mmap,
+    Iterable[bytes],
+]
+
 
 def relative_path_to_parts(path: str) -> tuple[str, ...]:
     url = URL(path)
@@ -45,6 +79,37 @@ def relative_path_to_parts(path: str) -> tuple[str, ...]:
     return url.parts
 
 
+def raise_api_error(exc: HTTPStatusError) -> NoReturn:
+    try:
+        resp = exc.response.json()
+        raise StorageApiError(
+            resp["message"], resp["error"], resp["statusCode"]
+        ) from exc
+    except KeyError as err:
+        message = f"Unable to parse error message: {resp.text}"
+        raise StorageApiError(message, "InternalError", 400) from err
+
+
+def buffer_chunks(view: memoryview) -> Iterator[memoryview]:
+    for start in range(0, view.nbytes, BUFFER_CHUNK_SIZE):
+        yield view[start : start + BUFFER_CHUNK_SIZE]
+
+
+def raw_upload_body(
+    file: Union[memoryview, mmap.mmap, Iterable[bytes]], headers: dict[str, Any]
+) -> Iterable[Union[bytes, memoryview]]:
+    """Stream `file` as the body of the request, instead of in a multipart form.
+
+    A memory buffer is sent by slices of its memory rather than copied, and
+    its length is added to `headers`. Chunks are sent as they are produced.
+    """
+    if isinstance(file, (memoryview, mmap.mmap)):
+        view = memoryview(file).cast("B")
+        headers["content-length"] = str(view.nbytes)
+        return buffer_chunks(view)
+    return file
+
+
 class SyncBucketActionsMixin:
     """Functions needed to access the file API."""
 
@@ -77,14 +142,7 @@ class SyncBucketActionsMixin:
             )
             response.raise_for_status()
         except HTTPStatusError as exc:
-            try:
-                resp = exc.response.json()
-                raise StorageApiError(
-                    resp["message"], resp["error"], resp["statusCode"]
-                ) from exc
-            except KeyError as err:
-                message = f"Unable to parse error message: {resp.text}"
-                raise StorageApiError(message, "InternalError", 400) from err
+            raise_api_error(exc)
 
         # close the resource before returning the response
         if files and "file" in files and isinstance(files["file"][1], BufferedReader):
@@ -133,7 +191,7 @@ class SyncBucketActionsMixin:
         self,
         path: str,
         token: str,
-        file: Union[BufferedReader, bytes, FileIO, str, Path],
+        file: FileContent,
         file_options: Optional[UploadSignedUrlFileOptions] = None,
     ) -> UploadResponse:
         """
@@ -146,7 +204,7 @@ class SyncBucketActionsMixin:
         token
             The token generated from :meth:`.create_signed_url`
         file
-            The file contents or a file-like object to upload
+            The file contents or a file-like object to upload, as for :meth:`upload`
         file_options
             Additional options for the uploaded file
         """
@@ -170,14 +228,12 @@ class SyncBucketActionsMixin:
         }
         filename = path_parts[-1]
 
-        if (
-            isinstance(file, BufferedReader)
-            or isinstance(file, bytes)
-            or isinstance(file, FileIO)
-        ):
+        _file = None
+        content = None
+        if isinstance(file, (BufferedReader, bytes, FileIO)):
             # bytes or byte-stream-like object received
             _file = {"file": (filename, file, headers.pop("content-type"))}
-        else:
+        elif isinstance(file, (str, os.PathLike)):
             # str or pathlib.path received
             _file = {
                 "file": (
@@ -186,12 +242,16 @@ class SyncBucketActionsMixin:
                     headers.pop("content-type"),
                 )
             }
+        else:
+            # memory buffer or chunks received
+            content = raw_upload_body(file, headers)
         response = self._request(
             "PUT",
             final_url,
             files=_file,
             headers=headers,
-            data=_data,
+            data=_data if _file else None,
+            content=content,
             query_params=query_params,
         )
         data: UploadData = response.json()
@@ -440,6 +500,70 @@ class SyncBucketActionsMixin:
         )
         return response.json()
 
+    def iter_objects(
+        self,
+        prefix: str = "",
+        *,
+        recursive: bool = True,
+        page_size: int = 1000,
+        concurrency: int = 4,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over the objects under `prefix`, across all the pages of :meth:`list`.
+
+        The entries are those returned by :meth:`list`, with a `path` key added
+        holding the full path of the object in the bucket. The next page of a
+        folder and its subfolders are fetched concurrently while the current
+        page is consumed, and at most `concurrency` pages are held at a time,
+        so that walking a large bucket is fast and uses a bounded amount of
+        memory. The objects are yielded in the order of their folder pages,
+        not sorted across folders.
+
+        Parameters
+        ----------
+        prefix
+            The folder to list, the root of the bucket by default.
+        recursive
+            Whether to descend into the subfolders, rather than yielding them.
+        page_size
+            The number of entries fetched per request.
+        concurrency
+            The maximum number of pages fetched at the same time.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        # folders and offsets to fetch, used as a stack to walk the tree
+        # depth first, which keeps it small on wide trees
+        pending: List[tuple[str, int]] = [(prefix.strip("/"), 0)]
+        in_flight: Deque[tuple[str, int, SyncFuture[List[Dict[str, Any]]]]] = deque()
+        with SyncExecutor(concurrency) as executor:
+
+            def fetch_more() -> None:
+                while pending and len(in_flight) < concurrency:
+                    folder, offset = pending.pop()
+                    future = executor.submit(
+                        self.list, folder, {"limit": page_size, "offset": offset}
+                    )
+                    in_flight.append((folder, offset, future))
+
+            fetch_more()
+            while in_flight:
+                folder, offset, future = in_flight.popleft()
+                entries = future.result()
+                subfolders = []
+                for entry in entries:
+                    entry["path"] = join_path(folder, entry["name"])
+                    if recursive and entry.get("id") is None:
+                        subfolders.append((entry["path"], 0))
+                pending.extend(reversed(subfolders))
+                if len(entries) == page_size:
+                    # prefetched before the subfolders, as it is popped first
+                    pending.append((folder, offset + page_size))
+                fetch_more()
+                for entry in entries:
+                    if not (recursive and entry.get("id") is None):
+                        yield entry
+
     def download(
         self,
         path: str,
@@ -449,36 +573,126 @@ class SyncBucketActionsMixin:
         """
         Downloads a file.
 
+        The whole file is held in memory, use :meth:`download_stream` or
+        :meth:`download_to` for large files.
+
         Parameters
         ----------
         path
             The file path to be downloaded, including the path and file name. For example `folder/image.png`.
         """
+        response = self._request(
+            "GET",
+            self._download_path(path, options),
+            query_params=self._download_query(options, query_params),
+        )
+        return response.content
+
+    def _download_path(
+        self, path: str, options: Optional[DownloadOptions]
+    ) -> List[str]:
         url_options = options or DownloadOptions()
         render_path = (
             ["render", "image", "authenticated"]
             if url_options.get("transform")
             else ["object"]
         )
+        return [*render_path, self.id, *relative_path_to_parts(path)]
 
-        transform_options = url_options.get("transform") or TransformOptions()
+    def _download_query(
+        self,
+        options: Optional[DownloadOptions],
+        query_params: Optional[Dict[str, str]],
+    ) -> dict[str, str]:
+        transform_options = (options or {}).get("transform") or TransformOptions()
+        return {
+            **transform_to_dict(transform_options),
+            **(query_params or {}),
+        }
 
-        path_parts = relative_path_to_parts(path)
-        response = self._request(
-            "GET",
-            [*render_path, self.id, *path_parts],
-            query_params={
-                **transform_to_dict(transform_options),
-                **(query_params or {}),
-            },
-        )
-        return response.content
+    def download_stream(
+        self,
+        path: str,
+        options: Optional[DownloadOptions] = None,
+        query_params: Optional[Dict[str, str]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """
+        Downloads a file chunk by chunk, without holding it in memory.
+
+        The request is only sent when iterating, and the connection is
+        released once the iteration ends.
+
+        Parameters
+        ----------
+        path
+            The file path to be downloaded, including the path and file name. For example `folder/image.png`.
+        options
+            Options for transforming the file, as for :meth:`download`.
+        chunk_size
+            The size of the chunks, or `None` for the chunks as they are received.
+        """
+        url_path = self._base_url.joinpath(
+            *self._download_path(path, options)
+        ).with_query(self._download_query(options, query_params))
+        with self._client.stream(
+            "GET", str(url_path), headers=dict(self._headers)
+        ) as response:
+            if response.is_error:
+                response.read()
+                try:
+                    response.raise_for_status()
+                except HTTPStatusError as exc:
+                    raise_api_error(exc)
+            for chunk in response.iter_bytes(chunk_size):  # noqa: UP028
+                yield chunk
+
+    def download_to(
+        self,
+        path: str,
+        destination: Union[str, os.PathLike[str], IO[bytes]],
+        options: Optional[DownloadOptions] = None,
+        query_params: Optional[Dict[str, str]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> int:
+        """
+        Downloads a file to `destination`, writing it as it is received.
+
+        A path is written through a temporary file next to it, so that it is
+        left untouched when the download fails. Returns the number of bytes
+        written.
+
+        Parameters
+        ----------
+        path
+            The file path to be downloaded, including the path and file name. For example `folder/image.png`.
+        destination
+            The local path, or a binary file-like object, to write to.
+        options
+            Options for transforming the file, as for :meth:`download`.
+        """
+        if not isinstance(destination, (str, os.PathLike)):
+            written = 0
+            for chunk in self.download_stream(path, options, query_params, chunk_size):
+                destination.write(chunk)
+                written += len(chunk)
+            return written
+
+        target = Path(destination)
+        partial = target.with_name(f".{target.name}.part")
+        try:
+            with open(partial, "wb") as f:
+                written = self.download_to(path, f, options, query_params, chunk_size)
+            os.replace(partial, target)
+        finally:
+            partial.unlink(missing_ok=True)
+        return written
 
     def _upload_or_update(
         self,
         method: Literal["POST", "PUT"],
         path: tuple[str, ...],
-        file: Union[BufferedReader, bytes, FileIO, str, Path],
+        file: FileContent,
         file_options: Optional[FileOptions] = None,
     ) -> UploadResponse:
         """
@@ -490,7 +704,10 @@ class SyncBucketActionsMixin:
             The relative file path including the bucket ID. Should be of the format `bucket/folder/subfolder/filename.png`.
             The bucket must already exist before attempting to upload.
         file
-            The File object to be stored in the bucket. or a async generator of chunks
+            The File object to be stored in the bucket, its local path, or its
+            content as bytes, a memoryview, an mmap or an async iterator of chunks.
+            Memory views, mmaps and iterators are streamed as they are, without
+            being copied into a multipart form.
         file_options
             HTTP headers.
         """
@@ -530,14 +747,12 @@ class SyncBucketActionsMixin:
             headers["cache-control"] = f"max-age={cache_control}"
             _data.update({"cacheControl": cache_control})
 
-        if (
-            isinstance(file, BufferedReader)
-            or isinstance(file, bytes)
-            or isinstance(file, FileIO)
-        ):
+        files = None
+        content = None
+        if isinstance(file, (BufferedReader, bytes, FileIO)):
             # bytes or byte-stream-like object received
             files = {"file": (filename, file, headers.pop("content-type"))}
-        else:
+        elif isinstance(file, (str, os.PathLike)):
             # str or pathlib.path received
             files = {
                 "file": (
@@ -546,9 +761,18 @@ class SyncBucketActionsMixin:
                     headers.pop("content-type"),
                 )
             }
+        else:
+            # memory buffer or chunks received, the metadata and cache control
+            # are only sent as headers
+            content = raw_upload_body(file, headers)
 
         response = self._request(
-            method, ["object", self.id, *path], files=files, headers=headers, data=_data
+            method,
+            ["object", self.id, *path],
+            files=files,
+            headers=headers,
+            data=_data if files else None,
+            content=content,
         )
 
         data: UploadData = response.json()
@@ -558,7 +782,7 @@ class SyncBucketActionsMixin:
     def upload(
         self,
         path: str,
-        file: Union[BufferedReader, bytes, FileIO, str, Path],
+        file: FileContent,
         file_options: Optional[FileOptions] = None,
     ) -> UploadResponse:
         """
@@ -570,18 +794,166 @@ class SyncBucketActionsMixin:
             The relative file path including the bucket ID. Should be of the format `bucket/folder/subfolder/filename.png`.
             The bucket must already exist before attempting to upload.
         file
-            The File object to be stored in the bucket. or a async generator of chunks
+            The File object to be stored in the bucket, its local path, or its
+            content as bytes, a memoryview, an mmap or an async iterator of chunks.
+            Memory views, mmaps and iterators are streamed as they are, without
+            being copied into a multipart form.
         file_options
             HTTP headers.
         """
         path_parts = relative_path_to_parts(path)
         return self._upload_or_update("POST", path_parts, file, file_options)
 
-    def update(
+    def upload_resumable(
         self,
         path: str,
         file: Union[BufferedReader, bytes, FileIO, str, Path],
         file_options: Optional[FileOptions] = None,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        parallel: int = 1,
+        retries: int = 3,
+        state_path: Optional[Union[str, os.PathLike[str]]] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> UploadResponse:
+        """
+        Uploads a large file in chunks, resuming where it stopped on failure.
+
+        This uses the resumable upload endpoint (the TUS protocol). A chunk
+        failing on a network error is sent again from the last byte the
+        server acknowledged, and the progress is saved to `state_path`, so
+        that calling this method again with the same arguments, even from
+        another process, resumes the upload instead of starting over.
+
+        Parameters
+        ----------
+        path
+            The file path in the bucket, including the file name. For example `folder/image.png`.
+        file
+            The file contents, a file-like object or the local path to upload.
+        file_options
+            The content type, cache control, upsert, metadata and headers, as for :meth:`upload`.
+        chunk_size
+            The size of the chunks. Supabase Storage requires 6 MiB, the default.
+        parallel
+            The number of parts uploaded concurrently, only used when the server
+            supports concatenating uploads.
+        retries
+            How many times to retry after a network error.
+        state_path
+            The JSON file where the progress is saved, removed once the upload is done.
+        on_progress
+            Called after every chunk with the bytes uploaded so far and the file size.
+        """
+        source = UploadSource(file)
+        try:
+            upload = SyncResumableUpload(
+                self._client,
+                self._base_url,
+                self._headers,
+                self.id,
+                "/".join(relative_path_to_parts(path)),
+                source,
+                file_options,
+                chunk_size=chunk_size,
+                parallel=parallel,
+                retries=retries,
+                state_path=state_path,
+                on_progress=on_progress,
+            )
+            return upload.run()
+        finally:
+            source.close()
+
+    def sync_dir(
+        self,
+        local_dir: Union[str, os.PathLike[str]],
+        prefix: str = "",
+        *,
+        delete: bool = False,
+        dry_run: bool = False,
+        checksum: bool = False,
+        concurrency: int = 8,
+    ) -> SyncReport:
+        """
+        Uploads the files of a local directory that are missing or changed under `prefix`.
+
+        A file is uploaded when its size differs from the object's, or else
+        when it was modified after the object was uploaded, or with
+        `checksum`, when its MD5 differs from the object's ETag. The failures
+        are collected in the report rather than raised, so that one file does
+        not stop the others.
+
+        Parameters
+        ----------
+        local_dir
+            The directory to upload, recursively.
+        prefix
+            The folder of the bucket to mirror it to, the root of the bucket by default.
+        delete
+            Whether to remove the objects under `prefix` that are not in the directory.
+        dry_run
+            Only report what would be uploaded and deleted.
+        checksum
+            Whether to compare the content of the files of the same size, which reads them.
+        concurrency
+            The maximum number of files uploaded at the same time.
+        """
+        dir_sync = SyncDirSync(
+            self,
+            delete=delete,
+            dry_run=dry_run,
+            checksum=checksum,
+            concurrency=concurrency,
+        )
+        return dir_sync.upload(local_dir, prefix)
+
+    def sync_to_dir(
+        self,
+        prefix: str,
+        local_dir: Union[str, os.PathLike[str]],
+        *,
+        delete: bool = False,
+        dry_run: bool = False,
+        checksum: bool = False,
+        concurrency: int = 8,
+    ) -> SyncReport:
+        """
+        Downloads the objects under `prefix` that are missing or changed in a local directory.
+
+        This is the reverse of :meth:`sync_dir`: the downloaded files get the
+        modification time of their object, so that they are only downloaded
+        again once the object changes.
+
+        Parameters
+        ----------
+        prefix
+            The folder of the bucket to download, recursively.
+        local_dir
+            The directory to mirror it to, created if needed.
+        delete
+            Whether to remove the local files that are not under `prefix`.
+        dry_run
+            Only report what would be downloaded and deleted.
+        checksum
+            Whether to compare the content of the files of the same size, which reads them.
+        concurrency
+            The maximum number of files downloaded at the same time.
+        """
+        dir_sync = SyncDirSync(
+            self,
+            delete=delete,
+            dry_run=dry_run,
+            checksum=checksum,
+            concurrency=concurrency,
+        )
+        return dir_sync.download(prefix, local_dir)
+
+    def update(
+        self,
+        path: str,
+        file: FileContent,
+        file_options: Optional[FileOptions] = None,
     ) -> UploadResponse:
         path_parts = relative_path_to_parts(path)
         return self._upload_or_update("PUT", path_parts, file, file_options)
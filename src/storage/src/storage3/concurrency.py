@@ -0,0 +1,104 @@
+"""Bounded concurrency for the transfers of the storage clients.
+
+The async and sync clients are generated from the same code, so each
+executor has the same interface: `submit` a transfer, wait for the
+`result` of its future, and `sleep` before retrying one. Leaving the
+`with` block cancels the transfers that have not finished, for instance
+when another one failed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Generic, Optional, Set, TypeVar
+
+T = TypeVar("T")
+
+SyncFuture = Future
+
+
+class AsyncFuture(Generic[T]):
+    """A transfer submitted to an :class:`AsyncExecutor`."""
+
+    def __init__(self, task: asyncio.Task[T]) -> None:
+        self._task = task
+
+    async def result(self) -> T:
+        return await self._task
+
+
+class AsyncExecutor:
+    """Runs at most `max_workers` transfers at a time on the event loop."""
+
+    def __init__(self, max_workers: int) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self._max_workers = max_workers
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task[Any]] = set()
+
+    def submit(
+        self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+    ) -> AsyncFuture[T]:
+        if self._semaphore is None:
+            # created here, where an event loop is running
+            self._semaphore = asyncio.Semaphore(self._max_workers)
+        semaphore = self._semaphore
+
+        async def run() -> T:
+            async with semaphore:
+                return await fn(*args, **kwargs)
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return AsyncFuture(task)
+
+    @staticmethod
+    async def sleep(seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    async def __aenter__(self) -> AsyncExecutor:
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class SyncExecutor:
+    """Runs at most `max_workers` transfers at a time in a thread pool.
+
+    The workers share the connection pool of the storage client's
+    :class:`httpx.Client`, which is thread safe.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self._max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> SyncFuture[T]:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                self._max_workers, thread_name_prefix="storage3"
+            )
+        return self._pool.submit(fn, *args, **kwargs)
+
+    @staticmethod
+    def sleep(seconds: float) -> None:
+        time.sleep(seconds)
+
+    def __enter__(self) -> SyncExecutor:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
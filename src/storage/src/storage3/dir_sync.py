@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Literal, NamedTuple, Optional, Union
+
+from pydantic import BaseModel
+
+# created by the dashboard to keep empty folders, never synced
+PLACEHOLDER = ".emptyFolderPlaceholder"
+# the maximum number of paths the API removes in one request
+REMOVE_BATCH_SIZE = 1000
+
+# `datetime.fromisoformat` only accepts 3 or 6 digits of fractional seconds
+# before Python 3.11, while PostgreSQL trims their trailing zeros.
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    value = value.replace(" ", "T", 1)
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    value = _FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), value, 1)
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class LocalFile(NamedTuple):
+    path: Path
+    size: int
+    mtime: float
+
+
+class RemoteFile(NamedTuple):
+    size: Optional[int]
+    etag: Optional[str]
+    """The MD5 of the content, for the objects not uploaded in several parts."""
+    modified: Optional[datetime]
+
+
+def walk_local(root: Union[str, os.PathLike[str]]) -> Dict[str, LocalFile]:
+    """The files under `root`, by their path relative to it with `/` separators."""
+    root = Path(root)
+    files: Dict[str, LocalFile] = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename == PLACEHOLDER:
+                continue
+            path = Path(dirpath, filename)
+            stat = path.stat()
+            files[path.relative_to(root).as_posix()] = LocalFile(
+                path, stat.st_size, stat.st_mtime
+            )
+    return files
+
+
+def remote_file(entry: Dict[str, Any]) -> RemoteFile:
+    """The attributes compared of an object returned by `list()`."""
+    metadata = entry.get("metadata") or {}
+    etag = metadata.get("eTag")
+    if etag is not None:
+        etag = etag.strip('"')
+        if "-" in etag:
+            # the ETag of a multipart upload is not the MD5 of the content
+            etag = None
+    return RemoteFile(
+        size=metadata.get("size", metadata.get("contentLength")),
+        etag=etag,
+        modified=parse_timestamp(metadata.get("lastModified"))
+        or parse_timestamp(entry.get("updated_at")),
+    )
+
+
+def md5_file(path: Path) -> str:
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_changed(
+    local: LocalFile,
+    remote: RemoteFile,
+    direction: Literal["upload", "download"],
+    checksum: bool,
+) -> bool:
+    """Whether the local and remote copies of a file differ.
+
+    Files of different sizes always differ. Otherwise, with `checksum`, the
+    MD5 of the local file is compared to the ETag of the object when it is
+    one. Else the modification times are compared: an object is modified
+    when it is uploaded, after the local file, while a downloaded file gets
+    the modification time of the object.
+    """
+    if remote.size is None or local.size != remote.size:
+        return True
+    if checksum and remote.etag is not None:
+        return md5_file(local.path) != remote.etag
+    if remote.modified is None:
+        return True
+    # the times of the objects are only precise to the millisecond
+    delta = local.mtime - remote.modified.timestamp()
+    if direction == "upload":
+        return delta > 1
+    return abs(delta) > 1
+
+
+def content_type(path: Path) -> str:
+    guessed, _ = mimetypes.guess_type(path.name)
+    return guessed or "application/octet-stream"
+
+
+def join_path(prefix: str, path: str) -> str:
+    return "/".join(part for part in (prefix, path) if part)
+
+
+class SyncReport(BaseModel):
+    """What a directory sync did, or would do in a dry run."""
+
+    direction: Literal["upload", "download"]
+    dry_run: bool = False
+    transferred: List[str] = []
+    """The paths, relative to the synced directory, of the files copied."""
+    bytes: int = 0
+    """The size of the files copied."""
+    unchanged: int = 0
+    deleted: List[str] = []
+    failed: Dict[str, str] = {}
+    """The error of every path that could not be copied or deleted."""
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def summary(self) -> str:
+        """One line describing the outcome, e.g. to print after a sync."""
+        verb = "uploaded" if self.direction == "upload" else "downloaded"
+        deleted = "deleted"
+        if self.dry_run:
+            verb = f"would be {verb}"
+            deleted = f"would be {deleted}"
+        return (
+            f"{len(self.transferred)} files {verb} ({self.bytes} bytes), "
+            f"{len(self.deleted)} {deleted}, {self.unchanged} unchanged, "
+            f"{len(self.failed)} failed"
+        )
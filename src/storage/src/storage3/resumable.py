@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import threading
+from io import BufferedReader, FileIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from httpx import Response
+from pydantic import BaseModel
+
+from .exceptions import StorageApiError
+from .utils import StorageException
+
+TUS_VERSION = "1.0.0"
+# Supabase Storage only accepts chunks of exactly 6 MiB, except for the last one
+DEFAULT_CHUNK_SIZE = 6 * 1024 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+"""Called with the number of bytes uploaded so far and the size of the file."""
+
+
+def encode_metadata(metadata: Dict[str, str]) -> str:
+    """The `Upload-Metadata` header, with the values encoded in base64."""
+    return ",".join(
+        f"{key} {base64.b64encode(value.encode()).decode()}"
+        for key, value in metadata.items()
+    )
+
+
+def tus_error(response: Response) -> StorageApiError:
+    """The error to raise for a failed request of the TUS protocol.
+
+    Its responses have a plain text body rather than the JSON error of the
+    rest of the storage API.
+    """
+    try:
+        body = response.json()
+        message = body.get("message") or body.get("error") or response.text
+    except ValueError:
+        message = response.text or response.reason_phrase
+    return StorageApiError(message, "ResumableUploadError", response.status_code)
+
+
+class UploadSource:
+    """Random access to the content of a file being uploaded.
+
+    Reads are serialized, so that the chunks of a parallel upload can be
+    read from a single file object.
+    """
+
+    def __init__(self, file: Union[BufferedReader, bytes, FileIO, str, Path]) -> None:
+        self._lock = threading.Lock()
+        self._owned = False
+        self._data: Optional[memoryview] = None
+        self._file: Any = None
+        if isinstance(file, bytes):
+            self._data = memoryview(file)
+            self.size = len(file)
+            # the content itself, other bytes of the same length are not resumed
+            digest = hashlib.sha256(file).hexdigest()
+            self.fingerprint = f"bytes:{self.size}:{digest}"
+            return
+        if isinstance(file, (BufferedReader, FileIO)):
+            self._file = file
+            self.size = os.fstat(file.fileno()).st_size
+        else:
+            self._file = open(file, "rb")
+            self._owned = True
+            self.size = os.fstat(self._file.fileno()).st_size
+        stat = os.fstat(self._file.fileno())
+        self.fingerprint = f"file:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def read(self, offset: int, size: int) -> bytes:
+        if self._data is not None:
+            return bytes(self._data[offset : offset + size])
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def close(self) -> None:
+        if self._owned:
+            self._file.close()
+
+
+class UploadPart(BaseModel):
+    """A range of the file uploaded as one TUS upload."""
+
+    start: int
+    end: int
+    url: Optional[str] = None
+    """The URL of the upload, once it has been created."""
+    offset: int = 0
+    """The number of bytes of the range the server acknowledged."""
+
+    @property
+    def done(self) -> bool:
+        return self.url is not None and self.start + self.offset >= self.end
+
+
+class ResumableUploadState(BaseModel):
+    """Progress of a resumable upload, persisted to resume it later.
+
+    A single part is uploaded directly as the object. Several parts are
+    partial uploads, concatenated into the object once they are all done.
+    """
+
+    bucket_id: str
+    path: str
+    size: int
+    chunk_size: int
+    fingerprint: str
+    """Identifies the content uploaded, so that a changed file is not resumed."""
+    parts: List[UploadPart]
+
+    @property
+    def uploaded(self) -> int:
+        return sum(part.offset for part in self.parts)
+
+
+def plan_parts(size: int, chunk_size: int, parallel: int) -> List[UploadPart]:
+    """Split `size` bytes into at most `parallel` parts of whole chunks."""
+    chunks = max(1, -(-size // chunk_size))
+    per_part = -(-chunks // min(parallel, chunks))
+    step = per_part * chunk_size
+    return [
+        UploadPart(start=start, end=min(start + step, size))
+        for start in range(0, max(size, 1), step)
+    ]
+
+
+class UploadStateStore:
+    """Saves a :class:`ResumableUploadState` to a JSON file after each chunk.
+
+    The file is rewritten atomically, so an interrupted upload resumes from
+    the last chunk the server acknowledged.
+    """
+
+    def __init__(self, path: Optional[Union[str, os.PathLike[str]]]) -> None:
+        self.path = None if path is None else Path(path)
+        self._lock = threading.Lock()
+
+    def load(self, state: ResumableUploadState) -> ResumableUploadState:
+        """The saved state of the upload described by `state`, or `state`.
+
+        Raises:
+            :class:`StorageException` If the saved state belongs to another upload.
+        """
+        if self.path is None:
+            return state
+        try:
+            saved = ResumableUploadState.model_validate_json(
+                self.path.read_text("utf-8")
+            )
+        except FileNotFoundError:
+            return state
+        if (saved.bucket_id, saved.path, saved.chunk_size) != (
+            state.bucket_id,
+            state.path,
+            state.chunk_size,
+        ):
+            raise StorageException(
+                f"The upload state {self.path} is for {saved.bucket_id}/{saved.path}, "
+                "delete it to start over"
+            )
+        if (saved.size, saved.fingerprint) != (state.size, state.fingerprint):
+            # the file changed since, what was uploaded is useless
+            return state
+        return saved
+
+    def update(
+        self, state: ResumableUploadState, part: UploadPart, **fields: Any
+    ) -> None:
+        """Change the progress of `part` and save it."""
+        with self._lock:
+            for name, value in fields.items():
+                setattr(part, name, value)
+            if self.path is None:
+                return
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(state.model_dump(mode="json")), "utf-8")
+            os.replace(tmp, self.path)
+
+    def remove(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
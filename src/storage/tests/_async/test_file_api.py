@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import base64
+import json
+import mmap
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from httpx import AsyncClient, MockTransport, Request, Response
+from storage3 import AsyncStorageClient
+
+from .. import AsyncBucketProxy
+from .test_dir_sync import FakeBucket
+from .test_dir_sync import bucket as dir_sync_bucket
+
+
+def bucket(requests: list[Request]) -> AsyncBucketProxy:
+    def handler(request: Request) -> Response:
+        request.read()
+        requests.append(request)
+        return Response(200, json={"Key": "bucket/file.bin"})
+
+    http_client = AsyncClient(transport=MockTransport(handler))
+    storage = AsyncStorageClient(
+        "http://localhost/storage/v1/", {"apikey": "key"}, http_client=http_client
+    )
+    return storage.from_("bucket")
+
+
+async def test_upload_memoryview_as_raw_body() -> None:
+    requests: list[Request] = []
+    content = bytes(range(256)) * 1000
+
+    await bucket(requests).upload(
+        "file.bin",
+        memoryview(content),
+        {
+            "content-type": "application/octet-stream",
+            "cache-control": "60",
+            "metadata": {"custom": "metadata"},
+        },
+    )
+
+    [request] = requests
+    assert request.content == content
+    assert request.headers["content-length"] == str(len(content))
+    assert request.headers["content-type"] == "application/octet-stream"
+    assert request.headers["cache-control"] == "max-age=60"
+    assert json.loads(base64.b64decode(request.headers["x-metadata"])) == {
+        "custom": "metadata"
+    }
+
+
+async def test_update_mmap(tmp_path: Path) -> None:
+    requests: list[Request] = []
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"mapped content")
+
+    with (
+        open(path, "rb") as f,
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+    ):
+        await bucket(requests).update("file.bin", mapped)
+
+    [request] = requests
+    assert request.method == "PUT"
+    assert request.content == b"mapped content"
+    assert "x-upsert" not in request.headers
+
+
+async def test_upload_chunks() -> None:
+    requests: list[Request] = []
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for i in range(3):
+            yield f"chunk {i}\n".encode()
+
+    await bucket(requests).upload("file.bin", chunks())
+
+    [request] = requests
+    assert request.content == b"chunk 0\nchunk 1\nchunk 2\n"
+    assert request.headers["transfer-encoding"] == "chunked"
+
+
+async def test_upload_to_signed_url_memoryview() -> None:
+    requests: list[Request] = []
+
+    await bucket(requests).upload_to_signed_url(
+        "file.bin", "token", memoryview(b"content")
+    )
+
+    [request] = requests
+    assert request.url.params["token"] == "token"
+    assert request.content == b"content"
+    assert request.headers["content-length"] == "7"
+
+
+async def test_upload_bytes_as_multipart() -> None:
+    requests: list[Request] = []
+
+    await bucket(requests).upload("file.bin", b"content")
+
+    [request] = requests
+    assert request.headers["content-type"].startswith("multipart/form-data")
+
+
+async def test_iter_objects_across_pages_and_folders() -> None:
+    fake = FakeBucket()
+    paths = [
+        "top.txt",
+        *(f"photos/{i}.jpg" for i in range(5)),
+        "photos/2024/a.jpg",
+        "photos/2024/b.jpg",
+        "docs/deep/er/file.md",
+    ]
+    for path in paths:
+        fake.put(path, b"content", 0)
+
+    objects = [entry async for entry in dir_sync_bucket(fake).iter_objects(page_size=2)]
+
+    assert sorted(entry["path"] for entry in objects) == sorted(paths)
+    assert all(entry["id"] is not None for entry in objects)
+    listed = sorted(
+        (body["prefix"], body["offset"])
+        for body in (json.loads(request.content) for request in fake.requests)
+    )
+    assert listed == [
+        ("", 0),
+        ("", 2),
+        ("docs", 0),
+        ("docs/deep", 0),
+        ("docs/deep/er", 0),
+        ("photos", 0),
+        ("photos", 2),
+        ("photos", 4),
+        ("photos", 6),
+        ("photos/2024", 0),
+        ("photos/2024", 2),
+    ]
+
+
+async def test_iter_objects_not_recursive() -> None:
+    fake = FakeBucket()
+    for path in ("photos/a.jpg", "photos/2024/b.jpg", "photos/c.jpg"):
+        fake.put(path, b"content", 0)
+
+    objects = [
+        entry
+        async for entry in dir_sync_bucket(fake).iter_objects(
+            "photos/", recursive=False
+        )
+    ]
+
+    assert [(entry["path"], entry["id"]) for entry in objects] == [
+        ("photos/2024", None),
+        ("photos/a.jpg", "photos/a.jpg"),
+        ("photos/c.jpg", "photos/c.jpg"),
+    ]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from collections.abc import Generator
+import mmap
+from collections.abc import Generator, Iterator
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 from unittest.mock import Mock, patch
@@ -283,6 +284,97 @@ def test_client_upload(
     assert image_info.get("metadata", {}).get("mimetype") == file.mime_type
 
 
+def test_client_upload_memory_buffers(
+    storage_file_client: SyncBucketProxy, file: FileForTesting
+) -> None:
+    """Ensure we can upload memoryviews and memory-mapped files"""
+    storage_file_client.upload(
+        file.bucket_path,
+        memoryview(file.file_content),
+        {"content-type": file.mime_type, "metadata": {"custom": "metadata"}},
+    )
+    image = storage_file_client.download(file.bucket_path)
+    info = storage_file_client.info(file.bucket_path)
+
+    assert image == file.file_content
+    assert info["metadata"] == {"custom": "metadata"}
+
+    with (
+        open(file.local_path, "rb") as f,
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+    ):
+        storage_file_client.update(
+            file.bucket_path, mapped, {"content-type": file.mime_type}
+        )
+    image = storage_file_client.download(file.bucket_path)
+
+    assert image == file.file_content
+
+
+def test_client_upload_chunks(
+    storage_file_client: SyncBucketProxy, file: FileForTesting
+) -> None:
+    """Ensure we can upload an async iterator of chunks"""
+
+    def chunks() -> Iterator[bytes]:
+        for start in range(0, len(file.file_content), 100):
+            yield file.file_content[start : start + 100]
+
+    storage_file_client.upload(
+        file.bucket_path, chunks(), {"content-type": file.mime_type}
+    )
+    image = storage_file_client.download(file.bucket_path)
+
+    assert image == file.file_content
+
+
+def test_client_upload_resumable(
+    storage_file_client: SyncBucketProxy, file: FileForTesting, tmp_path: Path
+) -> None:
+    """Ensure we can upload files with the resumable upload endpoint"""
+    progress: list[tuple[int, int]] = []
+    storage_file_client.upload_resumable(
+        file.bucket_path,
+        file.local_path,
+        {"content-type": file.mime_type},
+        state_path=tmp_path / "upload.json",
+        on_progress=lambda done, total: progress.append((done, total)),
+    )
+
+    image = storage_file_client.download(file.bucket_path)
+    files = storage_file_client.list(file.bucket_folder)
+    image_info = next((f for f in files if f.get("name") == file.name), None)
+
+    assert image == file.file_content
+    assert progress[-1] == (len(file.file_content), len(file.file_content))
+    assert image_info is not None
+    assert image_info.get("metadata", {}).get("mimetype") == file.mime_type
+    assert not (tmp_path / "upload.json").exists()
+
+
+def test_client_iter_objects(
+    storage_file_client: SyncBucketProxy, two_files: list[FileForTesting]
+) -> None:
+    """Ensure we can walk all the objects of a folder, recursively"""
+    for file in two_files:
+        storage_file_client.upload(
+            f"{file.bucket_folder}/nested/{file.name}",
+            file.local_path,
+            {"content-type": file.mime_type},
+        )
+
+    paths = [
+        entry["path"]
+        for entry in storage_file_client.iter_objects(
+            two_files[0].bucket_folder, page_size=1
+        )
+    ]
+
+    assert sorted(paths) == sorted(
+        f"{file.bucket_folder}/nested/{file.name}" for file in two_files
+    )
+
+
 def test_client_upload_with_query(
     storage_file_client: SyncBucketProxy, file: FileForTesting
 ) -> None:
@@ -322,6 +414,46 @@ def test_client_download_with_query_doesnt_lose_params(
         assert str(expected_url) == actual_url
 
 
+def test_client_download_stream(
+    storage_file_client: SyncBucketProxy, file: FileForTesting
+) -> None:
+    """Ensure we can download a file chunk by chunk"""
+    storage_file_client.upload(
+        file.bucket_path, file.local_path, {"content-type": file.mime_type}
+    )
+
+    chunks = [
+        chunk
+        for chunk in storage_file_client.download_stream(
+            file.bucket_path, chunk_size=64
+        )
+    ]
+
+    assert len(chunks) > 1
+    assert b"".join(chunks) == file.file_content
+
+
+def test_client_download_to(
+    storage_file_client: SyncBucketProxy, file: FileForTesting, tmp_path: Path
+) -> None:
+    """Ensure we can download a file to disk, and that failures leave no file"""
+    storage_file_client.upload(
+        file.bucket_path, file.local_path, {"content-type": file.mime_type}
+    )
+    destination = tmp_path / "downloaded.svg"
+
+    written = storage_file_client.download_to(file.bucket_path, destination)
+
+    assert written == len(file.file_content)
+    assert destination.read_bytes() == file.file_content
+
+    with pytest.raises(StorageApiError):
+        storage_file_client.download_to(
+            f"missing_{file.bucket_path}", tmp_path / "missing.svg"
+        )
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["downloaded.svg"]
+
+
 def test_client_update(
     storage_file_client: SyncBucketProxy,
     two_files: list[FileForTesting],
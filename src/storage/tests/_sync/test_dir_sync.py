@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from httpx import Client, MockTransport, Request, Response
+from storage3 import SyncStorageClient
+
+from .. import SyncBucketProxy
+
+LIST_URL = "/storage/v1/object/list/bucket"
+OBJECT_URL = "/storage/v1/object/bucket/"
+
+
+def iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class FakeBucket:
+    """In memory bucket answering the list, upload, download and remove calls."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.modified: dict[str, float] = {}
+        self.requests: list[Request] = []
+
+    def put(self, path: str, content: bytes, modified: float) -> None:
+        self.objects[path] = content
+        self.modified[path] = modified
+
+    def handler(self, request: Request) -> Response:
+        self.requests.append(request)
+        path = request.url.path
+        if path == LIST_URL:
+            return Response(200, json=self._list(json.loads(request.content)))
+        if request.method == "DELETE":
+            for prefix in json.loads(request.content)["prefixes"]:
+                del self.objects[prefix]
+            return Response(200, json=[])
+        name = path[len(OBJECT_URL) :]
+        if request.method == "GET":
+            return Response(200, content=self.objects[name])
+        self.put(name, self._multipart_file(request), time.time())
+        return Response(200, json={"Key": f"bucket/{name}"})
+
+    def _list(self, body: dict[str, Any]) -> list[dict[str, Any]]:
+        prefix = body["prefix"] + "/" if body["prefix"] else ""
+        entries: dict[str, dict[str, Any]] = {}
+        for path, content in self.objects.items():
+            if not path.startswith(prefix):
+                continue
+            name, _, rest = path[len(prefix) :].partition("/")
+            if rest:
+                entries[name] = {"name": name, "id": None, "metadata": None}
+            else:
+                md5 = hashlib.md5(content).hexdigest()
+                entries[name] = {
+                    "name": name,
+                    "id": path,
+                    "updated_at": iso(self.modified[path]),
+                    "metadata": {"size": len(content), "eTag": f'"{md5}"'},
+                }
+        page = [entries[name] for name in sorted(entries)]
+        return page[body["offset"] : body["offset"] + body["limit"]]
+
+    @staticmethod
+    def _multipart_file(request: Request) -> bytes:
+        boundary = request.headers["content-type"].split("boundary=")[1].encode()
+        for part in request.content.split(b"--" + boundary):
+            headers, _, content = part.partition(b"\r\n\r\n")
+            if b'name="file"' in headers:
+                return content[: -len(b"\r\n")]
+        raise AssertionError("no file in the form")
+
+    def methods(self) -> list[str]:
+        return [
+            request.method for request in self.requests if request.url.path != LIST_URL
+        ]
+
+
+def bucket(fake: FakeBucket) -> SyncBucketProxy:
+    http_client = Client(transport=MockTransport(fake.handler))
+    storage = SyncStorageClient(
+        "http://localhost/storage/v1/", {"apikey": "key"}, http_client=http_client
+    )
+    return storage.from_("bucket")
+
+
+def write(path: Path, content: bytes, mtime: float) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    os.utime(path, (mtime, mtime))
+
+
+def test_sync_dir_uploads_changed_files(tmp_path: Path) -> None:
+    now = time.time()
+    write(tmp_path / "same.txt", b"same", now - 100)
+    write(tmp_path / "sub" / "resized.txt", b"longer content", now - 100)
+    write(tmp_path / "sub" / "new.txt", b"new", now - 100)
+    write(tmp_path / "edited.txt", b"edit", now)
+    fake = FakeBucket()
+    fake.put("backup/same.txt", b"same", now - 50)
+    fake.put("backup/sub/resized.txt", b"content", now - 50)
+    fake.put("backup/edited.txt", b"old!", now - 50)
+    fake.put("backup/sub/deep/stale.txt", b"stale", now - 50)
+
+    report = bucket(fake).sync_dir(tmp_path, "backup/", delete=True)
+
+    assert report.transferred == ["edited.txt", "sub/new.txt", "sub/resized.txt"]
+    assert report.bytes == 21
+    assert report.deleted == ["sub/deep/stale.txt"]
+    assert report.unchanged == 1
+    assert report.ok
+    assert fake.objects == {
+        "backup/same.txt": b"same",
+        "backup/sub/resized.txt": b"longer content",
+        "backup/sub/new.txt": b"new",
+        "backup/edited.txt": b"edit",
+    }
+    assert report.summary() == (
+        "3 files uploaded (21 bytes), 1 deleted, 1 unchanged, 0 failed"
+    )
+
+    report = bucket(fake).sync_dir(tmp_path, "backup", delete=True)
+
+    assert (report.transferred, report.deleted, report.unchanged) == ([], [], 4)
+
+
+def test_sync_dir_dry_run(tmp_path: Path) -> None:
+    write(tmp_path / "new.txt", b"new", time.time())
+    fake = FakeBucket()
+    fake.put("stale.txt", b"stale", time.time())
+
+    report = bucket(fake).sync_dir(tmp_path, delete=True, dry_run=True)
+
+    assert report.transferred == ["new.txt"]
+    assert report.deleted == ["stale.txt"]
+    assert fake.methods() == []
+    assert report.summary() == (
+        "1 files would be uploaded (3 bytes), 1 would be deleted, 0 unchanged, 0 failed"
+    )
+
+
+def test_sync_dir_checksum(tmp_path: Path) -> None:
+    now = time.time()
+    write(tmp_path / "same.txt", b"same", now)
+    write(tmp_path / "edited.txt", b"edit", now - 100)
+    fake = FakeBucket()
+    fake.put("same.txt", b"same", now - 50)
+    fake.put("edited.txt", b"old!", now - 50)
+
+    report = bucket(fake).sync_dir(tmp_path, checksum=True)
+
+    assert report.transferred == ["edited.txt"]
+    assert report.unchanged == 1
+
+
+def test_sync_to_dir(tmp_path: Path) -> None:
+    now = time.time()
+    fake = FakeBucket()
+    fake.put("backup/a.txt", b"a", now - 50)
+    fake.put("backup/sub/b.txt", b"bb", now - 50)
+    fake.put("other/c.txt", b"c", now - 50)
+    write(tmp_path / "stale.txt", b"stale", now)
+
+    report = bucket(fake).sync_to_dir("backup", tmp_path, delete=True)
+
+    assert report.transferred == ["a.txt", "sub/b.txt"]
+    assert report.bytes == 3
+    assert report.deleted == ["stale.txt"]
+    assert (tmp_path / "sub" / "b.txt").read_bytes() == b"bb"
+    assert not (tmp_path / "stale.txt").exists()
+    assert abs((tmp_path / "a.txt").stat().st_mtime - (now - 50)) < 1
+
+    fake.requests.clear()
+    report = bucket(fake).sync_to_dir("backup", tmp_path, delete=True)
+
+    assert report.unchanged == 2
+    assert fake.methods() == []
+
+
+def test_sync_failures_are_reported(tmp_path: Path) -> None:
+    write(tmp_path / "a.txt", b"a", time.time())
+    write(tmp_path / "b.txt", b"b", time.time())
+    fake = FakeBucket()
+    handler = fake.handler
+
+    def failing(request: Request) -> Response:
+        if request.url.path.endswith("/a.txt"):
+            return Response(
+                400, json={"message": "Denied", "error": "denied", "statusCode": 403}
+            )
+        return handler(request)
+
+    fake.handler = failing  # type: ignore[method-assign]
+
+    report = bucket(fake).sync_dir(tmp_path)
+
+    assert report.transferred == ["b.txt"]
+    assert list(report.failed) == ["a.txt"]
+    assert not report.ok
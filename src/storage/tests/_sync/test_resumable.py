@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import base64
+from pathlib import Path
+
+import pytest
+from httpx import Client, ConnectError, MockTransport, Request, Response
+from storage3 import SyncStorageClient
+from storage3.exceptions import StorageApiError
+
+from .. import SyncBucketProxy
+
+BASE_URL = "http://localhost/storage/v1/"
+ENDPOINT = "/storage/v1/upload/resumable"
+
+
+class FakeTusServer:
+    """Minimal TUS server keeping the uploads in memory."""
+
+    def __init__(self, concatenation: bool = False) -> None:
+        self.concatenation = concatenation
+        self.uploads: dict[str, bytearray] = {}
+        self.metadata: dict[str, dict[str, str]] = {}
+        self.objects: dict[str, bytes] = {}
+        self.requests: list[Request] = []
+        self.fail_patches: set[int] = set()
+        self._patches = 0
+
+    def handler(self, request: Request) -> Response:
+        self.requests.append(request)
+        if request.method == "OPTIONS":
+            extensions = "creation,termination"
+            if self.concatenation:
+                extensions += ",concatenation"
+            return Response(204, headers={"Tus-Extension": extensions})
+        if request.method == "POST":
+            return self._create(request)
+        upload_id = request.url.path.rsplit("/", 1)[-1]
+        data = self.uploads.get(upload_id)
+        if data is None:
+            return Response(404, text="Upload not found")
+        if request.method == "HEAD":
+            return Response(200, headers={"Upload-Offset": str(len(data))})
+        self._patches += 1
+        if self._patches in self.fail_patches:
+            raise ConnectError("connection reset", request=request)
+        if int(request.headers["Upload-Offset"]) != len(data):
+            return Response(409, text="Offset mismatch")
+        data.extend(request.content)
+        self._complete(upload_id)
+        return Response(204, headers={"Upload-Offset": str(len(data))})
+
+    def _create(self, request: Request) -> Response:
+        metadata = {}
+        for item in request.headers["Upload-Metadata"].split(","):
+            key, value = item.split(" ")
+            metadata[key] = base64.b64decode(value).decode()
+        concat = request.headers.get("Upload-Concat", "")
+        if concat.startswith("final;"):
+            ids = [url.rsplit("/", 1)[-1] for url in concat[6:].split(" ")]
+            self.objects[metadata["objectName"]] = b"".join(
+                bytes(self.uploads[i]) for i in ids
+            )
+            return Response(201)
+        upload_id = str(len(self.uploads))
+        self.uploads[upload_id] = bytearray()
+        self.metadata[upload_id] = {
+            **metadata,
+            "length": request.headers["Upload-Length"],
+            "concat": concat,
+        }
+        self._complete(upload_id)
+        return Response(201, headers={"Location": f"{ENDPOINT}/{upload_id}"})
+
+    def _complete(self, upload_id: str) -> None:
+        metadata = self.metadata[upload_id]
+        data = self.uploads[upload_id]
+        if not metadata["concat"] and len(data) == int(metadata["length"]):
+            self.objects[metadata["objectName"]] = bytes(data)
+
+    def methods(self) -> list[str]:
+        return [request.method for request in self.requests]
+
+
+def bucket(server: FakeTusServer) -> SyncBucketProxy:
+    http_client = Client(transport=MockTransport(server.handler))
+    storage = SyncStorageClient(BASE_URL, {"apikey": "key"}, http_client=http_client)
+    return storage.from_("bucket")
+
+
+def test_upload_in_chunks() -> None:
+    server = FakeTusServer()
+    progress: list[tuple[int, int]] = []
+    content = bytes(range(25))
+
+    response = bucket(server).upload_resumable(
+        "folder/file.bin",
+        content,
+        {"content-type": "application/octet-stream", "metadata": {"a": 1}},
+        chunk_size=10,
+        on_progress=lambda done, total: progress.append((done, total)),
+    )
+
+    assert response.full_path == "bucket/folder/file.bin"
+    assert server.objects == {"folder/file.bin": content}
+    assert server.methods() == ["POST", "PATCH", "PATCH", "PATCH"]
+    assert progress == [(10, 25), (20, 25), (25, 25)]
+    metadata = server.metadata["0"]
+    assert metadata["bucketName"] == "bucket"
+    assert metadata["contentType"] == "application/octet-stream"
+    assert metadata["metadata"] == '{"a": 1}'
+    assert server.requests[0].headers["Tus-Resumable"] == "1.0.0"
+    assert server.requests[0].headers["apikey"] == "key"
+
+
+def test_retry_from_acknowledged_offset() -> None:
+    server = FakeTusServer()
+    server.fail_patches = {2}
+    content = bytes(range(25))
+
+    bucket(server).upload_resumable("file.bin", content, chunk_size=10)
+
+    assert server.objects == {"file.bin": content}
+    assert server.methods() == ["POST", "PATCH", "PATCH", "HEAD", "PATCH", "PATCH"]
+
+
+def test_give_up_after_retries() -> None:
+    server = FakeTusServer()
+    server.fail_patches = {1, 2}
+
+    with pytest.raises(ConnectError):
+        bucket(server).upload_resumable(
+            "file.bin", b"content", chunk_size=10, retries=1
+        )
+
+
+def test_resume_from_saved_state(tmp_path: Path) -> None:
+    server = FakeTusServer()
+    source = tmp_path / "file.bin"
+    source.write_bytes(bytes(range(25)))
+    state_path = tmp_path / "upload.json"
+
+    class Interrupted(Exception):
+        pass
+
+    def interrupt(done: int, total: int) -> None:
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        bucket(server).upload_resumable(
+            "file.bin",
+            source,
+            chunk_size=10,
+            state_path=state_path,
+            on_progress=interrupt,
+        )
+    assert state_path.exists()
+    server.requests.clear()
+
+    bucket(server).upload_resumable(
+        "file.bin", source, chunk_size=10, state_path=state_path
+    )
+
+    assert server.objects == {"file.bin": source.read_bytes()}
+    assert server.methods() == ["HEAD", "PATCH", "PATCH"]
+    assert not state_path.exists()
+
+
+def test_changed_bytes_are_not_resumed(tmp_path: Path) -> None:
+    server = FakeTusServer()
+    state_path = tmp_path / "upload.json"
+
+    class Interrupted(Exception):
+        pass
+
+    def interrupt(done: int, total: int) -> None:
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        bucket(server).upload_resumable(
+            "file.bin",
+            bytes(25),
+            chunk_size=10,
+            state_path=state_path,
+            on_progress=interrupt,
+        )
+    server.requests.clear()
+    content = bytes(range(25))
+
+    bucket(server).upload_resumable(
+        "file.bin", content, chunk_size=10, state_path=state_path
+    )
+
+    assert server.objects == {"file.bin": content}
+    assert server.methods() == ["POST", "PATCH", "PATCH", "PATCH"]
+
+
+def test_parallel_parts_are_concatenated() -> None:
+    server = FakeTusServer(concatenation=True)
+    content = bytes(range(50))
+
+    bucket(server).upload_resumable("file.bin", content, chunk_size=10, parallel=3)
+
+    assert server.objects == {"file.bin": content}
+    assert sorted(m["length"] for m in server.metadata.values()) == ["10", "20", "20"]
+    assert {m["concat"] for m in server.metadata.values()} == {"partial"}
+    assert server.requests[-1].headers["Upload-Concat"].startswith("final;")
+
+
+def test_parallel_needs_concatenation() -> None:
+    server = FakeTusServer()
+    content = bytes(range(50))
+
+    bucket(server).upload_resumable("file.bin", content, chunk_size=10, parallel=3)
+
+    assert server.objects == {"file.bin": content}
+    assert len(server.uploads) == 1
+    assert "Upload-Concat" not in server.requests[1].headers
+
+
+def test_resumed_parts_need_concatenation(tmp_path: Path) -> None:
+    server = FakeTusServer(concatenation=True)
+    content = bytes(range(50))
+    state_path = tmp_path / "upload.json"
+
+    class Interrupted(Exception):
+        pass
+
+    def interrupt(done: int, total: int) -> None:
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        bucket(server).upload_resumable(
+            "file.bin",
+            content,
+            chunk_size=10,
+            parallel=3,
+            state_path=state_path,
+            on_progress=interrupt,
+        )
+    server.concatenation = False
+    server.requests.clear()
+
+    bucket(server).upload_resumable(
+        "file.bin", content, chunk_size=10, state_path=state_path
+    )
+
+    assert server.objects == {"file.bin": content}
+    assert server.methods() == ["OPTIONS", "POST"] + ["PATCH"] * 5
+    assert "Upload-Concat" not in server.requests[1].headers
+
+
+def test_upload_error() -> None:
+    server = FakeTusServer()
+    server.handler = lambda request: Response(413, text="Payload too large")  # type: ignore[method-assign]
+
+    with pytest.raises(StorageApiError) as exc_info:
+        bucket(server).upload_resumable("file.bin", b"content")
+    assert exc_info.value.status == 413
+    assert exc_info.value.message == "Payload too large"